@@ -23,6 +23,9 @@ from app.core.config import settings
 
 # Importar explícitamente todos los modelos para que Alembic los detecte
 from app.models.archivo import Archivo
+from app.models.carga import CargaArchivo
+from app.models.cuarentena import TransaccionCuarentena
+from app.models.perfil_mapeo import PerfilMapeo
 from app.models.transaccion import Transaccion
 # Importar cualquier otro modelo aquí
 
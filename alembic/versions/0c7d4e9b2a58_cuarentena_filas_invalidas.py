@@ -0,0 +1,39 @@
+"""cuarentena de filas inválidas
+
+Revision ID: 0c7d4e9b2a58
+Revises: f3b8e1c6a294
+Create Date: 2026-10-19 19:36:04.571920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c7d4e9b2a58'
+down_revision = 'f3b8e1c6a294'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('archivos', sa.Column('filas_invalidas', sa.Integer(), nullable=True))
+    op.create_table(
+        'transacciones_cuarentena',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('archivo_id', sa.Integer(), nullable=False),
+        sa.Column('fila', sa.Integer(), nullable=False),
+        sa.Column('motivos', sa.String(), nullable=False),
+        sa.Column('datos', sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(['archivo_id'], ['archivos.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_transacciones_cuarentena_id'), 'transacciones_cuarentena', ['id'], unique=False)
+    op.create_index(op.f('ix_transacciones_cuarentena_archivo_id'), 'transacciones_cuarentena', ['archivo_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_transacciones_cuarentena_archivo_id'), table_name='transacciones_cuarentena')
+    op.drop_index(op.f('ix_transacciones_cuarentena_id'), table_name='transacciones_cuarentena')
+    op.drop_table('transacciones_cuarentena')
+    op.drop_column('archivos', 'filas_invalidas')
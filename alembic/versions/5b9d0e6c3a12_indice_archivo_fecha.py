@@ -0,0 +1,25 @@
+"""indice por archivo y fecha
+
+Revision ID: 5b9d0e6c3a12
+Revises: c41e7a5d2f90
+Create Date: 2026-10-19 13:40:05.207614
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b9d0e6c3a12'
+down_revision = 'c41e7a5d2f90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Sobre la tabla particionada se crea en cada partición, incluidas las futuras
+    op.create_index('ix_transacciones_archivo_id_fecha', 'transacciones', ['archivo_id', 'fecha'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transacciones_archivo_id_fecha', table_name='transacciones')
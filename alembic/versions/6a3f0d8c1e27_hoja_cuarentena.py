@@ -0,0 +1,24 @@
+"""hoja de las filas en cuarentena
+
+Revision ID: 6a3f0d8c1e27
+Revises: 0c7d4e9b2a58
+Create Date: 2026-10-19 20:58:13.904316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a3f0d8c1e27'
+down_revision = '0c7d4e9b2a58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('transacciones_cuarentena', sa.Column('hoja', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('transacciones_cuarentena', 'hoja')
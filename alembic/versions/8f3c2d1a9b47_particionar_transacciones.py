@@ -0,0 +1,82 @@
+"""particionar transacciones por archivo
+
+Revision ID: 8f3c2d1a9b47
+Revises: 233a76d279a1
+Create Date: 2026-10-19 10:12:31.412907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f3c2d1a9b47'
+down_revision = '233a76d279a1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Se conserva la tabla actual para copiar sus filas a la tabla particionada
+    op.drop_index('ix_transacciones_id_transaccion', table_name='transacciones')
+    op.drop_index('ix_transacciones_id', table_name='transacciones')
+    op.rename_table('transacciones', 'transacciones_legacy')
+    op.execute('ALTER TABLE transacciones_legacy RENAME CONSTRAINT transacciones_pkey TO transacciones_legacy_pkey')
+
+    op.create_table('transacciones',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('transacciones_id_seq'::regclass)"), nullable=False),
+    sa.Column('archivo_id', sa.Integer(), nullable=False),
+    sa.Column('id_transaccion', sa.String(), nullable=False),
+    sa.Column('fecha', sa.DateTime(), nullable=False),
+    sa.Column('cuenta_origen', sa.String(), nullable=False),
+    sa.Column('cuenta_destino', sa.String(), nullable=False),
+    sa.Column('monto', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('estado', sa.String(), nullable=False),
+    sa.Column('extra_data', sa.JSON(), nullable=True),
+    sa.CheckConstraint("estado IN ('Exitosa', 'Fallida')", name='check_estado'),
+    sa.ForeignKeyConstraint(['archivo_id'], ['archivos.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', 'archivo_id'),
+    postgresql_partition_by='LIST (archivo_id)'
+    )
+    op.execute('ALTER SEQUENCE transacciones_id_seq OWNED BY transacciones.id')
+    op.create_index(op.f('ix_transacciones_id'), 'transacciones', ['id'], unique=False)
+    op.create_index(op.f('ix_transacciones_id_transaccion'), 'transacciones', ['id_transaccion'], unique=False)
+    op.execute('CREATE TABLE transacciones_default PARTITION OF transacciones DEFAULT')
+
+    # Una partición por cada archivo existente
+    op.execute("""
+        DO $$
+        DECLARE a RECORD;
+        BEGIN
+            FOR a IN SELECT id FROM archivos LOOP
+                EXECUTE format('CREATE TABLE transacciones_p%s PARTITION OF transacciones FOR VALUES IN (%s)', a.id, a.id);
+            END LOOP;
+        END $$
+    """)
+    op.execute('INSERT INTO transacciones SELECT * FROM transacciones_legacy')
+    op.drop_table('transacciones_legacy')
+
+
+def downgrade() -> None:
+    op.create_table('transacciones_legacy',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('transacciones_id_seq'::regclass)"), nullable=False),
+    sa.Column('archivo_id', sa.Integer(), nullable=False),
+    sa.Column('id_transaccion', sa.String(), nullable=False),
+    sa.Column('fecha', sa.DateTime(), nullable=False),
+    sa.Column('cuenta_origen', sa.String(), nullable=False),
+    sa.Column('cuenta_destino', sa.String(), nullable=False),
+    sa.Column('monto', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('estado', sa.String(), nullable=False),
+    sa.Column('extra_data', sa.JSON(), nullable=True),
+    sa.CheckConstraint("estado IN ('Exitosa', 'Fallida')", name='check_estado'),
+    sa.ForeignKeyConstraint(['archivo_id'], ['archivos.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', name='transacciones_legacy_pkey')
+    )
+    op.execute('INSERT INTO transacciones_legacy SELECT * FROM transacciones')
+    op.execute('ALTER SEQUENCE transacciones_id_seq OWNED BY transacciones_legacy.id')
+    # Eliminar la tabla particionada elimina también todas sus particiones
+    op.drop_table('transacciones')
+    op.rename_table('transacciones_legacy', 'transacciones')
+    op.execute('ALTER TABLE transacciones RENAME CONSTRAINT transacciones_legacy_pkey TO transacciones_pkey')
+    op.create_index(op.f('ix_transacciones_id'), 'transacciones', ['id'], unique=False)
+    op.create_index(op.f('ix_transacciones_id_transaccion'), 'transacciones', ['id_transaccion'], unique=False)
@@ -0,0 +1,65 @@
+"""quitar la partición por defecto y la clave foránea de transacciones, y marcar los archivos ya ingeridos
+
+Revision ID: a7d3f1c9e852
+Revises: e1c9f4a2b736
+Create Date: 2026-10-19 19:02:17.845213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3f1c9e852'
+down_revision = 'e1c9f4a2b736'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Los archivos con estadísticas terminaron su ingesta antes de que existiera fecha_ingesta;
+    # los que no las tienen quedaron a medias y los elimina el job de retención
+    op.execute(
+        "UPDATE archivos SET fecha_ingesta = fecha_carga "
+        "WHERE fecha_ingesta IS NULL AND total_transacciones IS NOT NULL"
+    )
+
+    # DETACH PARTITION CONCURRENTLY no admite una partición por defecto: sus filas pasan a
+    # una partición por archivo
+    op.execute('ALTER TABLE transacciones DETACH PARTITION transacciones_default')
+    op.execute("""
+        DO $$
+        DECLARE a RECORD;
+        BEGIN
+            FOR a IN SELECT DISTINCT archivo_id FROM transacciones_default LOOP
+                EXECUTE format('CREATE TABLE transacciones_p%s PARTITION OF transacciones FOR VALUES IN (%s)', a.archivo_id, a.archivo_id);
+            END LOOP;
+        END $$
+    """)
+    op.execute('INSERT INTO transacciones SELECT * FROM transacciones_default')
+    op.drop_table('transacciones_default')
+
+    # Con la clave foránea, adjuntar o eliminar una partición bloquea la tabla archivos
+    # (eliminarla, con ACCESS EXCLUSIVE). Sin partición por defecto, solo se pueden insertar
+    # transacciones de un archivo registrado: su partición se crea junto con él y se
+    # elimina antes de borrarlo.
+    # El nombre depende de cómo se creó la tabla: al particionarla, la tabla anterior conservó
+    # transacciones_archivo_id_fkey y la nueva recibió transacciones_archivo_id_fkey1
+    op.execute("""
+        DO $$
+        DECLARE c RECORD;
+        BEGIN
+            FOR c IN SELECT conname FROM pg_constraint
+                     WHERE conrelid = 'transacciones'::regclass AND confrelid = 'archivos'::regclass
+                       AND contype = 'f' AND conparentid = 0 LOOP
+                EXECUTE format('ALTER TABLE transacciones DROP CONSTRAINT %I', c.conname);
+            END LOOP;
+        END $$
+    """)
+
+
+def downgrade() -> None:
+    op.create_foreign_key(
+        'transacciones_archivo_id_fkey', 'transacciones', 'archivos', ['archivo_id'], ['id'], ondelete='CASCADE'
+    )
+    op.execute('CREATE TABLE transacciones_default PARTITION OF transacciones DEFAULT')
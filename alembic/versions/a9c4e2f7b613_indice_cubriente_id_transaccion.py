@@ -0,0 +1,30 @@
+"""indice cubriente por id de transaccion
+
+Revision ID: a9c4e2f7b613
+Revises: e7a2c9d4b815
+Create Date: 2026-10-19 16:05:42.871306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9c4e2f7b613'
+down_revision = 'e7a2c9d4b815'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Incluye las columnas del historial para resolver la búsqueda por ID solo con el índice
+    op.drop_index('ix_transacciones_id_transaccion', table_name='transacciones')
+    op.create_index(
+        'ix_transacciones_id_transaccion', 'transacciones', ['id_transaccion'], unique=False,
+        postgresql_include=['archivo_id', 'fecha', 'monto', 'estado'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transacciones_id_transaccion', table_name='transacciones')
+    op.create_index('ix_transacciones_id_transaccion', 'transacciones', ['id_transaccion'], unique=False)
@@ -0,0 +1,36 @@
+"""cargas de archivos por bloques
+
+Revision ID: b5e8a3d7c412
+Revises: 6a3f0d8c1e27
+Create Date: 2026-10-19 17:52:06.381947
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e8a3d7c412'
+down_revision = '6a3f0d8c1e27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'cargas_archivo',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('nombre_archivo', sa.String(), nullable=False),
+        sa.Column('tamano', sa.BigInteger(), nullable=False),
+        sa.Column('recibidos', sa.BigInteger(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=True),
+        sa.Column('fecha_creacion', sa.DateTime(), nullable=True),
+        sa.Column('fecha_actualizacion', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_cargas_archivo_fecha_actualizacion'), 'cargas_archivo', ['fecha_actualizacion'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_cargas_archivo_fecha_actualizacion'), table_name='cargas_archivo')
+    op.drop_table('cargas_archivo')
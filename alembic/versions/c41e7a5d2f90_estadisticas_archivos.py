@@ -0,0 +1,67 @@
+"""estadisticas de archivos
+
+Revision ID: c41e7a5d2f90
+Revises: 8f3c2d1a9b47
+Create Date: 2026-10-19 11:02:47.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41e7a5d2f90'
+down_revision = '8f3c2d1a9b47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('archivos', sa.Column('total_transacciones', sa.Integer(), nullable=True))
+    op.add_column('archivos', sa.Column('ids_distintos', sa.Integer(), nullable=True))
+    op.add_column('archivos', sa.Column('monto_total', sa.Numeric(precision=18, scale=2), nullable=True))
+    op.add_column('archivos', sa.Column('fecha_min', sa.DateTime(), nullable=True))
+    op.add_column('archivos', sa.Column('fecha_max', sa.DateTime(), nullable=True))
+    op.add_column('archivos', sa.Column('transacciones_exitosas', sa.Integer(), nullable=True))
+    op.add_column('archivos', sa.Column('transacciones_fallidas', sa.Integer(), nullable=True))
+    op.add_column('archivos', sa.Column('cuentas_distintas', sa.Integer(), nullable=True))
+
+    # Completar las estadísticas de los archivos ya cargados
+    op.execute("""
+        UPDATE archivos a SET
+            total_transacciones = e.total,
+            ids_distintos = e.ids,
+            monto_total = e.monto,
+            fecha_min = e.fmin,
+            fecha_max = e.fmax,
+            transacciones_exitosas = e.exitosas,
+            transacciones_fallidas = e.fallidas,
+            cuentas_distintas = e.cuentas
+        FROM (
+            SELECT t.archivo_id,
+                   count(*) AS total,
+                   count(DISTINCT t.id_transaccion) AS ids,
+                   sum(t.monto) AS monto,
+                   min(t.fecha) AS fmin,
+                   max(t.fecha) AS fmax,
+                   count(*) FILTER (WHERE t.estado = 'Exitosa') AS exitosas,
+                   count(*) FILTER (WHERE t.estado = 'Fallida') AS fallidas,
+                   (SELECT count(DISTINCT c) FROM transacciones t2,
+                           LATERAL (VALUES (t2.cuenta_origen), (t2.cuenta_destino)) v(c)
+                     WHERE t2.archivo_id = t.archivo_id) AS cuentas
+            FROM transacciones t
+            GROUP BY t.archivo_id
+        ) e
+        WHERE a.id = e.archivo_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('archivos', 'cuentas_distintas')
+    op.drop_column('archivos', 'transacciones_fallidas')
+    op.drop_column('archivos', 'transacciones_exitosas')
+    op.drop_column('archivos', 'fecha_max')
+    op.drop_column('archivos', 'fecha_min')
+    op.drop_column('archivos', 'monto_total')
+    op.drop_column('archivos', 'ids_distintos')
+    op.drop_column('archivos', 'total_transacciones')
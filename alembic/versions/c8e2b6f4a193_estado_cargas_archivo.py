@@ -0,0 +1,27 @@
+"""estado y resultado de las cargas por bloques
+
+Revision ID: c8e2b6f4a193
+Revises: a7d3f1c9e852
+Create Date: 2026-10-19 20:11:43.518302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8e2b6f4a193'
+down_revision = 'a7d3f1c9e852'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('cargas_archivo', sa.Column('estado', sa.String(length=20), server_default='recibiendo', nullable=False))
+    op.add_column('cargas_archivo', sa.Column('resultado', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('cargas_archivo', 'resultado')
+    op.drop_column('cargas_archivo', 'estado')
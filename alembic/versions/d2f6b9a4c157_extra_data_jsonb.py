@@ -0,0 +1,52 @@
+"""extra_data jsonb sin campos mapeados
+
+Revision ID: d2f6b9a4c157
+Revises: a9c4e2f7b613
+Create Date: 2026-10-19 17:12:30.664810
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f6b9a4c157'
+down_revision = 'a9c4e2f7b613'
+branch_labels = None
+depends_on = None
+
+# Nombres de columna que la ingesta mapea a los campos de la transacción
+COLUMNAS_MAPEADAS = [
+    'id_transaccion', 'id', 'identificador', 'codigo',
+    'fecha', 'date', 'fecha_transaccion',
+    'cuenta_origen', 'origen', 'source', 'from',
+    'cuenta_destino', 'destino', 'destination', 'to',
+    'monto', 'amount', 'valor', 'value',
+    'estado', 'status', 'state',
+]
+
+
+def upgrade() -> None:
+    # Convierte a JSONB quitando las copias de los campos mapeados (la tabla se reescribe una vez)
+    claves = ", ".join(f"'{c}'" for c in COLUMNAS_MAPEADAS)
+    op.execute(f"""
+        ALTER TABLE transacciones ALTER COLUMN extra_data TYPE JSONB
+        USING NULLIF(extra_data::jsonb - ARRAY[{claves}]::text[], '{{}}'::jsonb)
+    """)
+
+
+def downgrade() -> None:
+    # Los índices GIN de claves de extra_data (app.jobs.indices_extra) solo existen sobre JSONB
+    op.execute("""
+        DO $$
+        DECLARE indice record;
+        BEGIN
+            FOR indice IN SELECT indexname FROM pg_indexes
+                          WHERE tablename = 'transacciones' AND indexname LIKE 'ix\\_transacciones\\_extra\\_%'
+            LOOP
+                EXECUTE format('DROP INDEX %I', indice.indexname);
+            END LOOP;
+        END $$
+    """)
+    # Las copias de los campos mapeados no se restauran: siguen en sus columnas
+    op.execute("ALTER TABLE transacciones ALTER COLUMN extra_data TYPE JSON USING extra_data::json")
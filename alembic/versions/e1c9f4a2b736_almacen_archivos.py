@@ -0,0 +1,31 @@
+"""original almacenado y opciones de ingesta de los archivos
+
+Revision ID: e1c9f4a2b736
+Revises: b5e8a3d7c412
+Create Date: 2026-10-19 18:14:52.630184
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1c9f4a2b736'
+down_revision = 'b5e8a3d7c412'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('archivos', sa.Column('fecha_ingesta', sa.DateTime(), nullable=True))
+    op.add_column('archivos', sa.Column('sha256', sa.String(length=64), nullable=True))
+    op.add_column('archivos', sa.Column('opciones_ingesta', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.create_index(op.f('ix_archivos_sha256'), 'archivos', ['sha256'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_archivos_sha256'), table_name='archivos')
+    op.drop_column('archivos', 'opciones_ingesta')
+    op.drop_column('archivos', 'sha256')
+    op.drop_column('archivos', 'fecha_ingesta')
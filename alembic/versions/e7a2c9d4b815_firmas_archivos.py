@@ -0,0 +1,25 @@
+"""firmas de ids de archivos
+
+Revision ID: e7a2c9d4b815
+Revises: 5b9d0e6c3a12
+Create Date: 2026-10-19 15:20:11.402519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a2c9d4b815'
+down_revision = '5b9d0e6c3a12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Las firmas de los archivos ya cargados se completan con `python -m app.jobs.firmas`
+    op.add_column('archivos', sa.Column('firma_ids', sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('archivos', 'firma_ids')
@@ -0,0 +1,39 @@
+"""perfiles de mapeo de columnas
+
+Revision ID: f3b8e1c6a294
+Revises: d2f6b9a4c157
+Create Date: 2026-10-19 18:42:37.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8e1c6a294'
+down_revision = 'd2f6b9a4c157'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'perfiles_mapeo',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('nombre', sa.String(), nullable=False),
+        sa.Column('procesador', sa.String(), nullable=True),
+        sa.Column('firma_cabecera', sa.String(length=64), nullable=False),
+        sa.Column('columnas', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('mapeo', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('fecha_creacion', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('nombre'),
+        sa.UniqueConstraint('firma_cabecera'),
+    )
+    op.create_index(op.f('ix_perfiles_mapeo_id'), 'perfiles_mapeo', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_perfiles_mapeo_id'), table_name='perfiles_mapeo')
+    op.drop_table('perfiles_mapeo')
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import archivos, transacciones
+from app.api.endpoints import archivos, perfiles, perfiles_mapeo, transacciones
 
 api_router = APIRouter()
 
@@ -10,4 +10,6 @@ async def root():
     return {"status": "ok"}
 
 api_router.include_router(archivos.router, prefix="/archivos", tags=["archivos"])
-api_router.include_router(transacciones.router, prefix="/transacciones", tags=["transacciones"]) 
\ No newline at end of file
+api_router.include_router(transacciones.router, prefix="/transacciones", tags=["transacciones"])
+api_router.include_router(perfiles.router, prefix="/perfiles", tags=["perfiles"])
+api_router.include_router(perfiles_mapeo.router, prefix="/perfiles-mapeo", tags=["perfiles-mapeo"]) 
\ No newline at end of file
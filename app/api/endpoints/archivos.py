@@ -1,39 +1,108 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
+import os
+import re
+from contextlib import suppress
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, UploadFile, File, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import JSONResponse
 
+from app.core.admision import (
+    admitir_ingesta, control_comparacion, control_ingesta, estimar_memoria_comparacion,
+)
+from app.core.cancelacion import Cancelacion, OperacionCancelada, ejecutar_cancelable
+from app.core.config import settings
+from app.core.perfilado import HEADER_PERFIL_ID, perfilar
 from app.db.session import get_db
+from app.services import almacen_archivos
 from app.services.archivo_service import ArchivoService
-from app.schemas.archivo import Archivo, ArchivoWithTransacciones
+from app.services.carga_service import INGERIDA, CargaService, ConflictoCarga
+from app.services.filtros import FiltroComparacion, filtro_comparacion
+from app.services.formatos_archivo import FORMATOS, formato_archivo
+from app.services.perfiles_comparacion import PerfilComparacion, perfil_comparacion
+from app.services.validacion_archivo import ArchivoInvalido
+from app.schemas.archivo import (
+    Archivo, ArchivoResumen, ArchivoWithTransacciones, SolapamientoCandidato, SolapamientoEstimado,
+    ValidacionArchivo,
+)
+from app.schemas.carga import CargaArchivo, CargaArchivoCreate
+from app.schemas.transaccion import ResumenComparacion
 
 router = APIRouter()
 
+MENSAJE_FORMATO = f"El archivo debe ser Excel, CSV, TSV o Parquet ({', '.join(FORMATOS)})"
+# Content-Range de un bloque de una carga: bytes inicio-fin/total
+RANGO_BLOQUE = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
 
-@router.post("/upload")
-async def upload_file(file: UploadFile = File(...), db: AsyncSession = Depends(get_db)):
+
+@router.post("/upload", dependencies=[Depends(admitir_ingesta)])
+async def upload_file(
+    request: Request,
+    response: Response,
+    file: UploadFile = File(...),
+    politica: Optional[Literal["rechazar", "omitir", "cuarentena"]] = None,
+    hojas: List[str] = Query([]),
+    archivo_por_hoja: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Carga un archivo Excel, CSV, TSV o Parquet. De un Excel se lee por defecto la primera
+    hoja; con `hojas` (repetido, o "*" para todas) se cargan varias hojas en un mismo
+    archivo, o un archivo por hoja con `archivo_por_hoja=true`. El original se guarda en
+    el almacén de archivos para poder reingerirlo.
+    """
+    # Validar el archivo
+    if formato_archivo(file.filename) is None:
+        return JSONResponse(
+            status_code=400,
+            content={"detail": MENSAJE_FORMATO}
+        )
+    
+    return await _procesar_upload(request, response, file, politica, hojas, archivo_por_hoja, db)
+
+
+async def _procesar_upload(request: Request, response: Response, file: UploadFile, politica: Optional[str],
+                           hojas: List[str], archivo_por_hoja: bool, db: AsyncSession):
+    """
+    Ingiere un archivo subido (de una vez o por bloques). Los errores del archivo y las
+    cancelaciones se devuelven como JSONResponse.
+    """
     try:
-        # Validar el archivo
-        if not file.filename.endswith(('.xlsx', '.xls')):
-            return JSONResponse(
-                status_code=400,
-                content={"detail": "El archivo debe ser un Excel (.xlsx o .xls)"}
-            )
-        
-        # Guardar el archivo temporalmente para debugging
-        temp_file_path = f"/tmp/{file.filename}"
-        with open(temp_file_path, "wb") as buffer:
-            buffer.write(await file.read())
-        
-        # Reposicionar el puntero del archivo
-        await file.seek(0)
-        
         # Intentar procesar el archivo con más logging
         print(f"Procesando archivo: {file.filename}")
         archivo_service = ArchivoService(db)
-        result = await archivo_service.procesar_archivo(file)
-        print(f"Archivo procesado exitosamente, ID: {result}")
-        return {"archivo_id": result}
+        cancelacion = Cancelacion("ingesta", request, settings.INGESTA_PLAZO)
+        async with perfilar(request, "upload_file") as perfil_id:
+            if archivo_por_hoja:
+                archivos = await ejecutar_cancelable(
+                    archivo_service.procesar_hojas(file, cancelacion, politica, hojas), cancelacion
+                )
+            else:
+                archivo = await ejecutar_cancelable(
+                    archivo_service.procesar_archivo(file, cancelacion, politica, hojas), cancelacion
+                )
+        if perfil_id:
+            response.headers[HEADER_PERFIL_ID] = perfil_id
+        if archivo_por_hoja:
+            print(f"Hojas procesadas exitosamente, IDs: {[archivo.id for archivo in archivos]}")
+            return {"archivos": [
+                {"archivo_id": archivo.id, "nombre_archivo": archivo.nombre_archivo,
+                 "filas_invalidas": archivo.filas_invalidas}
+                for archivo in archivos
+            ]}
+        print(f"Archivo procesado exitosamente, ID: {archivo.id}")
+        return {"archivo_id": archivo.id, "filas_invalidas": archivo.filas_invalidas}
+    except OperacionCancelada as e:
+        print(f"Procesamiento de {file.filename} cancelado: {e.motivo}")
+        return JSONResponse(
+            status_code=e.status_code,
+            content={"detail": f"Procesamiento del archivo cancelado: {e}"}
+        )
+    except ArchivoInvalido as e:
+        print(f"Archivo {file.filename} rechazado: {e}")
+        return JSONResponse(
+            status_code=400,
+            content={"detail": f"Archivo inválido: {e}", "errores": e.errores}
+        )
     except Exception as e:
         # Loguear el error con detalles
         import traceback
@@ -47,31 +116,359 @@ async def upload_file(file: UploadFile = File(...), db: AsyncSession = Depends(g
         )
 
 
+@router.post("/validar", response_model=ValidacionArchivo)
+async def validar_file(
+    file: UploadFile = File(...),
+    politica: Optional[Literal["rechazar", "omitir", "cuarentena"]] = None,
+    hojas: List[str] = Query([]),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Valida la cabecera y una muestra de filas de un archivo sin cargarlo: resuelve
+    el mapeo de columnas y verifica los formatos de fecha, monto y estado. Con una
+    política que omite o pone en cuarentena las filas inválidas, el archivo es válido
+    aunque la muestra tenga errores, que igual se informan.
+    """
+    formato = formato_archivo(file.filename)
+    if formato is None:
+        return ValidacionArchivo(valido=False, errores=[MENSAJE_FORMATO])
+    
+    archivo_service = ArchivoService(db)
+    try:
+        fuente = await archivo_service.leer_fuente(file, formato)
+        mapeos, filas, errores = await archivo_service.validar_archivo(fuente, politica, hojas, formato)
+    except ArchivoInvalido as e:
+        return ValidacionArchivo(valido=False, errores=e.errores)
+    return ValidacionArchivo(
+        valido=True,
+        mapeo=next(iter(mapeos.values())),
+        mapeos_hojas={hoja: mapeo for hoja, mapeo in mapeos.items() if hojas},
+        filas_revisadas=filas,
+        errores=errores,
+    )
+
+
+@router.post("/cargas", response_model=CargaArchivo, status_code=status.HTTP_201_CREATED)
+async def crear_carga(
+    datos: CargaArchivoCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Inicia una carga por bloques de un archivo grande. Los bloques se envían con
+    PUT /cargas/{carga_id} y la carga se ingiere con POST /cargas/{carga_id}/finalizar.
+    """
+    try:
+        return await CargaService(db).crear_carga(datos)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("/cargas/{carga_id}", response_model=CargaArchivo)
+async def get_carga(
+    carga_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Obtiene el estado de una carga; `recibidos` es el byte desde el que se reanuda.
+    """
+    carga = await CargaService(db).get_carga(carga_id)
+    if not carga:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Carga con ID {carga_id} no encontrada"
+        )
+    return carga
+
+
+@router.put("/cargas/{carga_id}", response_model=CargaArchivo)
+async def recibir_bloque(
+    request: Request,
+    carga_id: str,
+    content_range: str = Header(..., description="bytes inicio-fin/total"),
+    x_contenido_sha256: Optional[str] = Header(None, description="sha256 del bloque"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Recibe un bloque de la carga. Debe comenzar en el byte `recibidos`; si no, responde
+    409 con el byte desde el que reanudar.
+    """
+    rango = RANGO_BLOQUE.fullmatch(content_range.strip())
+    if not rango:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Content-Range debe tener la forma 'bytes inicio-fin/total'"
+        )
+    inicio, fin, total = (int(valor) for valor in rango.groups())
+    try:
+        carga = await CargaService(db).recibir_bloque(
+            carga_id, inicio, fin, total, request.stream(), x_contenido_sha256
+        )
+    except ConflictoCarga as e:
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={"detail": str(e), "recibidos": e.recibidos}
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    if not carga:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Carga con ID {carga_id} no encontrada"
+        )
+    return carga
+
+
+@router.post("/cargas/{carga_id}/finalizar")
+async def finalizar_carga(
+    request: Request,
+    response: Response,
+    carga_id: str,
+    politica: Optional[Literal["rechazar", "omitir", "cuarentena"]] = None,
+    hojas: List[str] = Query([]),
+    archivo_por_hoja: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Verifica que la carga esté completa (y su sha256, si se declaró) e ingiere el archivo
+    con las mismas opciones que /upload. Si el archivo se rechaza, la carga se conserva
+    para reintentar con otras opciones. Una carga se ingiere una sola vez: si ya se
+    ingirió, se devuelve el mismo resultado sin volver a ingerirla.
+    """
+    carga_service = CargaService(db)
+    try:
+        carga = await carga_service.iniciar_ingesta(carga_id)
+    except ConflictoCarga as e:
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={"detail": str(e), "recibidos": e.recibidos}
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    if not carga:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Carga con ID {carga_id} no encontrada"
+        )
+    
+    if carga.estado == INGERIDA:
+        return carga.resultado
+    
+    resultado = None
+    try:
+        async with control_ingesta.admitir(int(carga.tamano * settings.ADMISION_FACTOR_MEMORIA)):
+            with carga_service.abrir(carga) as file:
+                resultado = await _procesar_upload(request, response, file, politica, hojas, archivo_por_hoja, db)
+    finally:
+        # Los errores se devuelven como JSONResponse: la carga vuelve a admitir otro intento
+        with suppress(Exception):
+            await carga_service.terminar_ingesta(
+                carga_id, None if resultado is None or isinstance(resultado, JSONResponse) else resultado
+            )
+    return resultado
+
+
+@router.delete("/cargas/{carga_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_carga(
+    carga_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Cancela una carga y elimina los bloques recibidos.
+    """
+    if not await CargaService(db).eliminar_carga(carga_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Carga con ID {carga_id} no encontrada"
+        )
+
+
 @router.get("/comparar-excel/")
 async def comparar_excel(
+    request: Request,
     archivo_id_1: int,
     archivo_id_2: int,
+    filtro: FiltroComparacion = Depends(filtro_comparacion),
+    perfil: PerfilComparacion = Depends(perfil_comparacion),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Compara transacciones entre dos archivos y genera un Excel con los resultados.
+    Opcionalmente se limita a una ventana de fechas y/o a una cuenta, y se usa otro
+    perfil de comparación (campos clave, campos comparados y tolerancias).
     """
     archivo_service = ArchivoService(db)
+    memoria = estimar_memoria_comparacion(await archivo_service.contar_filas([archivo_id_1, archivo_id_2]))
     
-    try:
-        excel_bytes = await archivo_service.comparar_archivos_excel(archivo_id_1, archivo_id_2)
+    async with control_comparacion.admitir(memoria):
+        try:
+            cancelacion = Cancelacion("comparacion", request, settings.COMPARACION_PLAZO)
+            async with perfilar(request, "comparar_excel") as perfil_id:
+                excel_bytes = await ejecutar_cancelable(
+                    archivo_service.comparar_archivos_excel(archivo_id_1, archivo_id_2, cancelacion, filtro, perfil), cancelacion
+                )
+            if perfil_id:
+                excel_bytes.headers[HEADER_PERFIL_ID] = perfil_id
+        
+            return excel_bytes
+        except OperacionCancelada as e:
+            raise HTTPException(
+                status_code=e.status_code,
+                detail=f"Comparación cancelada: {e}"
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=str(e)
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error al comparar archivos: {str(e)}"
+            )
+
+
+@router.get("/comparar-lote/")
+async def comparar_lote(
+    request: Request,
+    archivo_id_referencia: int,
+    archivo_ids: List[int] = Query(...),
+    formato: Literal["json", "excel"] = "json",
+    filtro: FiltroComparacion = Depends(filtro_comparacion),
+    perfil: PerfilComparacion = Depends(perfil_comparacion),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Compara un archivo de referencia contra varios archivos. Devuelve un resumen por
+    comparación con sus totales, o un Excel combinado con `formato=excel`.
+    """
+    if len(archivo_ids) > settings.COMPARACION_LOTE_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Se pueden comparar como máximo {settings.COMPARACION_LOTE_MAX} archivos por lote"
+        )
+    archivo_service = ArchivoService(db)
+    # Las columnas de todos los archivos del lote y sus resultados están en memoria a la vez
+    memoria = estimar_memoria_comparacion(await archivo_service.contar_filas([archivo_id_referencia, *archivo_ids]))
+    
+    async with control_comparacion.admitir(memoria):
+        try:
+            cancelacion = Cancelacion("comparacion_lote", request, settings.COMPARACION_PLAZO)
+            async with perfilar(request, "comparar_lote") as perfil_id:
+                resultado = await ejecutar_cancelable(
+                    archivo_service.comparar_lote(
+                        archivo_id_referencia, archivo_ids, formato, cancelacion, filtro, perfil
+                    ), cancelacion
+                )
+            if formato == "json":
+                return resultado
+            if perfil_id:
+                resultado.headers[HEADER_PERFIL_ID] = perfil_id
         
-        return excel_bytes
+            return resultado
+        except OperacionCancelada as e:
+            raise HTTPException(
+                status_code=e.status_code,
+                detail=f"Comparación cancelada: {e}"
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=str(e)
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error al comparar archivos: {str(e)}"
+            )
+
+
+@router.get("/comparar-resumen/", response_model=ResumenComparacion)
+async def comparar_resumen(
+    archivo_id_1: int,
+    archivo_id_2: int,
+    filtro: FiltroComparacion = Depends(filtro_comparacion),
+    perfil: PerfilComparacion = Depends(perfil_comparacion),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Obtiene los totales de la comparación entre dos archivos sin generar el Excel.
+    """
+    archivo_service = ArchivoService(db)
+    try:
+        return await archivo_service.resumen_comparacion(archivo_id_1, archivo_id_2, filtro, perfil)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e)
         )
-    except Exception as e:
+
+
+@router.get("/estimar-solapamiento/", response_model=SolapamientoEstimado)
+async def estimar_solapamiento(
+    archivo_id_1: int,
+    archivo_id_2: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Estima las coincidencias esperadas entre dos archivos antes de compararlos.
+    """
+    archivo_service = ArchivoService(db)
+    try:
+        return await archivo_service.estimar_solapamiento(archivo_id_1, archivo_id_2)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+
+@router.get("/{archivo_id}/solapamientos", response_model=List[SolapamientoCandidato])
+async def buscar_solapamientos(
+    archivo_id: int,
+    limite: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Lista los archivos con más IDs en común con el archivo dado, ordenados por el índice
+    de Jaccard estimado a partir de sus firmas, para elegir con qué compararlo.
+    """
+    archivo_service = ArchivoService(db)
+    try:
+        return await archivo_service.buscar_solapamientos(archivo_id, limite)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+
+@router.get("/{archivo_id}/resumen", response_model=ArchivoResumen)
+async def get_resumen_archivo(
+    archivo_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Obtiene las estadísticas precalculadas de un archivo sin leer sus transacciones.
+    """
+    archivo_service = ArchivoService(db)
+    archivo = await archivo_service.get_resumen_archivo(archivo_id)
+    
+    if not archivo:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al comparar archivos: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Archivo con ID {archivo_id} no encontrado"
         )
+    
+    return archivo
 
 
 @router.get("/{archivo_id}", response_model=ArchivoWithTransacciones)
@@ -91,4 +488,83 @@ async def get_archivo(
             detail=f"Archivo con ID {archivo_id} no encontrado"
         )
     
-    return archivo 
\ No newline at end of file
+    return archivo 
+
+@router.post("/{archivo_id}/reingerir", response_model=ArchivoResumen)
+async def reingerir_archivo(
+    request: Request,
+    archivo_id: int,
+    politica: Optional[Literal["rechazar", "omitir", "cuarentena"]] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Vuelve a ingerir un archivo desde su original almacenado con las reglas vigentes de
+    mapeo, validación y normalización, conservando su ID. Si falla, el archivo queda como
+    estaba. Para reingerir muchos archivos use `python -m app.jobs.reingesta`.
+    """
+    archivo_service = ArchivoService(db)
+    archivo = await archivo_service.get_resumen_archivo(archivo_id)
+    if not archivo:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Archivo con ID {archivo_id} no encontrado"
+        )
+    
+    memoria = 0
+    if archivo.sha256 and almacen_archivos.existe(archivo.sha256):
+        memoria = int(os.path.getsize(almacen_archivos.ruta_blob(archivo.sha256)) * settings.ADMISION_FACTOR_MEMORIA)
+    async with control_ingesta.admitir(memoria):
+        cancelacion = Cancelacion("ingesta", request, settings.INGESTA_PLAZO)
+        try:
+            return await ejecutar_cancelable(
+                archivo_service.reingerir_archivo(archivo_id, cancelacion, politica), cancelacion
+            )
+        except OperacionCancelada as e:
+            return JSONResponse(
+                status_code=e.status_code,
+                content={"detail": f"Reingesta del archivo cancelada: {e}"}
+            )
+        except ArchivoInvalido as e:
+            return JSONResponse(
+                status_code=400,
+                content={"detail": f"Archivo inválido: {e}", "errores": e.errores}
+            )
+        except FileNotFoundError as e:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=str(e)
+            )
+
+
+@router.get("/{archivo_id}/errores")
+async def get_reporte_errores(
+    archivo_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Descarga un Excel con las filas del archivo que no pasaron la validación y sus motivos.
+    """
+    archivo_service = ArchivoService(db)
+    try:
+        return await archivo_service.generar_reporte_errores(archivo_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+
+@router.delete("/{archivo_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_archivo(
+    archivo_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Elimina un archivo y todas sus transacciones.
+    """
+    archivo_service = ArchivoService(db)
+    if not await archivo_service.eliminar_archivo(archivo_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Archivo con ID {archivo_id} no encontrado"
+        )
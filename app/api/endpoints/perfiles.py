@@ -0,0 +1,36 @@
+import json
+import os
+
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import FileResponse
+
+from app.core.perfilado import ruta_perfil
+
+router = APIRouter()
+
+
+def _ruta_existente(perfil_id: str, extension: str) -> str:
+    ruta = ruta_perfil(perfil_id, extension)
+    if not ruta or not os.path.exists(ruta):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Perfil con ID {perfil_id} no encontrado"
+        )
+    return ruta
+
+
+@router.get("/{perfil_id}")
+async def get_perfil(perfil_id: str):
+    """
+    Obtiene el reporte HTML (flame graph) de un perfil.
+    """
+    return FileResponse(_ruta_existente(perfil_id, "html"), media_type="text/html")
+
+
+@router.get("/{perfil_id}/asignaciones")
+async def get_asignaciones_perfil(perfil_id: str):
+    """
+    Obtiene los principales sitios de asignación de memoria de un perfil.
+    """
+    with open(_ruta_existente(perfil_id, "json")) as f:
+        return json.load(f)
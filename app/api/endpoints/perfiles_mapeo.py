@@ -0,0 +1,55 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_db
+from app.services.perfil_mapeo_service import PerfilMapeoService
+from app.schemas.perfil_mapeo import PerfilMapeo, PerfilMapeoCreate
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[PerfilMapeo])
+async def get_perfiles_mapeo(
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Obtiene los perfiles de mapeo de columnas registrados.
+    """
+    perfil_service = PerfilMapeoService(db)
+    return await perfil_service.get_perfiles()
+
+
+@router.post("/", response_model=PerfilMapeo, status_code=status.HTTP_201_CREATED)
+async def create_perfil_mapeo(
+    datos: PerfilMapeoCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Registra el mapeo de columnas de una cabecera. Los archivos que se carguen con esa
+    cabecera (sin importar el orden de las columnas) usan este mapeo.
+    """
+    perfil_service = PerfilMapeoService(db)
+    try:
+        return await perfil_service.crear_perfil(datos)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.delete("/{perfil_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_perfil_mapeo(
+    perfil_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Elimina un perfil de mapeo de columnas.
+    """
+    perfil_service = PerfilMapeoService(db)
+    if not await perfil_service.eliminar_perfil(perfil_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Perfil de mapeo con ID {perfil_id} no encontrado"
+        )
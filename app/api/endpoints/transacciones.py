@@ -2,9 +2,10 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.db.session import get_db
 from app.services.transaccion_service import TransaccionService
-from app.schemas.transaccion import Transaccion
+from app.schemas.transaccion import ConsultaHistorial, HistorialTransaccion, Transaccion, TransaccionDetalle
 
 router = APIRouter()
 
@@ -22,7 +23,37 @@ async def get_transacciones(
     return await transaccion_service.get_transacciones(skip=skip, limit=limit)
 
 
-@router.get("/{transaccion_id}", response_model=Transaccion)
+@router.get("/historial/{id_transaccion}", response_model=HistorialTransaccion)
+async def get_historial(
+    id_transaccion: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Obtiene en qué archivos apareció un ID de transacción y con qué monto y estado.
+    """
+    transaccion_service = TransaccionService(db)
+    historial = await transaccion_service.get_historial([id_transaccion])
+    return historial[0]
+
+
+@router.post("/historial", response_model=List[HistorialTransaccion])
+async def buscar_historial(
+    consulta: ConsultaHistorial,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Obtiene el historial de varios IDs de transacción en una sola consulta.
+    """
+    if len(consulta.ids) > settings.HISTORIAL_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Se pueden consultar como máximo {settings.HISTORIAL_MAX_IDS} IDs por solicitud"
+        )
+    transaccion_service = TransaccionService(db)
+    return await transaccion_service.get_historial(consulta.ids)
+
+
+@router.get("/{transaccion_id}", response_model=TransaccionDetalle)
 async def get_transaccion(
     transaccion_id: int,
     db: AsyncSession = Depends(get_db)
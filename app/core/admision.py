@@ -0,0 +1,137 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException, Request, status
+
+from app.core.config import settings
+from app.core.metricas import ADMISION_EN_ESPERA, ADMISION_RECHAZOS
+
+
+class PresupuestoMemoria:
+    """
+    Reserva memoria estimada entre todas las operaciones pesadas del proceso.
+    """
+
+    def __init__(self, maximo_bytes: int):
+        self.maximo_bytes = maximo_bytes
+        self.reservado = 0
+        self._condicion = asyncio.Condition()
+
+    def disponible(self, cantidad: int) -> bool:
+        return self.reservado + cantidad <= self.maximo_bytes
+
+    async def reservar(self, cantidad: int):
+        async with self._condicion:
+            await self._condicion.wait_for(lambda: self.disponible(cantidad))
+            self.reservado += cantidad
+
+    async def liberar(self, cantidad: int):
+        async with self._condicion:
+            self.reservado -= cantidad
+            self._condicion.notify_all()
+
+
+class ControlAdmision:
+    """
+    Limita la concurrencia de un endpoint costoso con una cola de espera acotada.
+    """
+
+    def __init__(self, nombre: str, max_concurrencia: int, max_cola: int, presupuesto: PresupuestoMemoria):
+        self.nombre = nombre
+        self.max_cola = max_cola
+        self.en_espera = 0
+        self.presupuesto = presupuesto
+        self._semaforo = asyncio.Semaphore(max_concurrencia)
+
+    def _rechazar(self, status_code: int, motivo: str, detalle: str):
+        ADMISION_RECHAZOS.labels(self.nombre, motivo).inc()
+        raise HTTPException(
+            status_code=status_code,
+            detail=detalle,
+            headers={"Retry-After": str(settings.ADMISION_RETRY_AFTER)},
+        )
+
+    async def _adquirir(self, memoria_estimada: int):
+        # Primero la memoria: una solicitud grande que espera memoria no ocupa un lugar
+        # que podría usar otra más chica que sí entra
+        await self.presupuesto.reservar(memoria_estimada)
+        try:
+            await self._semaforo.acquire()
+        except BaseException:
+            await self.presupuesto.liberar(memoria_estimada)
+            raise
+
+    @asynccontextmanager
+    async def admitir(self, memoria_estimada: int = 0):
+        """
+        Espera un lugar libre y memoria suficiente, o rechaza la solicitud si la cola está llena.
+        """
+        if memoria_estimada > self.presupuesto.maximo_bytes:
+            self._rechazar(
+                status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, "memoria",
+                "El archivo supera la memoria disponible para procesarlo",
+            )
+        if not self._semaforo.locked() and self.presupuesto.disponible(memoria_estimada):
+            # Hay lugar y memoria: se admite sin pasar por la cola
+            await self._adquirir(memoria_estimada)
+        else:
+            if self.en_espera >= self.max_cola:
+                self._rechazar(
+                    status.HTTP_429_TOO_MANY_REQUESTS, "cola_llena",
+                    f"Demasiadas solicitudes de {self.nombre} en espera, intente más tarde",
+                )
+
+            self.en_espera += 1
+            ADMISION_EN_ESPERA.labels(self.nombre).inc()
+            try:
+                await asyncio.wait_for(self._adquirir(memoria_estimada), settings.ADMISION_TIMEOUT_COLA)
+            except asyncio.TimeoutError:
+                self._rechazar(
+                    status.HTTP_503_SERVICE_UNAVAILABLE, "timeout",
+                    f"El servicio de {self.nombre} está saturado, intente más tarde",
+                )
+            finally:
+                self.en_espera -= 1
+                ADMISION_EN_ESPERA.labels(self.nombre).dec()
+
+        try:
+            yield
+        finally:
+            self._semaforo.release()
+            await self.presupuesto.liberar(memoria_estimada)
+
+
+presupuesto_memoria = PresupuestoMemoria(settings.ADMISION_MEMORIA_MAX_MB * 1024 * 1024)
+control_ingesta = ControlAdmision(
+    "ingesta", settings.INGESTA_MAX_CONCURRENCIA, settings.INGESTA_MAX_COLA, presupuesto_memoria
+)
+control_comparacion = ControlAdmision(
+    "comparacion", settings.COMPARACION_MAX_CONCURRENCIA, settings.COMPARACION_MAX_COLA, presupuesto_memoria
+)
+
+
+def estimar_memoria_carga(request: Request) -> int:
+    """
+    Estima la memoria necesaria para procesar una carga a partir de su tamaño declarado.
+    """
+    try:
+        tamano = int(request.headers.get("content-length", 0))
+    except ValueError:
+        tamano = 0
+    return int(tamano * settings.ADMISION_FACTOR_MEMORIA)
+
+
+def estimar_memoria_comparacion(filas: int) -> int:
+    """
+    Estima la memoria necesaria para comparar archivos a partir de sus filas totales.
+    """
+    return int(filas * settings.ADMISION_BYTES_POR_FILA_COMPARACION)
+
+
+async def admitir_ingesta(request: Request):
+    """
+    Dependencia que aplica el control de admisión a la ingesta de archivos.
+    """
+    async with control_ingesta.admitir(estimar_memoria_carga(request)):
+        yield
+
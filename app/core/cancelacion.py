@@ -0,0 +1,88 @@
+import asyncio
+import time
+from contextlib import suppress
+from typing import Optional
+
+from fastapi import Request, status
+
+from app.core.config import settings
+from app.core.metricas import OPERACIONES_CANCELADAS
+
+
+# Código no estándar (nginx) para solicitudes abandonadas por el cliente
+HTTP_499_CLIENTE_DESCONECTADO = 499
+
+
+class OperacionCancelada(Exception):
+    """
+    Se lanza cuando una operación se aborta por desconexión del cliente o por plazo vencido.
+    """
+
+    def __init__(self, motivo: str):
+        self.motivo = motivo
+        super().__init__(f"Operación cancelada por {motivo}")
+
+    @property
+    def status_code(self) -> int:
+        if self.motivo == "plazo":
+            return status.HTTP_504_GATEWAY_TIMEOUT
+        return HTTP_499_CLIENTE_DESCONECTADO
+
+
+class Cancelacion:
+    """
+    Estado de cancelación de una operación larga.
+
+    La verificación es síncrona y barata para poder llamarla entre etapas y lotes;
+    la detección de desconexión del cliente la hace `ejecutar_cancelable`.
+    """
+
+    def __init__(self, pipeline: str = "", request: Optional[Request] = None, plazo: Optional[float] = None):
+        self.pipeline = pipeline
+        self.request = request
+        self.plazo = plazo
+        self.limite = time.monotonic() + plazo if plazo else None
+        self.motivo: Optional[str] = None
+
+    def cancelar(self, motivo: str):
+        if self.motivo is None:
+            self.motivo = motivo
+            OPERACIONES_CANCELADAS.labels(self.pipeline, motivo).inc()
+
+    def verificar(self):
+        """
+        Lanza OperacionCancelada si la operación fue cancelada o venció su plazo.
+        """
+        if self.motivo is None and self.limite is not None and time.monotonic() > self.limite:
+            self.cancelar("plazo")
+        if self.motivo is not None:
+            raise OperacionCancelada(self.motivo)
+
+    async def _vigilar(self):
+        while self.motivo is None:
+            if self.limite is not None and time.monotonic() > self.limite:
+                self.cancelar("plazo")
+            elif self.request is not None and await self.request.is_disconnected():
+                self.cancelar("desconexion")
+            else:
+                await asyncio.sleep(settings.CANCELACION_INTERVALO)
+
+
+async def ejecutar_cancelable(coro, cancelacion: Cancelacion):
+    """
+    Ejecuta la corrutina vigilando la cancelación. Al cancelar, interrumpe la tarea
+    para que asyncpg aborte la consulta en curso y la sesión haga rollback.
+    """
+    tarea = asyncio.ensure_future(coro)
+    vigilancia = asyncio.ensure_future(cancelacion._vigilar())
+    try:
+        await asyncio.wait({tarea, vigilancia}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        vigilancia.cancel()
+        if not tarea.done():
+            tarea.cancel()
+            with suppress(asyncio.CancelledError, OperacionCancelada):
+                await tarea
+    if cancelacion.motivo is not None and tarea.cancelled():
+        raise OperacionCancelada(cancelacion.motivo)
+    return tarea.result()
@@ -1,5 +1,5 @@
 import os
-from typing import List, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 from pydantic import PostgresDsn, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -27,6 +27,90 @@ class Settings(BaseSettings):
     PGADMIN_EMAIL: str = os.getenv("PGADMIN_EMAIL", "admin@example.com")
     PGADMIN_PASSWORD: str = os.getenv("PGADMIN_PASSWORD", "admin_password")
 
+    # Métricas
+    METRICAS_INTERVALO_LAG: float = 0.5
+
+    # Precalentamiento al iniciar (importaciones pesadas y conexiones del pool)
+    PRECALENTAR_AL_INICIAR: bool = False
+    PRECALENTAR_CONEXIONES: int = 5
+
+    # Control de admisión de endpoints costosos
+    INGESTA_MAX_CONCURRENCIA: int = 2
+    INGESTA_MAX_COLA: int = 8
+    COMPARACION_MAX_CONCURRENCIA: int = 2
+    COMPARACION_MAX_COLA: int = 8
+    ADMISION_TIMEOUT_COLA: float = 30.0
+    ADMISION_RETRY_AFTER: int = 10
+    ADMISION_MEMORIA_MAX_MB: int = 2048
+    # Memoria estimada por cada byte de archivo cargado (Excel comprimido -> DataFrame)
+    ADMISION_FACTOR_MEMORIA: float = 10.0
+    # Memoria estimada por fila al comparar (columnas en memoria y resultado)
+    ADMISION_BYTES_POR_FILA_COMPARACION: int = 512
+
+    # Cancelación de operaciones largas (plazos en segundos, None = sin plazo)
+    INGESTA_PLAZO: Optional[float] = None
+    COMPARACION_PLAZO: Optional[float] = None
+    CANCELACION_INTERVALO: float = 0.25
+    INGESTA_TAMANO_LOTE: int = 5000
+    # Procesos para parsear en paralelo las hojas de un libro (0 = uno por CPU, 1 = sin paralelismo)
+    INGESTA_PROCESOS_HOJAS: int = 0
+    # Filas por bloque al leer archivos CSV, TSV y Parquet
+    INGESTA_TAMANO_BLOQUE: int = 50000
+    # Filas que se validan antes de parsear el archivo completo
+    VALIDACION_FILAS_MUESTRA: int = 100
+    # Filas que no pasan la validación: rechazar el archivo, omitirlas o guardarlas en cuarentena
+    INGESTA_POLITICA_FILAS_INVALIDAS: Literal["rechazar", "omitir", "cuarentena"] = "rechazar"
+
+    # Cargas por bloques reanudables: directorio de los bloques recibidos, tamaño máximo
+    # de cada bloque y horas sin actividad tras las que se descarta una carga
+    CARGAS_DIRECTORIO: str = "/tmp/closeai_cargas"
+    CARGAS_BLOQUE_MAX_MB: int = 64
+    CARGAS_VENCIMIENTO_HORAS: int = 24
+    # Minutos tras los que una carga que quedó en ingesta (el proceso se detuvo a mitad de
+    # camino) admite otro intento; debe superar la ingesta más larga
+    CARGAS_INGESTA_PLAZO_MINUTOS: int = 60
+    # Almacén de los archivos originales por sha256 (debe ser persistente y compartido
+    # por todos los procesos de la API)
+    ALMACEN_DIRECTORIO: str = "/tmp/closeai_archivos"
+
+    # Perfilado bajo demanda (cabecera X-Perfilar: 1)
+    PERFILADO_HABILITADO: bool = False
+    PERFILADO_DIRECTORIO: str = "/tmp/closeai_perfiles"
+    PERFILADO_INTERVALO: float = 0.001
+    # tracemalloc es global al proceso: mientras se perfila, todas las solicitudes pagan su costo
+    PERFILADO_MEMORIA: bool = True
+    PERFILADO_PROFUNDIDAD_TRAZAS: int = 1
+    PERFILADO_MAX_ASIGNACIONES: int = 25
+
+    # Particiones de transacciones y retención de archivos (None = conservar siempre)
+    PARTICIONES_LOCK_TIMEOUT: str = "5s"
+    RETENCION_DIAS: Optional[int] = None
+    # Horas tras las que se elimina un archivo cuya ingesta no terminó
+    INGESTA_INCOMPLETOS_HORAS: int = 24
+
+    # Caché columnar de archivos para comparaciones repetidas (0 = deshabilitada)
+    CACHE_COLUMNAR_MAX_MB: int = 0
+
+    # Comparación en paralelo (0 fragmentos = uno por CPU; se usa desde el mínimo de filas)
+    COMPARACION_FRAGMENTOS: int = 0
+    COMPARACION_PARALELA_MIN_FILAS: int = 2_000_000
+    COMPARACION_LOTE_MAX: int = 50
+
+    # Hashes de la firma MinHash de los IDs de cada archivo (búsqueda de archivos solapados)
+    FIRMA_IDS_TAMANO: int = 256
+
+    # Claves de extra_data con índice GIN (se crean con `python -m app.jobs.indices_extra`)
+    EXTRA_DATA_INDICES: List[str] = []
+
+    # IDs por consulta en la búsqueda del historial de transacciones
+    HISTORIAL_MAX_IDS: int = 10_000
+
+    # Perfiles de comparación adicionales al estándar, por nombre (JSON con claves, campos y tolerancias)
+    PERFILES_COMPARACION: Dict[str, Dict[str, Any]] = {}
+
+    # Segundos que cada proceso recuerda el mapeo de columnas de una cabecera (0 = sin caché)
+    MAPEO_CACHE_TTL: float = 300.0
+
     @field_validator("DATABASE_URI", mode="before")
     def assemble_db_connection(cls, v: Optional[str], values) -> str:
         if isinstance(v, str):
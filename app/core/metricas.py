@@ -0,0 +1,118 @@
+import asyncio
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# Buckets pensados para etapas que van de milisegundos a varios minutos
+BUCKETS_ETAPAS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+DURACION_ETAPA = Histogram(
+    "closeai_etapa_duracion_segundos",
+    "Duración de cada etapa de los pipelines de ingesta y comparación",
+    ["pipeline", "etapa"],
+    buckets=BUCKETS_ETAPAS,
+)
+
+FILAS_PROCESADAS = Counter(
+    "closeai_filas_procesadas_total",
+    "Filas de transacciones procesadas por pipeline",
+    ["pipeline"],
+)
+
+BYTES_RECIBIDOS = Counter(
+    "closeai_bytes_recibidos_total",
+    "Bytes de archivos recibidos para ingesta",
+)
+
+BYTES_GENERADOS = Counter(
+    "closeai_bytes_generados_total",
+    "Bytes de archivos de resultados generados",
+)
+
+CONEXIONES_POOL = Gauge(
+    "closeai_db_pool_conexiones",
+    "Conexiones del pool de base de datos por estado",
+    ["estado"],
+)
+
+ADMISION_EN_ESPERA = Gauge(
+    "closeai_admision_en_espera",
+    "Solicitudes esperando lugar en los endpoints costosos",
+    ["control"],
+)
+
+ADMISION_RECHAZOS = Counter(
+    "closeai_admision_rechazos_total",
+    "Solicitudes rechazadas por el control de admisión",
+    ["control", "motivo"],
+)
+
+OPERACIONES_CANCELADAS = Counter(
+    "closeai_operaciones_canceladas_total",
+    "Operaciones abortadas por desconexión del cliente o plazo vencido",
+    ["pipeline", "motivo"],
+)
+
+CACHE_COLUMNAR_CONSULTAS = Counter(
+    "closeai_cache_columnar_consultas_total",
+    "Consultas a la caché columnar de archivos por resultado",
+    ["resultado"],
+)
+
+CACHE_COLUMNAR_DESALOJOS = Counter(
+    "closeai_cache_columnar_desalojos_total",
+    "Archivos desalojados de la caché columnar por falta de espacio",
+)
+
+CACHE_COLUMNAR_BYTES = Gauge(
+    "closeai_cache_columnar_bytes",
+    "Bytes ocupados por la caché columnar de archivos",
+)
+
+LAG_EVENT_LOOP = Histogram(
+    "closeai_event_loop_lag_segundos",
+    "Retraso observado del event loop respecto al intervalo esperado",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+
+@contextmanager
+def medir_etapa(pipeline: str, etapa: str):
+    """
+    Mide la duración de una etapa y la registra en el histograma correspondiente.
+    """
+    histograma = DURACION_ETAPA.labels(pipeline, etapa)
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        histograma.observe(time.perf_counter() - inicio)
+
+
+def actualizar_metricas_pool(pool) -> None:
+    """
+    Actualiza los indicadores de utilización del pool de conexiones.
+    """
+    CONEXIONES_POOL.labels("en_uso").set(pool.checkedout())
+    CONEXIONES_POOL.labels("disponibles").set(pool.checkedin())
+    CONEXIONES_POOL.labels("desbordamiento").set(max(pool.overflow(), 0))
+    CONEXIONES_POOL.labels("tamano").set(pool.size())
+
+
+async def monitorear_event_loop(intervalo: float):
+    """
+    Mide periódicamente cuánto tarda el event loop en despertar respecto a lo esperado.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        inicio = loop.time()
+        await asyncio.sleep(intervalo)
+        LAG_EVENT_LOOP.observe(max(loop.time() - inicio - intervalo, 0.0))
+
+
+def exportar_metricas():
+    """
+    Devuelve las métricas en formato de exposición de Prometheus y su content type.
+    """
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import os
+import re
+import time
+import tracemalloc
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Optional
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+# Cabecera que activa el perfilado de una solicitud
+HEADER_PERFILADO = "X-Perfilar"
+# Cabecera de respuesta con el ID del perfil generado
+HEADER_PERFIL_ID = "X-Perfil-Id"
+
+PATRON_PERFIL_ID = re.compile(r"^[0-9a-f]{32}$")
+
+# tracemalloc es global al proceso, por lo que solo se perfila una solicitud a la vez
+_perfilado_en_curso = asyncio.Lock()
+
+
+def _solicita_perfilado(request: Request) -> bool:
+    return settings.PERFILADO_HABILITADO and request.headers.get(HEADER_PERFILADO) == "1"
+
+
+def ruta_perfil(perfil_id: str, extension: str) -> Optional[str]:
+    """
+    Devuelve la ruta de un reporte de perfilado, o None si el ID no es válido.
+    """
+    if not PATRON_PERFIL_ID.match(perfil_id):
+        return None
+    return os.path.join(settings.PERFILADO_DIRECTORIO, f"{perfil_id}.{extension}")
+
+
+def _top_asignaciones(snapshot):
+    estadisticas = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    )).statistics("lineno")
+
+    return [
+        {
+            "archivo": estadistica.traceback[0].filename,
+            "linea": estadistica.traceback[0].lineno,
+            "tamano_kb": round(estadistica.size / 1024, 1),
+            "cantidad": estadistica.count,
+        }
+        for estadistica in estadisticas[:settings.PERFILADO_MAX_ASIGNACIONES]
+    ]
+
+
+def _guardar_perfil(perfil_id, nombre, duracion, profiler, snapshot, memoria_pico):
+    os.makedirs(settings.PERFILADO_DIRECTORIO, exist_ok=True)
+
+    with open(ruta_perfil(perfil_id, "html"), "w") as f:
+        f.write(profiler.output_html())
+
+    with open(ruta_perfil(perfil_id, "json"), "w") as f:
+        json.dump({
+            "perfil_id": perfil_id,
+            "endpoint": nombre,
+            "fecha": datetime.utcnow().isoformat(),
+            "duracion_s": round(duracion, 4),
+            "memoria_pico_kb": round(memoria_pico / 1024, 1) if memoria_pico is not None else None,
+            "asignaciones": _top_asignaciones(snapshot) if snapshot is not None else [],
+        }, f, indent=2)
+
+
+def _finalizar_perfil(perfil_id, nombre, duracion, profiler):
+    """
+    Toma la instantánea de memoria, detiene tracemalloc y escribe los reportes. Se ejecuta
+    en el threadpool: recorrer las trazas y generar el HTML lleva tiempo.
+    """
+    snapshot = memoria_pico = None
+    if tracemalloc.is_tracing():
+        try:
+            snapshot = tracemalloc.take_snapshot()
+            _, memoria_pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    _guardar_perfil(perfil_id, nombre, duracion, profiler, snapshot, memoria_pico)
+
+
+@asynccontextmanager
+async def perfilar(request: Request, nombre: str):
+    """
+    Perfila el bloque con un profiler de muestreo y tracemalloc si la solicitud lo pide.
+    Produce el ID del perfil, o None si el perfilado no aplica.
+
+    El profiler solo muestrea el hilo del event loop: el trabajo que corre en el threadpool
+    o en los pools de procesos (parseo, comparación) aparece como el await que lo espera.
+    tracemalloc es global al proceso, así que mientras se perfila una solicitud todas las
+    concurrentes pagan su costo; con PERFILADO_MEMORIA=false se omite. Un error al generar
+    los reportes se informa y no reemplaza el resultado de la solicitud.
+    """
+    if not _solicita_perfilado(request) or _perfilado_en_curso.locked():
+        yield None
+        return
+
+    async with _perfilado_en_curso:
+        from pyinstrument import Profiler
+
+        perfil_id = uuid.uuid4().hex
+        profiler = Profiler(interval=settings.PERFILADO_INTERVALO, async_mode="enabled")
+        if settings.PERFILADO_MEMORIA:
+            tracemalloc.start(settings.PERFILADO_PROFUNDIDAD_TRAZAS)
+        inicio = time.perf_counter()
+        profiler.start()
+        try:
+            yield perfil_id
+        finally:
+            try:
+                profiler.stop()
+                duracion = time.perf_counter() - inicio
+                await run_in_threadpool(_finalizar_perfil, perfil_id, nombre, duracion, profiler)
+            except Exception as e:
+                print(f"Error al guardar el perfil {perfil_id}: {e}")
+            finally:
+                if tracemalloc.is_tracing():
+                    tracemalloc.stop()
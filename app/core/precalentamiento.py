@@ -0,0 +1,42 @@
+import asyncio
+import importlib
+import logging
+import threading
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Librerías pesadas que se cargan de forma diferida en ingesta y exportación
+MODULOS_PESADOS = ("numpy", "pandas", "openpyxl")
+
+
+def _importar_modulos_pesados():
+    for modulo in MODULOS_PESADOS:
+        try:
+            importlib.import_module(modulo)
+        except ImportError:
+            logger.warning("No se pudo precargar el módulo %s", modulo)
+
+
+def precargar_modulos() -> threading.Thread:
+    """
+    Importa las librerías pesadas en un hilo en segundo plano.
+    """
+    hilo = threading.Thread(target=_importar_modulos_pesados, name="precarga-modulos", daemon=True)
+    hilo.start()
+    return hilo
+
+
+async def precalentar_pool(engine, conexiones: int):
+    """
+    Abre conexiones del pool en paralelo para que las primeras solicitudes no paguen el handshake.
+    """
+    async def abrir():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    resultados = await asyncio.gather(*(abrir() for _ in range(conexiones)), return_exceptions=True)
+    errores = [r for r in resultados if isinstance(r, Exception)]
+    if errores:
+        logger.warning("No se pudieron precalentar %d conexiones: %s", len(errores), errores[0])
@@ -1,3 +1,6 @@
 # Importar todos los modelos aquí para que Alembic los detecte
 from app.models.archivo import Archivo
+from app.models.carga import CargaArchivo
+from app.models.cuarentena import TransaccionCuarentena
+from app.models.perfil_mapeo import PerfilMapeo
 from app.models.transaccion import Transaccion 
\ No newline at end of file
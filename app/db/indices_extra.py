@@ -0,0 +1,35 @@
+import hashlib
+import re
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def nombre_indice_extra(clave: str) -> str:
+    """
+    Devuelve el nombre del índice GIN de una clave de extra_data. El sufijo distingue
+    claves que quedan iguales al normalizarlas.
+    """
+    base = re.sub(r"[^a-z0-9_]", "_", clave.lower())[:30]
+    sufijo = hashlib.md5(clave.encode()).hexdigest()[:8]
+    return f"ix_transacciones_extra_{base}_{sufijo}"
+
+
+async def crear_indices_extra(db: AsyncSession, claves: List[str]) -> List[str]:
+    """
+    Crea un índice GIN (jsonb_path_ops) por cada clave de extra_data, para consultas
+    de contención como `extra_data -> 'clave' @> '"valor"'`. Sobre la tabla particionada
+    el índice se crea en cada partición, incluidas las futuras.
+    """
+    creados = []
+    for clave in claves:
+        indice = nombre_indice_extra(clave)
+        literal = clave.replace("'", "''")
+        await db.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {indice} ON transacciones "
+            f"USING gin ((extra_data -> '{literal}') jsonb_path_ops)"
+        ))
+        creados.append(indice)
+    await db.commit()
+    return creados
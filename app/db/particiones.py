@@ -0,0 +1,81 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+
+def nombre_particion(archivo_id: int) -> str:
+    """
+    Devuelve el nombre de la partición de transacciones de un archivo.
+    """
+    return f"transacciones_p{int(archivo_id)}"
+
+
+async def crear_particion(db: AsyncSession, archivo_id: int):
+    """
+    Crea y adjunta la partición de transacciones de un archivo.
+
+    Se crea como tabla independiente y luego se adjunta: ATTACH PARTITION solo toma
+    un bloqueo SHARE UPDATE EXCLUSIVE sobre la tabla padre, por lo que no bloquea
+    lecturas ni escrituras de otros archivos (la tabla no tiene partición por defecto,
+    que ATTACH debería recorrer y bloquear).
+    """
+    archivo_id = int(archivo_id)
+    particion = nombre_particion(archivo_id)
+    await db.execute(text(f"SET LOCAL lock_timeout = '{settings.PARTICIONES_LOCK_TIMEOUT}'"))
+    await db.execute(text(
+        f"CREATE TABLE {particion} (LIKE transacciones INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    ))
+    # La restricción permite adjuntar la partición sin validar sus filas
+    await db.execute(text(
+        f"ALTER TABLE {particion} ADD CONSTRAINT {particion}_archivo CHECK (archivo_id = {archivo_id})"
+    ))
+    await db.execute(text(
+        f"ALTER TABLE transacciones ATTACH PARTITION {particion} FOR VALUES IN ({archivo_id})"
+    ))
+
+
+async def eliminar_particion(db: AsyncSession, archivo_id: int):
+    """
+    Separa y elimina la partición de un archivo. El costo depende solo del tamaño del archivo.
+
+    DETACH PARTITION ... CONCURRENTLY toma solo SHARE UPDATE EXCLUSIVE sobre la tabla padre,
+    así que las cargas y comparaciones de otros archivos continúan mientras tanto. Como no
+    puede ejecutarse dentro de una transacción, usa una conexión propia en autocommit: la
+    sesión no debe tener abierta una transacción que haya leído transacciones, porque la
+    separación espera a que terminen. Una separación interrumpida se finaliza al reintentar.
+    """
+    particion = nombre_particion(archivo_id)
+    async with db.bind.connect() as conexion:
+        conexion = await conexion.execution_options(isolation_level="AUTOCOMMIT")
+        existe = await conexion.execute(text("SELECT to_regclass(:particion)"), {"particion": particion})
+        if existe.scalar() is None:
+            return
+        pendiente = await conexion.execute(
+            text("SELECT inhdetachpending FROM pg_inherits WHERE inhrelid = to_regclass(:particion)"),
+            {"particion": particion},
+        )
+        pendiente = pendiente.scalar()
+        await conexion.execute(text(f"SET lock_timeout = '{settings.PARTICIONES_LOCK_TIMEOUT}'"))
+        try:
+            if pendiente is not None:
+                modo = "FINALIZE" if pendiente else "CONCURRENTLY"
+                await conexion.execute(text(f"ALTER TABLE transacciones DETACH PARTITION {particion} {modo}"))
+            await conexion.execute(text(f"DROP TABLE {particion}"))
+        finally:
+            # La conexión vuelve al pool: no debe conservar el lock_timeout
+            await conexion.execute(text("RESET lock_timeout"))
+
+
+async def vaciar_particion(db: AsyncSession, archivo_id: int):
+    """
+    Elimina las transacciones de un archivo dentro de la transacción en curso truncando su
+    partición, o la crea si el archivo no la tiene.
+    """
+    particion = nombre_particion(archivo_id)
+    existe = await db.execute(text("SELECT to_regclass(:particion)"), {"particion": particion})
+    if existe.scalar() is None:
+        await crear_particion(db, archivo_id)
+        return
+    await db.execute(text(f"SET LOCAL lock_timeout = '{settings.PARTICIONES_LOCK_TIMEOUT}'"))
+    await db.execute(text(f"TRUNCATE {particion}"))
@@ -0,0 +1,39 @@
+"""
+Elimina las cargas por bloques sin actividad (y sus bloques recibidos) más antiguas que el vencimiento.
+
+Uso:
+    python -m app.jobs.cargas --horas 24
+"""
+import argparse
+import asyncio
+import sys
+
+from app.core.config import settings
+from app.db.session import async_session, engine
+from app.services.carga_service import CargaService
+
+
+async def eliminar_cargas_vencidas(horas: int):
+    async with async_session() as db:
+        return await CargaService(db).eliminar_cargas_vencidas(horas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Elimina las cargas por bloques abandonadas")
+    parser.add_argument("--horas", type=int, default=settings.CARGAS_VENCIMIENTO_HORAS,
+                        help="Horas sin actividad (por defecto CARGAS_VENCIMIENTO_HORAS)")
+    args = parser.parse_args(argv)
+
+    async def ejecutar():
+        try:
+            return await eliminar_cargas_vencidas(args.horas)
+        finally:
+            await engine.dispose()
+
+    eliminadas = asyncio.run(ejecutar())
+    print(f"Cargas eliminadas: {len(eliminadas)} {eliminadas}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+"""
+Calcula las firmas de IDs de los archivos cargados antes de que existieran las firmas.
+
+Uso:
+    python -m app.jobs.firmas
+"""
+import argparse
+import asyncio
+import sys
+
+from app.db.session import async_session, engine
+from app.services.archivo_service import ArchivoService
+
+
+async def calcular_firmas():
+    async with async_session() as db:
+        return await ArchivoService(db).calcular_firmas_faltantes()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calcula las firmas de IDs faltantes de los archivos")
+    parser.parse_args(argv)
+
+    async def ejecutar():
+        try:
+            return await calcular_firmas()
+        finally:
+            await engine.dispose()
+
+    calculados = asyncio.run(ejecutar())
+    print(f"Firmas calculadas: {len(calculados)} {calculados}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
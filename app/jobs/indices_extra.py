@@ -0,0 +1,41 @@
+"""
+Crea los índices GIN de las claves de extra_data configuradas en EXTRA_DATA_INDICES.
+
+Uso:
+    python -m app.jobs.indices_extra [--claves referencia sucursal]
+"""
+import argparse
+import asyncio
+import sys
+
+from app.core.config import settings
+from app.db.indices_extra import crear_indices_extra
+from app.db.session import async_session, engine
+
+
+async def crear_indices(claves):
+    async with async_session() as db:
+        return await crear_indices_extra(db, claves)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Crea los índices GIN de claves de extra_data")
+    parser.add_argument("--claves", nargs="+", default=settings.EXTRA_DATA_INDICES,
+                        help="Claves a indexar (por defecto EXTRA_DATA_INDICES)")
+    args = parser.parse_args(argv)
+    if not args.claves:
+        parser.error("Debe indicar --claves o configurar EXTRA_DATA_INDICES")
+
+    async def ejecutar():
+        try:
+            return await crear_indices(args.claves)
+        finally:
+            await engine.dispose()
+
+    creados = asyncio.run(ejecutar())
+    print(f"Índices creados: {len(creados)} {creados}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
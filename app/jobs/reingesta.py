@@ -0,0 +1,88 @@
+"""
+Reingiere archivos desde sus originales almacenados con las reglas vigentes de mapeo,
+validación y normalización. Los archivos se reparten entre procesos: cada uno parsea e
+inserta un archivo completo con su propia conexión a la base de datos.
+
+Uso:
+    python -m app.jobs.reingesta [--archivos 1 2 3] [--politica omitir] [--procesos 4]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from app.core.config import settings
+from app.db.session import async_session, engine
+from app.services.archivo_service import ArchivoService
+
+
+async def archivos_reingeribles(archivo_ids):
+    async with async_session() as db:
+        return await ArchivoService(db).archivos_reingeribles(archivo_ids)
+
+
+async def reingerir(archivo_id: int, politica):
+    async with async_session() as db:
+        return await ArchivoService(db).reingerir_archivo(archivo_id, politica=politica)
+
+
+def _reingerir_en_proceso(archivo_id: int, politica):
+    """
+    Reingiere un archivo en un proceso del pool. Devuelve (ID, error o None).
+    """
+    # Los archivos ya se reparten entre procesos: cada libro se lee en el proceso actual
+    settings.INGESTA_PROCESOS_HOJAS = 1
+
+    async def ejecutar():
+        try:
+            await reingerir(archivo_id, politica)
+        finally:
+            # Cada tarea usa su propio event loop; las conexiones no se reutilizan entre tareas
+            await engine.dispose()
+
+    try:
+        asyncio.run(ejecutar())
+        return archivo_id, None
+    except Exception as e:
+        return archivo_id, str(e)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reingiere archivos desde sus originales almacenados")
+    parser.add_argument("--archivos", type=int, nargs="+",
+                        help="IDs de los archivos (por defecto todos los que tienen su original almacenado)")
+    parser.add_argument("--politica", choices=["rechazar", "omitir", "cuarentena"],
+                        help="Política de filas inválidas (por defecto la de cada carga)")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count() or 1,
+                        help="Archivos que se reingieren a la vez (por defecto uno por CPU)")
+    args = parser.parse_args(argv)
+
+    async def listar():
+        try:
+            return await archivos_reingeribles(args.archivos)
+        finally:
+            await engine.dispose()
+
+    archivo_ids = asyncio.run(listar())
+    errores = {}
+    # spawn: los procesos no deben heredar el pool de conexiones del proceso principal
+    with ProcessPoolExecutor(max_workers=max(1, args.procesos),
+                             mp_context=multiprocessing.get_context("spawn")) as pool:
+        futuros = [pool.submit(_reingerir_en_proceso, archivo_id, args.politica) for archivo_id in archivo_ids]
+        for futuro in as_completed(futuros):
+            archivo_id, error = futuro.result()
+            if error:
+                errores[archivo_id] = error
+                print(f"Archivo {archivo_id}: {error}")
+
+    reingeridos = [archivo_id for archivo_id in archivo_ids if archivo_id not in errores]
+    print(f"Archivos reingeridos: {len(reingeridos)} {reingeridos}")
+    if errores:
+        print(f"Archivos con errores: {len(errores)} {sorted(errores)}")
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""
+Elimina los archivos (y sus particiones de transacciones) más antiguos que el período de
+retención, y los que quedaron con la ingesta a medias (un proceso detenido durante la carga).
+
+Uso:
+    python -m app.jobs.retencion --dias 90 [--horas-incompletos 24]
+"""
+import argparse
+import asyncio
+import sys
+
+from app.core.config import settings
+from app.db.session import async_session, engine
+from app.services.archivo_service import ArchivoService
+
+
+async def aplicar_retencion(dias: int):
+    async with async_session() as db:
+        return await ArchivoService(db).eliminar_archivos_vencidos(dias)
+
+
+async def eliminar_incompletos(horas: int):
+    async with async_session() as db:
+        return await ArchivoService(db).eliminar_archivos_incompletos(horas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aplica la política de retención de archivos")
+    parser.add_argument("--dias", type=int, default=settings.RETENCION_DIAS,
+                        help="Antigüedad máxima en días (por defecto RETENCION_DIAS; sin valor no se aplica)")
+    parser.add_argument("--horas-incompletos", type=int, default=settings.INGESTA_INCOMPLETOS_HORAS,
+                        help="Horas tras las que se elimina un archivo con la ingesta a medias "
+                             "(por defecto INGESTA_INCOMPLETOS_HORAS)")
+    args = parser.parse_args(argv)
+
+    async def ejecutar():
+        try:
+            incompletos = await eliminar_incompletos(args.horas_incompletos)
+            vencidos = await aplicar_retencion(args.dias) if args.dias is not None else []
+            return incompletos, vencidos
+        finally:
+            await engine.dispose()
+
+    incompletos, vencidos = asyncio.run(ejecutar())
+    print(f"Archivos incompletos eliminados: {len(incompletos)} {incompletos}")
+    if args.dias is None:
+        print("Sin período de retención (--dias o RETENCION_DIAS): se conservan los archivos completos")
+    else:
+        print(f"Archivos eliminados: {len(vencidos)} {vencidos}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
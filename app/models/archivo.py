@@ -1,6 +1,7 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, LargeBinary
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import deferred, relationship
 
 from app.models.base import Base
 
@@ -11,6 +12,30 @@ class Archivo(Base):
     id = Column(Integer, primary_key=True, index=True)
     nombre_archivo = Column(String, nullable=False)
     fecha_carga = Column(DateTime, default=datetime.utcnow)
+    # Última ingesta del contenido (cambia al reingerirlo); versiona la caché columnar
+    fecha_ingesta = Column(DateTime, nullable=True)
+
+    # Original en el almacén de archivos (por su sha256) y opciones con que se ingirió
+    # (formato, hojas y política), para reingerirlo con las reglas vigentes
+    sha256 = Column(String(64), nullable=True, index=True)
+    opciones_ingesta = Column(JSONB, nullable=True)
+
+    # Estadísticas calculadas durante la ingesta
+    total_transacciones = Column(Integer, nullable=True)
+    ids_distintos = Column(Integer, nullable=True)
+    monto_total = Column(Numeric(18, 2), nullable=True)
+    fecha_min = Column(DateTime, nullable=True)
+    fecha_max = Column(DateTime, nullable=True)
+    transacciones_exitosas = Column(Integer, nullable=True)
+    transacciones_fallidas = Column(Integer, nullable=True)
+    cuentas_distintas = Column(Integer, nullable=True)
+    # Filas omitidas o en cuarentena por no pasar la validación
+    filas_invalidas = Column(Integer, nullable=True)
+    # Firma MinHash de los IDs para buscar archivos solapados (se carga solo cuando se pide)
+    firma_ids = deferred(Column(LargeBinary, nullable=True))
 
     # Relación con transacciones
-    transacciones = relationship("Transaccion", back_populates="archivo", cascade="all, delete-orphan") 
\ No newline at end of file
+    transacciones = relationship(
+        "Transaccion", back_populates="archivo", cascade="all, delete-orphan",
+        primaryjoin="Archivo.id == foreign(Transaccion.archivo_id)",
+    ) 
\ No newline at end of file
@@ -0,0 +1,24 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, Column, DateTime, String
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.models.base import Base
+
+
+class CargaArchivo(Base):
+    __tablename__ = "cargas_archivo"
+
+    # Identificador aleatorio: quien lo conoce puede enviar bloques de la carga
+    id = Column(String(32), primary_key=True)
+    nombre_archivo = Column(String, nullable=False)
+    # Tamaño total declarado y bytes ya recibidos (contiguos desde el inicio)
+    tamano = Column(BigInteger, nullable=False)
+    recibidos = Column(BigInteger, nullable=False, default=0)
+    # sha256 del archivo completo, si el cliente lo declara; se verifica al finalizar
+    sha256 = Column(String(64), nullable=True)
+    # recibiendo, ingiriendo o ingerida; una carga ingerida conserva la respuesta de la
+    # ingesta (IDs de los archivos creados) hasta vencer, sin sus bloques
+    estado = Column(String(20), nullable=False, default="recibiendo", server_default="recibiendo")
+    resultado = Column(JSONB, nullable=True)
+    fecha_creacion = Column(DateTime, default=datetime.utcnow)
+    fecha_actualizacion = Column(DateTime, default=datetime.utcnow, index=True)
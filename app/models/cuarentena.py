@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, JSON, String, ForeignKey
+
+from app.models.base import Base
+
+
+class TransaccionCuarentena(Base):
+    __tablename__ = "transacciones_cuarentena"
+
+    id = Column(Integer, primary_key=True, index=True)
+    archivo_id = Column(Integer, ForeignKey("archivos.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Hoja del libro (vacía si se cargó solo la primera) y número de fila en la hoja
+    # (la cabecera es la fila 1)
+    hoja = Column(String, nullable=True)
+    fila = Column(Integer, nullable=False)
+    motivos = Column(String, nullable=False)
+    # Valores originales de la fila, en el orden de las columnas; solo con la política de cuarentena
+    datos = Column(JSON(none_as_null=True), nullable=True)
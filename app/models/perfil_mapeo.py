@@ -0,0 +1,20 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.models.base import Base
+
+
+class PerfilMapeo(Base):
+    __tablename__ = "perfiles_mapeo"
+
+    id = Column(Integer, primary_key=True, index=True)
+    nombre = Column(String, nullable=False, unique=True)
+    # Procesador o banco que genera archivos con esta cabecera (informativo)
+    procesador = Column(String, nullable=True)
+    # sha256 de la cabecera normalizada; con ella se elige el perfil al cargar un archivo
+    firma_cabecera = Column(String(64), nullable=False, unique=True)
+    columnas = Column(JSONB, nullable=False)
+    # Campo de la transacción -> columna normalizada del archivo
+    mapeo = Column(JSONB, nullable=False)
+    fecha_creacion = Column(DateTime, default=datetime.utcnow)
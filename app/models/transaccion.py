@@ -1,6 +1,7 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric, JSON, CheckConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, CheckConstraint, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import deferred, relationship
 
 from app.models.base import Base
 
@@ -8,20 +9,34 @@ from app.models.base import Base
 class Transaccion(Base):
     __tablename__ = "transacciones"
 
-    id = Column(Integer, primary_key=True, index=True)
-    archivo_id = Column(Integer, ForeignKey("archivos.id", ondelete="CASCADE"), nullable=False)
-    id_transaccion = Column(String, nullable=False, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    # La clave de partición debe formar parte de la clave primaria. No es una clave foránea
+    # en la base (bloquearía archivos al adjuntar o eliminar particiones): cada archivo
+    # registrado tiene su partición y no hay partición por defecto
+    archivo_id = Column(Integer, primary_key=True, nullable=False)
+    id_transaccion = Column(String, nullable=False)
     fecha = Column(DateTime, nullable=False)
     cuenta_origen = Column(String, nullable=False)
     cuenta_destino = Column(String, nullable=False)
     monto = Column(Numeric(12, 2), nullable=False)
     estado = Column(String, nullable=False)
-    extra_data = Column(JSON, nullable=True)
+    # Columnas del archivo que no se mapean a un campo; se carga solo cuando se pide
+    extra_data = deferred(Column(JSONB(none_as_null=True), nullable=True))
 
-    # Relación con archivo
-    archivo = relationship("Archivo", back_populates="transacciones")
+    # Relación con archivo, solo en el ORM
+    archivo = relationship(
+        "Archivo", back_populates="transacciones", primaryjoin="foreign(Transaccion.archivo_id) == Archivo.id"
+    )
 
-    # Restricción para el estado
+    # Restricción para el estado, índices y particionado por archivo (una partición por archivo)
     __table_args__ = (
         CheckConstraint("estado IN ('Exitosa', 'Fallida')", name="check_estado"),
-    ) 
\ No newline at end of file
+        # Cubre la búsqueda del historial de un ID sin leer las filas de la tabla
+        Index(
+            "ix_transacciones_id_transaccion", "id_transaccion",
+            postgresql_include=["archivo_id", "fecha", "monto", "estado"],
+        ),
+        # Para comparaciones acotadas a una ventana de fechas
+        Index("ix_transacciones_archivo_id_fecha", "archivo_id", "fecha"),
+        {"postgresql_partition_by": "LIST (archivo_id)"},
+    )
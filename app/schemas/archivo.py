@@ -1,5 +1,6 @@
 from datetime import datetime
-from typing import List, Optional
+from decimal import Decimal
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel
 
@@ -32,4 +33,51 @@ class Archivo(ArchivoBase):
 
 # Esquema para respuesta de Archivo con transacciones
 class ArchivoWithTransacciones(Archivo):
-    transacciones: List[Transaccion] = [] 
\ No newline at end of file
+    transacciones: List[Transaccion] = []
+
+
+# Esquema para el resumen precalculado de un Archivo
+class ArchivoResumen(Archivo):
+    total_transacciones: Optional[int] = None
+    ids_distintos: Optional[int] = None
+    monto_total: Optional[Decimal] = None
+    fecha_min: Optional[datetime] = None
+    fecha_max: Optional[datetime] = None
+    transacciones_exitosas: Optional[int] = None
+    transacciones_fallidas: Optional[int] = None
+    cuentas_distintas: Optional[int] = None
+    filas_invalidas: Optional[int] = None
+    # sha256 del original en el almacén y fecha de la última ingesta (cambia al reingerir)
+    sha256: Optional[str] = None
+    fecha_ingesta: Optional[datetime] = None
+
+
+# Esquema para el resultado de validar un archivo sin cargarlo
+class ValidacionArchivo(BaseModel):
+    valido: bool
+    mapeo: Optional[Dict[str, str]] = None
+    # Mapeo de cada hoja, cuando se validan hojas elegidas
+    mapeos_hojas: Dict[str, Dict[str, str]] = {}
+    filas_revisadas: int = 0
+    errores: List[str] = []
+
+
+# Esquema para la estimación de solapamiento entre dos archivos
+class SolapamientoEstimado(BaseModel):
+    archivo_id_1: int
+    archivo_id_2: int
+    fraccion_fechas_archivo_1: float
+    fraccion_fechas_archivo_2: float
+    coincidencias_estimadas: int
+    coincidencias_maximas: int
+    solo_archivo_1_estimadas: int
+    solo_archivo_2_estimadas: int
+
+
+# Esquema para un archivo candidato a comparar, según su firma de IDs
+class SolapamientoCandidato(BaseModel):
+    archivo_id: int
+    nombre_archivo: str
+    fecha_carga: datetime
+    jaccard_estimado: float
+    coincidencias_estimadas: int
@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, Field
+
+
+# Esquema base para CargaArchivo
+class CargaArchivoBase(BaseModel):
+    nombre_archivo: str
+    tamano: int = Field(..., gt=0, description="Tamaño total del archivo en bytes")
+    sha256: Optional[str] = Field(None, pattern="^[0-9a-fA-F]{64}$", description="sha256 del archivo completo")
+
+
+# Esquema para iniciar una CargaArchivo
+class CargaArchivoCreate(CargaArchivoBase):
+    pass
+
+
+# Esquema para respuesta de CargaArchivo: `recibidos` es el byte desde el que se reanuda
+class CargaArchivo(CargaArchivoBase):
+    id: str
+    recibidos: int
+    estado: str
+    resultado: Optional[Dict[str, Any]] = None
+    fecha_creacion: datetime
+    fecha_actualizacion: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+# Esquema base para PerfilMapeo: campo de la transacción -> columna del archivo
+class PerfilMapeoBase(BaseModel):
+    nombre: str
+    procesador: Optional[str] = None
+    mapeo: Dict[str, str]
+
+
+# Esquema para registrar un PerfilMapeo con la cabecera de un archivo de ejemplo
+class PerfilMapeoCreate(PerfilMapeoBase):
+    columnas: List[str]
+
+
+# Esquema para respuesta de PerfilMapeo
+class PerfilMapeo(PerfilMapeoBase):
+    id: int
+    firma_cabecera: str
+    columnas: List[str]
+    fecha_creacion: datetime
+
+    class Config:
+        from_attributes = True
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from decimal import Decimal
 
 from pydantic import BaseModel, Field
@@ -13,12 +13,12 @@ class TransaccionBase(BaseModel):
     cuenta_destino: str
     monto: Decimal
     estado: str
-    extra_data: Optional[Dict] = None
 
 
 # Esquema para crear una Transaccion
 class TransaccionCreate(TransaccionBase):
     archivo_id: int
+    extra_data: Optional[Dict] = None
 
 
 # Esquema para actualizar una Transaccion
@@ -35,6 +35,11 @@ class Transaccion(TransaccionBase):
         from_attributes = True
 
 
+# Esquema para respuesta de Transaccion con sus columnas adicionales
+class TransaccionDetalle(Transaccion):
+    extra_data: Optional[Dict] = None
+
+
 # Esquema para comparación de transacciones
 class TransaccionComparacion(BaseModel):
     id_transaccion: str
@@ -45,4 +50,54 @@ class TransaccionComparacion(BaseModel):
     monto_archivo_2: Optional[Decimal] = None
     estado_archivo_1: Optional[str] = None
     estado_archivo_2: Optional[str] = None
-    tipo_coincidencia: str = Field(..., description="Coincidencia exacta, Diferencia en monto, Diferencia en estado, Solo en Archivo 1, Solo en Archivo 2") 
\ No newline at end of file
+    tipo_coincidencia: str = Field(..., description="Coincidencia exacta, Diferencia en monto, Diferencia en estado, Solo en Archivo 1, Solo en Archivo 2")
+
+
+# Esquema para una aparición de un ID de transacción en un archivo
+class AparicionTransaccion(BaseModel):
+    archivo_id: int
+    nombre_archivo: str
+    fecha: datetime
+    monto: Decimal
+    estado: str
+
+
+# Esquema para el historial de un ID de transacción en todos los archivos
+class HistorialTransaccion(BaseModel):
+    id_transaccion: str
+    apariciones: List[AparicionTransaccion]
+
+
+# Esquema para consultar el historial de varios IDs de transacción
+class ConsultaHistorial(BaseModel):
+    ids: List[str] = Field(..., min_length=1)
+
+
+# Esquema para los totales de un tipo de coincidencia
+class ResumenTipoCoincidencia(BaseModel):
+    tipo_coincidencia: str
+    cantidad: int = 0
+    monto_archivo_1: Decimal = Decimal("0")
+    monto_archivo_2: Decimal = Decimal("0")
+    diferencia_monto: Decimal = Field(Decimal("0"), description="Suma de monto_archivo_2 - monto_archivo_1")
+
+
+# Esquema para el resumen de una comparación entre dos archivos
+class ResumenComparacion(BaseModel):
+    archivo_id_1: int
+    archivo_id_2: int
+    tipos: List[ResumenTipoCoincidencia]
+
+
+# Esquema para el resultado de una comparación dentro de un lote
+class ComparacionLoteItem(BaseModel):
+    archivo_id: int
+    conteos: Dict[str, int]
+    url_excel: str = Field(..., description="Exportación completa de esta comparación")
+
+
+# Esquema para la comparación de un archivo de referencia contra varios archivos
+class ComparacionLote(BaseModel):
+    archivo_id_referencia: int
+    comparaciones: List[ComparacionLoteItem]
+    totales: Dict[str, int]
@@ -0,0 +1,91 @@
+"""
+Almacén de los archivos originales, direccionado por contenido.
+
+Cada archivo cargado se guarda una sola vez bajo su sha256, en ALMACEN_DIRECTORIO/ab/cd/<sha256>,
+aunque se cargue varias veces o dos usuarios suban archivos distintos con el mismo nombre.
+Desde ahí se reingiere cuando cambian las reglas de normalización, sin pedir el archivo
+de nuevo. CSV, TSV y Parquet se leen del almacén con memoria mapeada: el sistema operativo
+carga las páginas a medida que el parser avanza, sin copiar el archivo completo.
+"""
+import hashlib
+import mmap
+import os
+import uuid
+from contextlib import contextmanager, suppress
+from typing import Union
+
+from app.core.config import settings
+
+# Bytes que se escriben por vez al guardar un archivo
+_TAMANO_COPIA = 1024 * 1024
+
+
+def ruta_blob(sha256: str) -> str:
+    """
+    Ruta del archivo con el sha256 dado; dos niveles de directorios reparten los archivos.
+    """
+    return os.path.join(settings.ALMACEN_DIRECTORIO, sha256[:2], sha256[2:4], sha256)
+
+
+def existe(sha256: str) -> bool:
+    return os.path.exists(ruta_blob(sha256))
+
+
+def guardar(fuente: Union[bytes, object]) -> str:
+    """
+    Guarda el contenido (bytes o un archivo abierto, que queda al principio) y devuelve su
+    sha256. Se escribe en un temporal que se renombra al final, así nunca queda un archivo
+    a medias con el nombre de un sha256; si el contenido ya estaba, no se duplica.
+    """
+    os.makedirs(settings.ALMACEN_DIRECTORIO, exist_ok=True)
+    temporal = os.path.join(settings.ALMACEN_DIRECTORIO, f".{uuid.uuid4().hex}.tmp")
+    digest = hashlib.sha256()
+    try:
+        with open(temporal, "wb") as destino:
+            if isinstance(fuente, (bytes, bytearray)):
+                digest.update(fuente)
+                destino.write(fuente)
+            else:
+                fuente.seek(0)
+                for parte in iter(lambda: fuente.read(_TAMANO_COPIA), b""):
+                    digest.update(parte)
+                    destino.write(parte)
+                fuente.seek(0)
+            destino.flush()
+            os.fsync(destino.fileno())
+
+        sha256 = digest.hexdigest()
+        ruta = ruta_blob(sha256)
+        if not os.path.exists(ruta):
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            os.replace(temporal, ruta)
+        return sha256
+    finally:
+        with suppress(FileNotFoundError):
+            os.remove(temporal)
+
+
+@contextmanager
+def abrir(sha256: str, formato: str):
+    """
+    Abre un archivo del almacén como lo espera el parser de su formato: el contenido de un
+    Excel (que se envía a los procesos de lectura de hojas) o el archivo mapeado en memoria.
+    """
+    ruta = ruta_blob(sha256)
+    if formato == "excel":
+        with open(ruta, "rb") as f:
+            yield f.read()
+    elif formato == "parquet":
+        import pyarrow as pa
+
+        # pyarrow lee las columnas directamente del mapa, sin copiarlas
+        with pa.memory_map(ruta) as f:
+            yield f
+    else:
+        with open(ruta, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            yield mapa
+
+
+def eliminar(sha256: str):
+    with suppress(FileNotFoundError):
+        os.remove(ruta_blob(sha256))
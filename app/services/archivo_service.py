@@ -1,16 +1,48 @@
+import asyncio
 import io
-import pandas as pd
+from contextlib import suppress
+from typing import List, Optional
 from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
-from sqlalchemy import select
+from sqlalchemy import and_, case, delete, func, insert, literal, select, union, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
-from datetime import datetime
+from datetime import datetime, timedelta
 from decimal import Decimal
 
+from app.core.cancelacion import Cancelacion
+from app.core.config import settings
+from app.core.metricas import BYTES_GENERADOS, BYTES_RECIBIDOS, FILAS_PROCESADAS, medir_etapa
+from app.db.particiones import crear_particion, eliminar_particion, vaciar_particion
 from app.models.archivo import Archivo
+from app.models.cuarentena import TransaccionCuarentena
+from app.services import almacen_archivos
+from app.services.cache_columnar import cache_columnar, construir_columnas
+from app.services.comparacion_motor import (
+    ETIQUETA_EXACTA, ETIQUETA_SOLO_ARCHIVO_1, ETIQUETA_SOLO_ARCHIVO_2, HOJAS, PREFIJO_DIFERENCIA,
+    comparar_columnas, construir_hojas, nombre_campo, tipos_coincidencia,
+)
+from app.services.filtros import FiltroComparacion
+from app.services.firmas import (
+    calcular_firma, combinar_firmas, coincidencias_estimadas, estimar_jaccard, tamano_comun,
+)
+from app.services.formatos_archivo import FORMATOS, formato_archivo, leer_muestras, leer_partes
+from app.services.lectura_hojas import leer_hojas
+from app.services.mapeo_columnas import CAMPOS_MAPEO, normalizar_cabecera
+from app.services.perfil_mapeo_service import PerfilMapeoService
+from app.services.validacion_archivo import (
+    HOJA_PREDETERMINADA, ArchivoInvalido, motivos_filas, resumir_errores, validar_filas, validar_muestra,
+)
+from app.services.perfiles_comparacion import PERFIL_ESTANDAR, PerfilComparacion
 from app.models.transaccion import Transaccion
-from app.schemas.transaccion import TransaccionComparacion
+from app.schemas.archivo import SolapamientoCandidato
+from app.schemas.transaccion import (
+    ComparacionLote, ComparacionLoteItem, ResumenComparacion, ResumenTipoCoincidencia,
+)
+
+# pandas (y openpyxl o pyarrow a través de él) se importa dentro de los métodos de
+# ingesta y exportación para no cargarlo al iniciar la aplicación.
 
 
 class ArchivoService:
@@ -61,98 +93,438 @@ class ArchivoService:
         except:
             raise ValueError(f"No se pudo convertir el monto: {monto_str}")
 
-    async def procesar_archivo(self, file: UploadFile):
+    async def procesar_archivo(self, file: UploadFile, cancelacion: Optional[Cancelacion] = None,
+                               politica: Optional[str] = None, hojas: Optional[List[str]] = None):
         """
-        Procesa un archivo Excel y almacena sus transacciones en la base de datos.
+        Procesa un archivo Excel, CSV, TSV o Parquet y almacena sus transacciones en la base
+        de datos. Antes de registrar el archivo se valida una muestra, para rechazar los
+        archivos mal formados sin parsearlos completos, y se guarda el original en el
+        almacén de archivos. Las filas inválidas se tratan según
+        `politica` (por defecto INGESTA_POLITICA_FILAS_INVALIDAS). Con `hojas` se cargan
+        varias hojas del libro (o todas con "*") en un mismo archivo. Si la operación falla
+        o se cancela después, se elimina el archivo junto con su partición (y el original,
+        si ningún otro archivo lo usa).
         """
-        # Crear registro de archivo
-        archivo = Archivo(nombre_archivo=file.filename)
-        self.db.add(archivo)
-        await self.db.flush()
+        cancelacion = cancelacion or Cancelacion()
+        politica = politica or settings.INGESTA_POLITICA_FILAS_INVALIDAS
+        formato = self._formato(file.filename)
+        with medir_etapa("ingesta", "recepcion"):
+            fuente = await self.leer_fuente(file, formato)
+        BYTES_RECIBIDOS.inc(len(fuente) if formato == "excel" else file.size or 0)
+        
+        with medir_etapa("ingesta", "validacion"):
+            mapeos, _, _ = await self.validar_archivo(fuente, politica, hojas, formato)
+        with medir_etapa("ingesta", "almacenamiento"):
+            sha256 = await run_in_threadpool(almacen_archivos.guardar, fuente)
         
-        # Leer archivo Excel
-        contents = await file.read()
-        df = pd.read_excel(io.BytesIO(contents))
+        try:
+            archivo = await self._registrar_archivo(
+                file.filename, sha256, {"formato": formato, "hojas": list(hojas or []), "politica": politica}, fuente
+            )
+        except BaseException:
+            with suppress(Exception):
+                await self._eliminar_original_sin_uso(sha256)
+            raise
+        try:
+            return await self._procesar_archivo(archivo, fuente, formato, mapeos, politica, cancelacion)
+        except BaseException:
+            with suppress(Exception):
+                await self.db.rollback()
+                await self.eliminar_archivo(archivo.id)
+            raise
+
+    async def procesar_hojas(self, file: UploadFile, cancelacion: Optional[Cancelacion] = None,
+                             politica: Optional[str] = None, hojas: Optional[List[str]] = None):
+        """
+        Procesa cada hoja seleccionada del libro como un archivo distinto. Las hojas se
+        parsean en paralelo y se cargan una tras otra; si una falla o se cancela la
+        operación, se eliminan todos los archivos creados y el original, si ningún otro
+        archivo lo usa.
+        """
+        cancelacion = cancelacion or Cancelacion()
+        politica = politica or settings.INGESTA_POLITICA_FILAS_INVALIDAS
+        if self._formato(file.filename) != "excel":
+            raise ArchivoInvalido(["Solo se puede cargar un archivo por hoja desde archivos Excel"])
+        with medir_etapa("ingesta", "recepcion"):
+            contents = await file.read()
+        BYTES_RECIBIDOS.inc(len(contents))
         
-        # Normalizar columnas y procesar dataframe
-        df = self._normalizar_columnas(df)
-        df = self._procesar_dataframe(df)
+        with medir_etapa("ingesta", "validacion"):
+            mapeos, _, _ = await self.validar_archivo(contents, politica, hojas)
+        with medir_etapa("ingesta", "almacenamiento"):
+            sha256 = await run_in_threadpool(almacen_archivos.guardar, contents)
         
-        # Mapear columnas a nombres estándar
-        column_mapping = {
-            'id_transaccion': ['id_transaccion', 'id', 'identificador', 'codigo'],
-            'fecha': ['fecha', 'date', 'fecha_transaccion'],
-            'cuenta_origen': ['cuenta_origen', 'origen', 'source', 'from'],
-            'cuenta_destino': ['cuenta_destino', 'destino', 'destination', 'to'],
-            'monto': ['monto', 'amount', 'valor', 'value'],
-            'estado': ['estado', 'status', 'state']
-        }
+        archivos = []
+        try:
+            with medir_etapa("ingesta", "parseo"):
+                dfs = await run_in_threadpool(leer_hojas, contents, list(mapeos))
+            cancelacion.verificar()
+            for (hoja, mapped_columns), df in zip(mapeos.items(), dfs):
+                nombre = file.filename if hoja == HOJA_PREDETERMINADA else f"{file.filename} [{hoja}]"
+                # Cada archivo apunta al mismo libro y se reingiere solo con su hoja
+                opciones = {
+                    "formato": "excel", "hojas": [] if hoja == HOJA_PREDETERMINADA else [hoja], "politica": politica,
+                }
+                archivos.append(await self._registrar_archivo(nombre, sha256, opciones, contents))
+                await self._ingerir(archivos[-1], iter([(hoja, df, mapped_columns)]), politica, cancelacion)
+        except BaseException:
+            with suppress(Exception):
+                await self.db.rollback()
+                for archivo in archivos:
+                    await self.eliminar_archivo(archivo.id)
+                await self._eliminar_original_sin_uso(sha256)
+            raise
+        return archivos
+
+    @staticmethod
+    def _formato(nombre_archivo: str) -> str:
+        formato = formato_archivo(nombre_archivo)
+        if formato is None:
+            raise ArchivoInvalido([f"Formato no admitido; se admiten {', '.join(FORMATOS)}"])
+        return formato
+
+    async def leer_fuente(self, file: UploadFile, formato: str):
+        """
+        Devuelve el contenido de un Excel, que se parsea desde memoria, o el archivo subido
+        (ya en disco o en memoria según su tamaño) para los formatos que se leen por bloques.
+        """
+        if formato == "excel":
+            return await file.read()
+        await file.seek(0)
+        return file.file
+
+    async def validar_archivo(self, fuente, politica: Optional[str] = None,
+                              hojas: Optional[List[str]] = None, formato: str = "excel"):
+        """
+        Valida la cabecera y una muestra de filas de cada hoja seleccionada sin escribir en
+        la base de datos. Devuelve el mapeo de columnas de cada hoja, las filas revisadas y
+        los errores de la muestra. Lanza ArchivoInvalido si no se puede mapear una cabecera
+        o si hay errores y la política es rechazar el archivo.
+        """
+        politica = politica or settings.INGESTA_POLITICA_FILAS_INVALIDAS
+        muestras = await run_in_threadpool(leer_muestras, fuente, formato, settings.VALIDACION_FILAS_MUESTRA, hojas)
+        # Con varias hojas cada error indica en cuál está
+        prefijo = (lambda hoja: f"Hoja '{hoja}': ") if len(muestras) > 1 else (lambda hoja: "")
+        
+        mapeos, filas, errores = {}, 0, []
+        for hoja, df in muestras.items():
+            df = self._normalizar_columnas(df)
+            try:
+                mapeos[hoja] = await PerfilMapeoService(self.db).resolver_mapeo(list(df.columns))
+            except ValueError as e:
+                raise ArchivoInvalido([f"{prefijo(hoja)}{e}"]) from e
+            filas += len(df)
+            errores += [f"{prefijo(hoja)}{error}" for error in validar_muestra(df, mapeos[hoja])]
+        
+        if errores and politica == "rechazar":
+            raise ArchivoInvalido(errores)
+        return mapeos, filas, errores
+
+    async def _registrar_archivo(self, nombre_archivo: str, sha256: Optional[str] = None,
+                                 opciones_ingesta: Optional[dict] = None, fuente=None):
+        """
+        Crea el registro del archivo y su partición de transacciones en una transacción corta,
+        para no retener el bloqueo sobre la tabla padre durante toda la ingesta. El registro
+        se hace con el bloqueo del original tomado: si entre guardarlo y registrar el archivo
+        se eliminó el último archivo que lo usaba, se vuelve a guardar desde `fuente`.
+        """
+        archivo = Archivo(nombre_archivo=nombre_archivo, sha256=sha256, opciones_ingesta=opciones_ingesta)
+        try:
+            if sha256:
+                await self._bloquear_original(sha256)
+                if not almacen_archivos.existe(sha256):
+                    await run_in_threadpool(almacen_archivos.guardar, fuente)
+            self.db.add(archivo)
+            await self.db.flush()
+            await crear_particion(self.db, archivo.id)
+            await self.db.commit()
+        except BaseException:
+            with suppress(Exception):
+                await self.db.rollback()
+            raise
+        return archivo
+
+    async def _procesar_archivo(self, archivo: Archivo, fuente, formato: str, mapeos, politica: str,
+                                cancelacion: Cancelacion):
+        # Las partes se leen a medida que se insertan: un Excel se parsea completo (en el
+        # pool de procesos, con varias hojas) y CSV, TSV y Parquet bloque a bloque
+        partes = leer_partes(fuente, formato, mapeos, settings.INGESTA_TAMANO_BLOQUE)
+        try:
+            return await self._ingerir(archivo, partes, politica, cancelacion)
+        finally:
+            partes.close()
+
+    async def _ingerir(self, archivo: Archivo, partes, politica: str, cancelacion: Cancelacion):
+        """
+        Valida, convierte e inserta en un archivo las filas de un iterador de partes
+        (hoja, DataFrame, mapeo de columnas): las hojas de un libro o los bloques de un CSV
+        o Parquet. Cada parte se inserta antes de leer la siguiente y de ella solo se
+        conservan sus estadísticas, que se acumulan; la memoria no crece con el archivo.
+        """
+        import pandas as pd
         
-        # Encontrar las columnas correspondientes
-        mapped_columns = {}
-        for target_col, possible_cols in column_mapping.items():
-            for col in possible_cols:
-                if col in df.columns:
-                    mapped_columns[target_col] = col
+        estadisticas, partes_leidas, cuarentena = None, 0, []
+        tamano_lote = settings.INGESTA_TAMANO_LOTE
+        # Tras la conversión las columnas mapeadas llevan el nombre de su campo
+        mapeo_estandar = {campo: campo for campo in CAMPOS_MAPEO}
+        lectura = None
+        try:
+            while True:
+                # Las etapas de CPU se ejecutan en el threadpool para no bloquear el event loop
+                with medir_etapa("ingesta", "parseo"):
+                    lectura = asyncio.ensure_future(run_in_threadpool(next, partes, None))
+                    parte = await asyncio.shield(lectura)
+                if parte is None:
                     break
+                hoja, df, mapped_columns = parte
+                cancelacion.verificar()
             
-            if target_col not in mapped_columns:
-                raise ValueError(f"No se encontró columna para {target_col}")
-        
-        # Crear transacciones
-        for _, row in df.iterrows():
-            # Convertir fecha si es necesario
-            fecha = row[mapped_columns['fecha']]
-            if not isinstance(fecha, datetime):
-                fecha = pd.to_datetime(fecha)
-            
-            # Convertir row a diccionario y asegurar que sea serializable a JSON
-            extra_data = {}
-            for col, val in row.items():
-                if isinstance(val, (pd.Timestamp, datetime)):
-                    extra_data[col] = val.isoformat()
-                elif isinstance(val, Decimal):
-                    extra_data[col] = float(val)
-                else:
-                    extra_data[col] = val
+                # Normalizar columnas y procesar dataframe con el mapeo resuelto en la validación
+                with medir_etapa("ingesta", "normalizacion"):
+                    df = self._normalizar_columnas(df)
+                # Validar todas las filas antes de convertir; las inválidas se separan según la política
+                with medir_etapa("ingesta", "validacion_filas"):
+                    df, invalidas = await run_in_threadpool(self._separar_filas_invalidas, df, mapped_columns, politica)
+                cuarentena += [dict(fila, hoja=None if hoja == HOJA_PREDETERMINADA else hoja) for fila in invalidas]
+                cancelacion.verificar()
+                if df.empty:
+                    continue
+                with medir_etapa("ingesta", "conversion"):
+                    df = await run_in_threadpool(self._procesar_dataframe, df, mapped_columns)
+                cancelacion.verificar()
+                df = self._columnas_estandar(df, mapped_columns)
+                with medir_etapa("ingesta", "estadisticas"):
+                    parciales = await run_in_threadpool(self._calcular_estadisticas, df, mapeo_estandar)
+                estadisticas = self._combinar_estadisticas(estadisticas, parciales)
+                partes_leidas += 1
             
-            # Crear transacción
-            transaccion = Transaccion(
-                archivo_id=archivo.id,
-                id_transaccion=str(row[mapped_columns['id_transaccion']]),
-                fecha=fecha,
-                cuenta_origen=str(row[mapped_columns['cuenta_origen']]),
-                cuenta_destino=str(row[mapped_columns['cuenta_destino']]),
-                monto=Decimal(str(row[mapped_columns['monto']])),
-                estado=str(row[mapped_columns['estado']]),
-                extra_data=extra_data
-            )
-            self.db.add(transaccion)
+                # Insertar por lotes con una sola sentencia por lote (executemany), armando los
+                # parámetros en el threadpool y verificando la cancelación entre lotes
+                with medir_etapa("ingesta", "insercion"):
+                    for inicio in range(0, len(df), tamano_lote):
+                        filas = await run_in_threadpool(
+                            self._filas_transacciones, archivo.id, df.iloc[inicio:inicio + tamano_lote], mapeo_estandar
+                        )
+                        await self.db.execute(insert(Transaccion), filas)
+                        cancelacion.verificar()
+                del df
+        finally:
+            # Una cancelación interrumpe la espera pero no el hilo que parsea la parte: hasta
+            # que termine, el generador sigue en ejecución y cerrarlo lanzaría "generator
+            # already executing" en lugar de la cancelación
+            if lectura is not None and not lectura.done():
+                await asyncio.wait({lectura})
+                if not lectura.cancelled():
+                    lectura.exception()
+        archivo.filas_invalidas = len(cuarentena)
         
-        await self.db.commit()
-        await self.db.refresh(archivo)
+        if estadisticas is None:
+            estadisticas = self._calcular_estadisticas(pd.DataFrame(columns=list(CAMPOS_MAPEO)), mapeo_estandar)
+        elif partes_leidas > 1:
+            # Los valores distintos de varias partes no se pueden sumar: se cuentan en la base
+            # sobre las filas ya insertadas
+            with medir_etapa("ingesta", "estadisticas"):
+                estadisticas['ids_distintos'], estadisticas['cuentas_distintas'] = await self._contar_distintos(archivo.id)
+        for campo, valor in estadisticas.items():
+            setattr(archivo, campo, valor)
+        archivo.fecha_ingesta = datetime.utcnow()
+        
+        with medir_etapa("ingesta", "insercion"):
+            for inicio in range(0, len(cuarentena), tamano_lote):
+                await self.db.execute(
+                    insert(TransaccionCuarentena),
+                    [dict(fila, archivo_id=archivo.id) for fila in cuarentena[inicio:inicio + tamano_lote]],
+                )
+        FILAS_PROCESADAS.labels("ingesta").inc(estadisticas['total_transacciones'])
+        
+        with medir_etapa("ingesta", "commit"):
+            await self.db.commit()
+            await self.db.refresh(archivo)
         
         return archivo
 
+    @staticmethod
+    def _columnas_estandar(df, mapped_columns):
+        """
+        Renombra las columnas mapeadas con el nombre de su campo, para poder unir hojas con
+        cabeceras distintas. Una columna no mapeada que se llame como un campo se renombra
+        con el sufijo "_original".
+        """
+        renombres = {col: campo for campo, col in mapped_columns.items()}
+        df.columns = [
+            renombres.get(col, f"{col}_original" if col in CAMPOS_MAPEO else col) for col in df.columns
+        ]
+        return df
+
+    @staticmethod
+    def _separar_filas_invalidas(df, mapped_columns, politica: str):
+        """
+        Valida todas las filas con máscaras vectorizadas. Con la política rechazar, cualquier
+        fila inválida rechaza el archivo; si no, se quitan del DataFrame y se devuelven como
+        registros de cuarentena (con sus valores originales solo con la política cuarentena).
+        """
+        invalidas = validar_filas(df, mapped_columns)
+        if not invalidas:
+            return df, []
+        if politica == "rechazar":
+            raise ArchivoInvalido(resumir_errores(df, invalidas, mapped_columns))
+        
+        mascara, motivos = motivos_filas(invalidas)
+        filas = df[mascara]
+        datos = (
+            [{col: ArchivoService._valor_json(val) for col, val in fila.items()} for _, fila in filas.iterrows()]
+            if politica == "cuarentena" else [None] * len(filas)
+        )
+        cuarentena = [
+            {'fila': int(indice) + 2, 'motivos': motivo, 'datos': valores}
+            for indice, motivo, valores in zip(filas.index, motivos, datos)
+        ]
+        return df[~mascara], cuarentena
+
+    @staticmethod
+    def _valor_json(val):
+        """
+        Convierte un valor del DataFrame a uno serializable a JSON (JSONB no admite NaN).
+        """
+        import pandas as pd
+        
+        # Primero los vacíos: NaT es un datetime y Decimal('NaN') un Decimal
+        if pd.api.types.is_scalar(val) and pd.isna(val):
+            return None
+        if isinstance(val, (pd.Timestamp, datetime)):
+            return val.isoformat()
+        if isinstance(val, Decimal):
+            return float(val)
+        if hasattr(val, 'item'):
+            # Escalares de numpy
+            return val.item()
+        return val
+
+    @classmethod
+    def _filas_transacciones(cls, archivo_id: int, df, mapped_columns):
+        """
+        Arma los parámetros para insertar las transacciones del DataFrame en una sola
+        sentencia. En extra_data solo se guardan las columnas que no se mapearon a un campo
+        de la transacción.
+        """
+        import pandas as pd
+        
+        columnas_mapeadas = set(mapped_columns.values())
+        columnas_extra = [col for col in df.columns if col not in columnas_mapeadas]
+        fechas = pd.to_datetime(df[mapped_columns['fecha']])
+        # Columnas adicionales, serializables a JSON
+        extras = (
+            [{col: cls._valor_json(val) for col, val in fila.items()} for fila in df[columnas_extra].to_dict('records')]
+            if columnas_extra else [None] * len(df)
+        )
+        
+        return [
+            {
+                'archivo_id': archivo_id,
+                'id_transaccion': str(id_transaccion),
+                'fecha': fecha.to_pydatetime(),
+                'cuenta_origen': str(cuenta_origen),
+                'cuenta_destino': str(cuenta_destino),
+                'monto': Decimal(str(monto)),
+                'estado': str(estado),
+                'extra_data': extra_data,
+            }
+            for id_transaccion, fecha, cuenta_origen, cuenta_destino, monto, estado, extra_data in zip(
+                df[mapped_columns['id_transaccion']], fechas, df[mapped_columns['cuenta_origen']],
+                df[mapped_columns['cuenta_destino']], df[mapped_columns['monto']], df[mapped_columns['estado']], extras,
+            )
+        ]
+
+    @staticmethod
+    def _calcular_estadisticas(df, mapped_columns):
+        """
+        Calcula de forma vectorizada las estadísticas resumen del archivo.
+        """
+        import pandas as pd
+        
+        fechas = pd.to_datetime(df[mapped_columns['fecha']], errors='coerce')
+        estados = df[mapped_columns['estado']].astype(str).value_counts()
+        cuentas = pd.concat([
+            df[mapped_columns['cuenta_origen']].astype(str),
+            df[mapped_columns['cuenta_destino']].astype(str),
+        ])
+        ids = df[mapped_columns['id_transaccion']].astype(str)
+        fecha_min, fecha_max = fechas.min(), fechas.max()
+        
+        return {
+            'total_transacciones': int(len(df)),
+            'ids_distintos': int(ids.nunique()),
+            'monto_total': Decimal(str(df[mapped_columns['monto']].dropna().sum())),
+            'fecha_min': None if pd.isna(fecha_min) else fecha_min.to_pydatetime(),
+            'fecha_max': None if pd.isna(fecha_max) else fecha_max.to_pydatetime(),
+            'transacciones_exitosas': int(estados.get('Exitosa', 0)),
+            'transacciones_fallidas': int(estados.get('Fallida', 0)),
+            'cuentas_distintas': int(cuentas.nunique()),
+            'firma_ids': calcular_firma(ids.to_numpy(dtype=object), settings.FIRMA_IDS_TAMANO),
+        }
+
+    @staticmethod
+    def _combinar_estadisticas(acumuladas, parciales):
+        """
+        Suma las estadísticas de una parte a las acumuladas. Los conteos de valores distintos
+        quedan como los de la primera parte; con varias partes se cuentan al final en la base.
+        """
+        if acumuladas is None:
+            return parciales
+        
+        fechas_min = [f for f in (acumuladas['fecha_min'], parciales['fecha_min']) if f is not None]
+        fechas_max = [f for f in (acumuladas['fecha_max'], parciales['fecha_max']) if f is not None]
+        return {
+            **acumuladas,
+            'total_transacciones': acumuladas['total_transacciones'] + parciales['total_transacciones'],
+            'monto_total': acumuladas['monto_total'] + parciales['monto_total'],
+            'fecha_min': min(fechas_min, default=None),
+            'fecha_max': max(fechas_max, default=None),
+            'transacciones_exitosas': acumuladas['transacciones_exitosas'] + parciales['transacciones_exitosas'],
+            'transacciones_fallidas': acumuladas['transacciones_fallidas'] + parciales['transacciones_fallidas'],
+            'firma_ids': combinar_firmas([acumuladas['firma_ids'], parciales['firma_ids']], settings.FIRMA_IDS_TAMANO),
+        }
+
+    async def _contar_distintos(self, archivo_id: int):
+        """
+        Cuenta los IDs de transacción y las cuentas distintas de un archivo en su partición.
+        """
+        del_archivo = Transaccion.archivo_id == archivo_id
+        cuentas = union(
+            select(Transaccion.cuenta_origen.label('cuenta')).where(del_archivo),
+            select(Transaccion.cuenta_destino.label('cuenta')).where(del_archivo),
+        ).subquery()
+        result = await self.db.execute(select(
+            select(func.count(func.distinct(Transaccion.id_transaccion))).where(del_archivo).scalar_subquery(),
+            select(func.count()).select_from(cuentas).scalar_subquery(),
+        ))
+        ids_distintos, cuentas_distintas = result.one()
+        return int(ids_distintos), int(cuentas_distintas)
+
     def _normalizar_columnas(self, df):
         """
         Normaliza los nombres de las columnas del DataFrame.
         """
         # Convertir a minúsculas y eliminar espacios
-        df.columns = [col.lower().strip() for col in df.columns]
+        df.columns = normalizar_cabecera(df.columns)
         return df
     
-    def _procesar_dataframe(self, df):
+    def _procesar_dataframe(self, df, mapped_columns=None):
         """
-        Procesa el DataFrame para normalizar formatos de fecha y monto.
+        Procesa el DataFrame para normalizar formatos de fecha y monto. Además de las
+        columnas reconocidas por nombre, convierte las mapeadas a fecha y monto.
         """
+        import pandas as pd
+        
+        mapped_columns = mapped_columns or {}
+        
         # Procesar columnas de fecha si existen
         for col in df.columns:
-            if 'fecha' in col.lower():
+            if 'fecha' in col.lower() or col == mapped_columns.get('fecha'):
                 df[col] = pd.to_datetime(df[col], errors='coerce')
             
             # Procesar columnas de monto si existen
-            if 'monto' in col.lower() or 'amount' in col.lower() or 'valor' in col.lower():
+            if 'monto' in col.lower() or 'amount' in col.lower() or 'valor' in col.lower() or col == mapped_columns.get('monto'):
                 # Convertir a string primero para manejar formatos con símbolos
                 df[col] = df[col].astype(str).str.replace('$', '', regex=False)
                 df[col] = df[col].str.replace(',', '', regex=False)
@@ -161,6 +533,281 @@ class ArchivoService:
         
         return df
 
+    async def eliminar_archivo(self, archivo_id: int) -> bool:
+        """
+        Elimina un archivo y sus transacciones descartando su partición completa. El
+        original se quita del almacén si ningún otro archivo lo usa.
+        """
+        await eliminar_particion(self.db, archivo_id)
+        result = await self.db.execute(delete(Archivo).where(Archivo.id == archivo_id).returning(Archivo.sha256))
+        eliminados = result.all()
+        await self.db.commit()
+        cache_columnar.invalidar(archivo_id)
+        for (sha256,) in eliminados:
+            if sha256:
+                await self._eliminar_original_sin_uso(sha256)
+        return len(eliminados) > 0
+
+    async def _bloquear_original(self, sha256: str):
+        """
+        Toma, hasta el fin de la transacción, el bloqueo del original con este sha256. Lo
+        toman la carga que registra un archivo con ese original y la eliminación que decide
+        si borrarlo, así ninguna de las dos ve el estado a medias de la otra.
+        """
+        await self.db.execute(select(func.pg_advisory_xact_lock(func.hashtext(sha256))))
+
+    async def _eliminar_original_sin_uso(self, sha256: str):
+        """
+        Quita el original del almacén si ningún archivo lo usa, en una transacción propia.
+        """
+        try:
+            await self._bloquear_original(sha256)
+            result = await self.db.execute(select(func.count()).select_from(Archivo).where(Archivo.sha256 == sha256))
+            if result.scalar() == 0:
+                await run_in_threadpool(almacen_archivos.eliminar, sha256)
+            await self.db.commit()
+        except BaseException:
+            with suppress(Exception):
+                await self.db.rollback()
+            raise
+
+    async def reingerir_archivo(self, archivo_id: int, cancelacion: Optional[Cancelacion] = None,
+                                politica: Optional[str] = None):
+        """
+        Vuelve a ingerir un archivo desde su original almacenado con el mapeo, la validación
+        y las conversiones vigentes, conservando su ID. Las transacciones anteriores se
+        reemplazan en la misma transacción de base de datos: si la ingesta falla, quedan
+        las que había. Sin `politica` se usa la de la carga original.
+        """
+        cancelacion = cancelacion or Cancelacion()
+        archivo = await self.get_resumen_archivo(archivo_id)
+        if not archivo:
+            raise ValueError(f"Archivo con ID {archivo_id} no encontrado")
+        if not archivo.sha256 or not almacen_archivos.existe(archivo.sha256):
+            raise FileNotFoundError(f"El archivo con ID {archivo_id} no tiene su original almacenado")
+        
+        opciones = archivo.opciones_ingesta or {}
+        formato = opciones.get("formato") or formato_archivo(archivo.nombre_archivo) or "excel"
+        politica = politica or opciones.get("politica") or settings.INGESTA_POLITICA_FILAS_INVALIDAS
+        with almacen_archivos.abrir(archivo.sha256, formato) as fuente:
+            with medir_etapa("ingesta", "validacion"):
+                mapeos, _, _ = await self.validar_archivo(fuente, politica, opciones.get("hojas"), formato)
+            
+            partes = leer_partes(fuente, formato, mapeos, settings.INGESTA_TAMANO_BLOQUE)
+            try:
+                await vaciar_particion(self.db, archivo.id)
+                await self.db.execute(delete(TransaccionCuarentena).where(TransaccionCuarentena.archivo_id == archivo.id))
+                archivo.opciones_ingesta = {**opciones, "formato": formato, "politica": politica}
+                archivo = await self._ingerir(archivo, partes, politica, cancelacion)
+            except BaseException:
+                with suppress(Exception):
+                    await self.db.rollback()
+                raise
+            finally:
+                partes.close()
+        cache_columnar.invalidar(archivo.id)
+        return archivo
+
+    async def archivos_reingeribles(self, archivo_ids: Optional[List[int]] = None):
+        """
+        IDs de los archivos a reingerir: los indicados o todos los que tienen su original
+        almacenado, salvo los que aún no terminaron su primera ingesta.
+        """
+        query = (
+            select(Archivo.id).where(Archivo.sha256.isnot(None), Archivo.fecha_ingesta.isnot(None))
+            .order_by(Archivo.id)
+        )
+        if archivo_ids:
+            query = query.where(Archivo.id.in_(archivo_ids))
+        result = await self.db.execute(query)
+        return list(result.scalars().all())
+
+    async def eliminar_archivos_vencidos(self, dias: int):
+        """
+        Elimina los archivos cargados hace más de `dias` días. Devuelve los IDs eliminados.
+        """
+        limite = datetime.utcnow() - timedelta(days=dias)
+        result = await self.db.execute(select(Archivo.id).where(Archivo.fecha_carga < limite))
+        archivo_ids = list(result.scalars().all())
+        for archivo_id in archivo_ids:
+            await self.eliminar_archivo(archivo_id)
+        return archivo_ids
+
+    async def eliminar_archivos_incompletos(self, horas: int):
+        """
+        Elimina los archivos cuya ingesta no terminó (el proceso se detuvo a mitad de camino)
+        registrados hace más de `horas` horas. Devuelve los IDs eliminados.
+        """
+        limite = datetime.utcnow() - timedelta(hours=horas)
+        result = await self.db.execute(
+            select(Archivo.id).where(Archivo.fecha_ingesta.is_(None), Archivo.fecha_carga < limite)
+        )
+        archivo_ids = list(result.scalars().all())
+        for archivo_id in archivo_ids:
+            await self.eliminar_archivo(archivo_id)
+        return archivo_ids
+
+    async def get_resumen_archivo(self, archivo_id: int):
+        """
+        Obtiene un archivo con sus estadísticas precalculadas, sin cargar sus transacciones.
+        """
+        result = await self.db.execute(select(Archivo).where(Archivo.id == archivo_id))
+        return result.scalars().first()
+
+    async def contar_filas(self, archivo_ids: List[int]) -> int:
+        """
+        Suma las filas de los archivos según sus estadísticas precalculadas.
+        """
+        result = await self.db.execute(
+            select(func.coalesce(func.sum(Archivo.total_transacciones), 0)).where(Archivo.id.in_(archivo_ids))
+        )
+        return int(result.scalar() or 0)
+
+    async def estimar_solapamiento(self, archivo_id_1: int, archivo_id_2: int):
+        """
+        Estima cuántas transacciones coincidirán entre dos archivos a partir de sus estadísticas.
+        """
+        archivo1 = await self.get_resumen_archivo(archivo_id_1)
+        archivo2 = await self.get_resumen_archivo(archivo_id_2)
+        for archivo_id, archivo in ((archivo_id_1, archivo1), (archivo_id_2, archivo2)):
+            if not archivo:
+                raise ValueError(f"Archivo con ID {archivo_id} no encontrado")
+        return self._estimar_solapamiento(archivo1, archivo2)
+
+    @staticmethod
+    def _estimar_solapamiento(archivo1, archivo2):
+        """
+        Supone IDs distribuidos uniformemente en el rango de fechas de cada archivo:
+        las coincidencias esperadas son las del archivo con menos IDs en el rango común.
+        """
+        ids1 = archivo1.ids_distintos or 0
+        ids2 = archivo2.ids_distintos or 0
+        fraccion1 = fraccion2 = 0.0
+        if ids1 and ids2 and None not in (archivo1.fecha_min, archivo1.fecha_max, archivo2.fecha_min, archivo2.fecha_max):
+            inicio = max(archivo1.fecha_min, archivo2.fecha_min)
+            fin = min(archivo1.fecha_max, archivo2.fecha_max)
+            if fin >= inicio:
+                comun = (fin - inicio).total_seconds()
+                rango1 = (archivo1.fecha_max - archivo1.fecha_min).total_seconds()
+                rango2 = (archivo2.fecha_max - archivo2.fecha_min).total_seconds()
+                # Un rango de un solo instante contenido en el rango común solapa por completo
+                fraccion1 = comun / rango1 if rango1 else 1.0
+                fraccion2 = comun / rango2 if rango2 else 1.0
+        
+        coincidencias = int(round(min(ids1 * fraccion1, ids2 * fraccion2)))
+        return {
+            'archivo_id_1': archivo1.id,
+            'archivo_id_2': archivo2.id,
+            'fraccion_fechas_archivo_1': fraccion1,
+            'fraccion_fechas_archivo_2': fraccion2,
+            'coincidencias_estimadas': coincidencias,
+            'coincidencias_maximas': min(ids1, ids2),
+            'solo_archivo_1_estimadas': ids1 - coincidencias,
+            'solo_archivo_2_estimadas': ids2 - coincidencias,
+        }
+
+    async def buscar_solapamientos(self, archivo_id: int, limite: int = 10):
+        """
+        Ordena los demás archivos por el índice de Jaccard estimado entre sus IDs y los del
+        archivo dado, comparando solo las firmas MinHash (sin leer transacciones).
+        """
+        archivo = await self.get_resumen_archivo(archivo_id)
+        if not archivo:
+            raise ValueError(f"Archivo con ID {archivo_id} no encontrado")
+        
+        result = await self.db.execute(select(Archivo.firma_ids).where(Archivo.id == archivo_id))
+        firma = result.scalar()
+        if firma is None:
+            firma = await self.calcular_firma_archivo(archivo_id)
+        
+        result = await self.db.execute(
+            select(Archivo.id, Archivo.nombre_archivo, Archivo.fecha_carga, Archivo.ids_distintos, Archivo.firma_ids)
+            .where(Archivo.id != archivo_id, Archivo.firma_ids.isnot(None), Archivo.fecha_ingesta.isnot(None))
+        )
+        candidatos = result.all()
+        tamano = tamano_comun(
+            [firma, *(c.firma_ids for c in candidatos)],
+            [archivo.ids_distintos, *(c.ids_distintos for c in candidatos)],
+            settings.FIRMA_IDS_TAMANO,
+        )
+        jaccard = await run_in_threadpool(estimar_jaccard, firma, [c.firma_ids for c in candidatos], tamano)
+        
+        mejores = sorted((i for i in range(len(candidatos)) if jaccard[i] > 0), key=lambda i: -jaccard[i])[:limite]
+        return [
+            SolapamientoCandidato(
+                archivo_id=candidatos[i].id,
+                nombre_archivo=candidatos[i].nombre_archivo,
+                fecha_carga=candidatos[i].fecha_carga,
+                jaccard_estimado=float(jaccard[i]),
+                coincidencias_estimadas=coincidencias_estimadas(
+                    float(jaccard[i]), archivo.ids_distintos or 0, candidatos[i].ids_distintos or 0
+                ),
+            )
+            for i in mejores
+        ]
+
+    async def calcular_firma_archivo(self, archivo_id: int):
+        """
+        Calcula y guarda la firma de IDs de un archivo cargado antes de que existieran las firmas.
+        """
+        result = await self.db.execute(
+            select(Transaccion.id_transaccion).where(Transaccion.archivo_id == archivo_id)
+        )
+        firma = await run_in_threadpool(calcular_firma, result.scalars().all(), settings.FIRMA_IDS_TAMANO)
+        await self.db.execute(update(Archivo).where(Archivo.id == archivo_id).values(firma_ids=firma))
+        await self.db.commit()
+        return firma
+
+    async def calcular_firmas_faltantes(self):
+        """
+        Calcula las firmas de todos los archivos ya ingeridos que aún no la tienen.
+        """
+        result = await self.db.execute(
+            select(Archivo.id).where(Archivo.firma_ids.is_(None), Archivo.fecha_ingesta.isnot(None)).order_by(Archivo.id)
+        )
+        archivo_ids = list(result.scalars().all())
+        for archivo_id in archivo_ids:
+            await self.calcular_firma_archivo(archivo_id)
+        return archivo_ids
+
+    async def generar_reporte_errores(self, archivo_id: int):
+        """
+        Genera un Excel con las filas omitidas o en cuarentena de un archivo: hoja y número
+        de fila, motivos y, en cuarentena, sus valores originales.
+        """
+        import pandas as pd
+        
+        if await self.db.get(Archivo, archivo_id) is None:
+            raise ValueError(f"Archivo con ID {archivo_id} no encontrado")
+        result = await self.db.execute(
+            select(
+                TransaccionCuarentena.hoja, TransaccionCuarentena.fila,
+                TransaccionCuarentena.motivos, TransaccionCuarentena.datos,
+            )
+            .where(TransaccionCuarentena.archivo_id == archivo_id)
+            .order_by(TransaccionCuarentena.id)
+        )
+        filas = result.all()
+        
+        def generar():
+            reporte = pd.DataFrame({
+                'hoja': [fila.hoja for fila in filas],
+                'fila': [fila.fila for fila in filas],
+                'motivos': [fila.motivos for fila in filas],
+            })
+            if reporte['hoja'].isna().all():
+                reporte = reporte.drop(columns='hoja')
+            datos = pd.DataFrame([fila.datos or {} for fila in filas], index=reporte.index)
+            return self._generar_excel_comparacion({'Errores': pd.concat([reporte, datos], axis=1)})
+        
+        output = await run_in_threadpool(generar)
+        BYTES_GENERADOS.inc(output.getbuffer().nbytes)
+        return StreamingResponse(
+            output,
+            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            headers={"Content-Disposition": f"attachment; filename=errores_{archivo_id}.xlsx"}
+        )
+
     async def get_archivo_with_transacciones(self, archivo_id: int):
         """
         Obtiene un archivo con sus transacciones.
@@ -274,122 +921,269 @@ class ArchivoService:
         
         return unicas_archivo_1, unicas_archivo_2
 
-    async def comparar_archivos_excel(self, archivo_id_1: int, archivo_id_2: int):
+    async def comparar_archivos_excel(self, archivo_id_1: int, archivo_id_2: int, cancelacion: Optional[Cancelacion] = None,
+                                      filtro: Optional[FiltroComparacion] = None,
+                                      perfil: PerfilComparacion = PERFIL_ESTANDAR):
         """
-        Compara transacciones entre dos archivos y genera un Excel con los resultados.
+        Compara transacciones entre dos archivos según el perfil de comparación y genera
+        un Excel con los resultados.
         """
-        # Obtener archivos
-        query1 = select(Archivo).options(selectinload(Archivo.transacciones)).where(Archivo.id == archivo_id_1)
-        query2 = select(Archivo).options(selectinload(Archivo.transacciones)).where(Archivo.id == archivo_id_2)
+        cancelacion = cancelacion or Cancelacion()
+        filtro = filtro or FiltroComparacion()
         
-        result1 = await self.db.execute(query1)
-        result2 = await self.db.execute(query2)
+        # Obtener archivos y sus columnas (de la caché si están disponibles)
+        with medir_etapa("comparacion", "carga"):
+            archivo1 = await self.get_resumen_archivo(archivo_id_1)
+            archivo2 = await self.get_resumen_archivo(archivo_id_2)
+            
+            if not archivo1:
+                raise ValueError(f"Archivo con ID {archivo_id_1} no encontrado")
+            
+            if not archivo2:
+                raise ValueError(f"Archivo con ID {archivo_id_2} no encontrado")
+            
+            columnas1 = await self._cargar_columnas(archivo1, filtro)
+            columnas2 = await self._cargar_columnas(archivo2, filtro)
         
-        archivo1 = result1.scalars().first()
-        archivo2 = result2.scalars().first()
+        cancelacion.verificar()
+        with medir_etapa("comparacion", "clasificacion"):
+            resultado = await run_in_threadpool(comparar_columnas, columnas1, columnas2, perfil)
+        FILAS_PROCESADAS.labels("comparacion").inc(len(columnas1) + len(columnas2))
+        cancelacion.verificar()
         
-        if not archivo1:
-            raise ValueError(f"Archivo con ID {archivo_id_1} no encontrado")
+        with medir_etapa("comparacion", "renderizado"):
+            hojas = await run_in_threadpool(construir_hojas, resultado, columnas1, columnas2)
+            output = await run_in_threadpool(self._generar_excel_comparacion, hojas)
+        BYTES_GENERADOS.inc(output.getbuffer().nbytes)
         
-        if not archivo2:
-            raise ValueError(f"Archivo con ID {archivo_id_2} no encontrado")
+        # Devolver archivo Excel
+        return StreamingResponse(
+            output,
+            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            headers={"Content-Disposition": f"attachment; filename=comparacion_{archivo_id_1}_{archivo_id_2}.xlsx"}
+        )
+
+    async def comparar_lote(self, archivo_id_referencia: int, archivo_ids: List[int], formato: str = "json",
+                            cancelacion: Optional[Cancelacion] = None, filtro: Optional[FiltroComparacion] = None,
+                            perfil: PerfilComparacion = PERFIL_ESTANDAR):
+        """
+        Compara un archivo de referencia contra varios archivos. La referencia y su índice
+        de claves se cargan una sola vez; cada comparación se inicia en cuanto su archivo está
+        cargado, mientras se leen los siguientes.
+        """
+        cancelacion = cancelacion or Cancelacion()
+        filtro = filtro or FiltroComparacion()
+        archivo_ids = list(dict.fromkeys(archivo_ids))
         
-        # Crear diccionarios para facilitar la comparación
-        transacciones1 = {t.id_transaccion: t for t in archivo1.transacciones}
-        transacciones2 = {t.id_transaccion: t for t in archivo2.transacciones}
-        
-        # Listas para almacenar resultados
-        coincidencias_exactas = []
-        coincidencias_con_diferencias = []
-        solo_archivo1 = []
-        solo_archivo2 = []
-        
-        # Comparar transacciones
-        for id_transaccion, t1 in transacciones1.items():
-            if id_transaccion in transacciones2:
-                t2 = transacciones2[id_transaccion]
+        with medir_etapa("comparacion_lote", "carga"):
+            archivos = []
+            for archivo_id in [archivo_id_referencia, *archivo_ids]:
+                archivo = await self.get_resumen_archivo(archivo_id)
+                if not archivo:
+                    raise ValueError(f"Archivo con ID {archivo_id} no encontrado")
+                archivos.append(archivo)
+        
+        columnas, tareas = [], []
+        try:
+            with medir_etapa("comparacion_lote", "carga"):
+                referencia = await self._cargar_columnas(archivos[0], filtro)
+                await run_in_threadpool(referencia.indice, perfil.claves)
                 
-                # Verificar si hay diferencias
-                if t1.monto == t2.monto and t1.estado == t2.estado:
-                    # Coincidencia exacta
-                    coincidencias_exactas.append(TransaccionComparacion(
-                        id_transaccion=t1.id_transaccion,
-                        fecha=t1.fecha,
-                        cuenta_origen=t1.cuenta_origen,
-                        cuenta_destino=t1.cuenta_destino,
-                        monto_archivo_1=t1.monto,
-                        monto_archivo_2=t2.monto,
-                        estado_archivo_1=t1.estado,
-                        estado_archivo_2=t2.estado,
-                        tipo_coincidencia="Coincidencia exacta"
-                    ))
-                else:
-                    # Coincidencia con diferencias
-                    tipo = "Diferencia en monto" if t1.monto != t2.monto else "Diferencia en estado"
-                    coincidencias_con_diferencias.append(TransaccionComparacion(
-                        id_transaccion=t1.id_transaccion,
-                        fecha=t1.fecha,
-                        cuenta_origen=t1.cuenta_origen,
-                        cuenta_destino=t1.cuenta_destino,
-                        monto_archivo_1=t1.monto,
-                        monto_archivo_2=t2.monto,
-                        estado_archivo_1=t1.estado,
-                        estado_archivo_2=t2.estado,
-                        tipo_coincidencia=tipo
-                    ))
-            else:
-                # Solo en archivo 1
-                solo_archivo1.append(TransaccionComparacion(
-                    id_transaccion=t1.id_transaccion,
-                    fecha=t1.fecha,
-                    cuenta_origen=t1.cuenta_origen,
-                    cuenta_destino=t1.cuenta_destino,
-                    monto_archivo_1=t1.monto,
-                    estado_archivo_1=t1.estado,
-                    tipo_coincidencia="Solo en Archivo 1"
-                ))
-        
-        # Transacciones solo en archivo 2
-        for id_transaccion, t2 in transacciones2.items():
-            if id_transaccion not in transacciones1:
-                solo_archivo2.append(TransaccionComparacion(
-                    id_transaccion=t2.id_transaccion,
-                    fecha=t2.fecha,
-                    cuenta_origen=t2.cuenta_origen,
-                    cuenta_destino=t2.cuenta_destino,
-                    monto_archivo_2=t2.monto,
-                    estado_archivo_2=t2.estado,
-                    tipo_coincidencia="Solo en Archivo 2"
-                ))
-        
-        # Crear Excel con resultados
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            # Hoja 1: Coincidencias exactas
-            if coincidencias_exactas:
-                df_exactas = pd.DataFrame([t.dict() for t in coincidencias_exactas])
-                df_exactas.to_excel(writer, sheet_name='Coincidencias Exactas', index=False)
-            
-            # Hoja 2: Coincidencias con diferencias
-            if coincidencias_con_diferencias:
-                df_diferencias = pd.DataFrame([t.dict() for t in coincidencias_con_diferencias])
-                df_diferencias.to_excel(writer, sheet_name='Coincidencias con Diferencias', index=False)
+                for archivo in archivos[1:]:
+                    cancelacion.verificar()
+                    columnas.append(await self._cargar_columnas(archivo, filtro))
+                    tareas.append(asyncio.ensure_future(run_in_threadpool(comparar_columnas, referencia, columnas[-1], perfil)))
             
-            # Hoja 3: Solo en archivo 1
-            if solo_archivo1:
-                df_solo1 = pd.DataFrame([t.dict() for t in solo_archivo1])
-                df_solo1.to_excel(writer, sheet_name='Solo en Archivo 1', index=False)
-            
-            # Hoja 4: Solo en archivo 2
-            if solo_archivo2:
-                df_solo2 = pd.DataFrame([t.dict() for t in solo_archivo2])
-                df_solo2.to_excel(writer, sheet_name='Solo en Archivo 2', index=False)
+            with medir_etapa("comparacion_lote", "clasificacion"):
+                # wait y no gather: si se cancela la espera, las comparaciones siguen y se esperan abajo
+                if tareas:
+                    await asyncio.wait(tareas)
+                resultados = [tarea.result() for tarea in tareas]
+        finally:
+            # Un hilo del threadpool no se puede interrumpir: si la carga falla o se cancela,
+            # se espera a las comparaciones ya iniciadas para no dejarlas corriendo y
+            # recuperar sus errores
+            await asyncio.gather(*tareas, return_exceptions=True)
+        FILAS_PROCESADAS.labels("comparacion_lote").inc(len(referencia) + sum(len(c) for c in columnas))
+        cancelacion.verificar()
         
-        output.seek(0)
+        parametro_perfil = "" if perfil.estandar else f"&perfil={perfil.nombre}"
+        comparaciones = [
+            ComparacionLoteItem(
+                archivo_id=archivo.id,
+                conteos=resultado.conteos(),
+                url_excel=f"{settings.API_V1_STR}/archivos/comparar-excel/?archivo_id_1={archivo_id_referencia}&archivo_id_2={archivo.id}{parametro_perfil}",
+            )
+            for archivo, resultado in zip(archivos[1:], resultados)
+        ]
+        tipos = tipos_coincidencia(perfil.campos, {tipo for c in comparaciones for tipo in c.conteos})
+        lote = ComparacionLote(
+            archivo_id_referencia=archivo_id_referencia,
+            comparaciones=comparaciones,
+            totales={tipo: sum(c.conteos.get(tipo, 0) for c in comparaciones) for tipo in tipos},
+        )
+        if formato == "json":
+            return lote
+        
+        with medir_etapa("comparacion_lote", "renderizado"):
+            output = await run_in_threadpool(self._generar_excel_lote, lote, referencia, columnas, resultados)
+        BYTES_GENERADOS.inc(output.getbuffer().nbytes)
         
-        # Devolver archivo Excel
         return StreamingResponse(
             output,
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename=comparacion_{archivo_id_1}_{archivo_id_2}.xlsx"}
-        ) 
\ No newline at end of file
+            headers={"Content-Disposition": f"attachment; filename=comparacion_lote_{archivo_id_referencia}.xlsx"}
+        )
+
+    def _generar_excel_lote(self, lote, referencia, columnas, resultados):
+        """
+        Genera un Excel con una hoja de resumen y las hojas de cada comparación,
+        prefijadas con el ID del archivo comparado.
+        """
+        import pandas as pd
+        
+        # Nombres cortos: Excel limita los nombres de hoja a 31 caracteres
+        nombres_cortos = dict(zip(
+            (nombre for nombre, _ in HOJAS), ("Exactas", "Diferencias", "Solo Archivo 1", "Solo Archivo 2")
+        ))
+        hojas = {"Resumen": pd.DataFrame([
+            {"archivo_id": c.archivo_id, **{tipo: c.conteos.get(tipo, 0) for tipo in lote.totales}}
+            for c in lote.comparaciones
+        ] + [{"archivo_id": "Total", **lote.totales}])}
+        for item, columnas_archivo, resultado in zip(lote.comparaciones, columnas, resultados):
+            for nombre, df in construir_hojas(resultado, referencia, columnas_archivo).items():
+                hojas[f"{item.archivo_id} - {nombres_cortos[nombre]}"] = df
+        return self._generar_excel_comparacion(hojas)
+
+    async def _cargar_columnas(self, archivo: Archivo, filtro: Optional[FiltroComparacion] = None):
+        """
+        Obtiene las transacciones de un archivo en formato columnar, usando la caché columnar.
+        Si está en caché el filtro se aplica en memoria; si no, se resuelve en la consulta
+        y el resultado parcial no se guarda en caché.
+        """
+        filtro = filtro or FiltroComparacion()
+        # La versión cambia si el archivo se reingiere
+        version = archivo.fecha_ingesta or archivo.fecha_carga
+        columnas = cache_columnar.obtener(archivo.id, version)
+        if columnas is not None:
+            return filtro.aplicar(columnas)
+        
+        query = (
+            select(
+                Transaccion.id_transaccion, Transaccion.fecha, Transaccion.cuenta_origen,
+                Transaccion.cuenta_destino, Transaccion.monto, Transaccion.estado,
+            )
+            .where(Transaccion.archivo_id == archivo.id, *filtro.condiciones())
+            .order_by(Transaccion.id)
+        )
+        result = await self.db.execute(query)
+        columnas = await run_in_threadpool(construir_columnas, archivo.id, result.all())
+        if not filtro.activo:
+            cache_columnar.guardar(archivo.id, version, columnas)
+        return columnas
+
+    async def resumen_comparacion(self, archivo_id_1: int, archivo_id_2: int, filtro: Optional[FiltroComparacion] = None,
+                                  perfil: PerfilComparacion = PERFIL_ESTANDAR):
+        """
+        Calcula cantidades y montos por tipo de coincidencia con una sola consulta agregada,
+        sin cargar transacciones en memoria.
+        """
+        for archivo_id in (archivo_id_1, archivo_id_2):
+            if not await self.get_resumen_archivo(archivo_id):
+                raise ValueError(f"Archivo con ID {archivo_id} no encontrado")
+        
+        result = await self.db.execute(self._consulta_resumen_comparacion(archivo_id_1, archivo_id_2, filtro, perfil))
+        por_tipo = {fila.tipo_coincidencia: fila for fila in result}
+        
+        tipos = []
+        for tipo in tipos_coincidencia(perfil.campos, por_tipo):
+            fila = por_tipo.get(tipo)
+            tipos.append(ResumenTipoCoincidencia(
+                tipo_coincidencia=tipo,
+                cantidad=fila.cantidad,
+                monto_archivo_1=fila.monto_archivo_1,
+                monto_archivo_2=fila.monto_archivo_2,
+                diferencia_monto=fila.diferencia_monto,
+            ) if fila else ResumenTipoCoincidencia(tipo_coincidencia=tipo))
+        return ResumenComparacion(archivo_id_1=archivo_id_1, archivo_id_2=archivo_id_2, tipos=tipos)
+
+    @staticmethod
+    def _consulta_resumen_comparacion(archivo_id_1: int, archivo_id_2: int, filtro: Optional[FiltroComparacion] = None,
+                                      perfil: PerfilComparacion = PERFIL_ESTANDAR):
+        """
+        Construye la consulta del resumen. Igual que en la comparación completa, si una
+        clave se repite dentro de un archivo se usa su última ocurrencia, y las diferencias
+        se informan por campo en el orden del perfil.
+        """
+        condiciones = (filtro or FiltroComparacion()).condiciones()
+        claves = [getattr(Transaccion, campo) for campo in perfil.claves]
+        
+        def ultimas(archivo_id, nombre):
+            return (
+                select(
+                    Transaccion.id_transaccion, Transaccion.fecha, Transaccion.cuenta_origen,
+                    Transaccion.cuenta_destino, Transaccion.monto, Transaccion.estado,
+                )
+                .where(Transaccion.archivo_id == archivo_id, *condiciones)
+                .distinct(*claves)
+                .order_by(*claves, Transaccion.id.desc())
+                .subquery(nombre)
+            )
+        
+        t1 = ultimas(archivo_id_1, "t1")
+        t2 = ultimas(archivo_id_2, "t2")
+        
+        def difiere(campo):
+            tolerancia = perfil.tolerancias.get(campo)
+            if not tolerancia:
+                return t1.c[campo] != t2.c[campo]
+            if campo == "fecha":
+                return func.abs(func.extract("epoch", t1.c.fecha - t2.c.fecha)) > tolerancia
+            return func.abs(t1.c[campo] - t2.c[campo]) > Decimal(str(tolerancia))
+        
+        # concat_ws omite los campos sin diferencia (NULL)
+        diferencias = func.concat_ws(
+            ", ", *(case((difiere(campo), literal(nombre_campo(campo)))) for campo in perfil.campos)
+        )
+        clave = perfil.claves[0]
+        tipo = case(
+            (t2.c[clave].is_(None), literal(ETIQUETA_SOLO_ARCHIVO_1)),
+            (t1.c[clave].is_(None), literal(ETIQUETA_SOLO_ARCHIVO_2)),
+            (diferencias == "", literal(ETIQUETA_EXACTA)),
+            else_=func.concat(PREFIJO_DIFERENCIA, diferencias),
+        ).label("tipo_coincidencia")
+        cero = literal(0)
+        
+        comparacion = (
+            select(tipo, t1.c.monto.label("monto_1"), t2.c.monto.label("monto_2"))
+            .select_from(t1.join(t2, and_(*(t1.c[campo] == t2.c[campo] for campo in perfil.claves)), full=True))
+            .subquery("comparacion")
+        )
+        return (
+            select(
+                comparacion.c.tipo_coincidencia,
+                func.count().label("cantidad"),
+                func.coalesce(func.sum(comparacion.c.monto_1), cero).label("monto_archivo_1"),
+                func.coalesce(func.sum(comparacion.c.monto_2), cero).label("monto_archivo_2"),
+                func.coalesce(
+                    func.sum(func.coalesce(comparacion.c.monto_2, cero) - func.coalesce(comparacion.c.monto_1, cero)),
+                    cero,
+                ).label("diferencia_monto"),
+            )
+            .group_by(comparacion.c.tipo_coincidencia)
+        )
+
+    def _generar_excel_comparacion(self, hojas):
+        """
+        Genera el Excel con una hoja por tipo de coincidencia.
+        """
+        import pandas as pd
+        
+        # Crear Excel con resultados (las hojas vacías no se incluyen)
+        output = io.BytesIO()
+        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+            for nombre_hoja, df in hojas.items():
+                df.to_excel(writer, sheet_name=nombre_hoja, index=False)
+        
+        output.seek(0)
+        return output
@@ -0,0 +1,215 @@
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metricas import CACHE_COLUMNAR_BYTES, CACHE_COLUMNAR_CONSULTAS, CACHE_COLUMNAR_DESALOJOS
+
+# numpy y pandas se importan dentro de las funciones para no cargarlo al iniciar la aplicación.
+
+# Estados válidos (restricción check_estado) y su código en las columnas
+ESTADOS = ("Exitosa", "Fallida")
+CODIGOS_ESTADO = {estado: codigo for codigo, estado in enumerate(ESTADOS)}
+
+FilaTransaccion = namedtuple(
+    "FilaTransaccion", ["id_transaccion", "fecha", "cuenta_origen", "cuenta_destino", "monto", "estado"]
+)
+
+
+# Clave de emparejamiento del perfil estándar, cuyo índice se calcula al construir las columnas
+CLAVES_ID = ("id_transaccion",)
+
+
+@dataclass
+class IndiceClaves:
+    """
+    Índice de las claves de emparejamiento de un archivo: claves únicas ordenadas con la
+    fila de su primera y su última ocurrencia.
+    """
+    claves: Any  # ndarray ordenado (hash uint64 o código entero)
+    primera: Any  # ndarray int64
+    ultima: Any  # ndarray int64
+    exacto: bool = True  # False si dos claves distintas comparten hash
+
+    @property
+    def nbytes(self) -> int:
+        return self.claves.nbytes + self.primera.nbytes + self.ultima.nbytes
+
+
+def indexar_claves(claves, valores) -> IndiceClaves:
+    """
+    Agrupa las filas por clave con un ordenamiento estable y verifica que las filas
+    con la misma clave tengan los mismos valores en cada campo clave.
+    """
+    import numpy as np
+
+    if len(claves) == 0:
+        vacio = np.zeros(0, dtype=np.int64)
+        return IndiceClaves(claves=np.asarray(claves), primera=vacio, ultima=vacio)
+    orden = np.argsort(claves, kind="stable")
+    ordenadas = claves[orden]
+    repetidas = ordenadas[1:] == ordenadas[:-1]
+    inicio = np.flatnonzero(np.concatenate([[True], ~repetidas]))
+    fin = np.concatenate([inicio[1:], [len(claves)]]) - 1
+    pares = np.flatnonzero(repetidas)
+    return IndiceClaves(
+        claves=ordenadas[inicio],
+        primera=orden[inicio],
+        ultima=orden[fin],
+        exacto=all(bool(np.all(v[orden[pares]] == v[orden[pares + 1]])) for v in valores),
+    )
+
+
+@dataclass
+class ColumnasArchivo:
+    """
+    Transacciones de un archivo en formato columnar, en el orden en que fueron cargadas.
+    """
+    archivo_id: int
+    id_transaccion: Any  # ndarray de str (object)
+    fecha: Any  # ndarray datetime64[us]
+    cuenta_origen: Any  # ndarray de str (object)
+    cuenta_destino: Any  # ndarray de str (object)
+    monto_centavos: Any  # ndarray int64
+    estado: Any  # ndarray int8 con códigos de ESTADOS
+    nbytes: int = 0
+    indices: Dict[Tuple[str, ...], IndiceClaves] = field(default_factory=dict)
+
+    def __len__(self):
+        return len(self.id_transaccion)
+
+    def valores(self, campo: str):
+        """
+        Columna de un campo de la transacción (el monto, en centavos).
+        """
+        return self.monto_centavos if campo == "monto" else getattr(self, campo)
+
+    def indice(self, claves: Tuple[str, ...] = CLAVES_ID) -> IndiceClaves:
+        """
+        Índice de las claves por hash de 64 bits. Se calcula una vez y se guarda en la caché
+        junto con las columnas, así cada comparación solo hace búsquedas binarias.
+
+        Solo el índice de CLAVES_ID se contabiliza en nbytes; los de otros perfiles se
+        calculan la primera vez que se usan.
+        """
+        indice = self.indices.get(claves)
+        if indice is None:
+            import pandas as pd
+
+            valores = [self.valores(campo) for campo in claves]
+            if len(claves) == 1:
+                hashes = pd.util.hash_array(valores[0], categorize=False)
+            else:
+                hashes = pd.util.hash_pandas_object(
+                    pd.DataFrame(dict(zip(claves, valores)), copy=False), index=False, categorize=False
+                ).to_numpy()
+            indice = self.indices[claves] = indexar_claves(hashes, valores)
+        return indice
+
+    def filas(self):
+        """
+        Recorre las transacciones como filas con los tipos originales (datetime, Decimal, str).
+        """
+        fechas = self.fecha.astype(object)
+        for i in range(len(self)):
+            yield FilaTransaccion(
+                self.id_transaccion[i],
+                fechas[i],
+                self.cuenta_origen[i],
+                self.cuenta_destino[i],
+                Decimal(int(self.monto_centavos[i])).scaleb(-2),
+                ESTADOS[self.estado[i]],
+            )
+
+
+def construir_columnas(archivo_id: int, filas) -> ColumnasArchivo:
+    """
+    Construye las columnas a partir de filas (id_transaccion, fecha, cuenta_origen,
+    cuenta_destino, monto, estado) leídas de la base de datos.
+    """
+    import numpy as np
+
+    n = len(filas)
+    ids, fechas, origenes, destinos, montos, estados = zip(*filas) if n else ((),) * 6
+
+    columnas = ColumnasArchivo(
+        archivo_id=archivo_id,
+        id_transaccion=np.array(ids, dtype=object),
+        fecha=np.array(fechas, dtype="datetime64[us]"),
+        cuenta_origen=np.array(origenes, dtype=object),
+        cuenta_destino=np.array(destinos, dtype=object),
+        monto_centavos=np.fromiter((int(m.scaleb(2)) for m in montos), dtype=np.int64, count=n),
+        estado=np.fromiter((CODIGOS_ESTADO[e] for e in estados), dtype=np.int8, count=n),
+    )
+    # Las cadenas viven fuera de los arreglos object: se suman para acotar la memoria real
+    columnas.nbytes = (
+        columnas.indice().nbytes + columnas.fecha.nbytes + columnas.monto_centavos.nbytes + columnas.estado.nbytes
+        + sum(arreglo.nbytes + sum(map(sys.getsizeof, arreglo))
+              for arreglo in (columnas.id_transaccion, columnas.cuenta_origen, columnas.cuenta_destino))
+    )
+    return columnas
+
+
+class CacheColumnar:
+    """
+    Caché LRU acotada por bytes de las columnas de archivos usados recientemente.
+
+    Cada entrada guarda una versión del archivo (su fecha de carga) para no servir
+    datos de un archivo eliminado y vuelto a crear con el mismo ID.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes_usados = 0
+        self._entradas: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def habilitada(self) -> bool:
+        return self.max_bytes > 0
+
+    def obtener(self, archivo_id: int, version: Hashable) -> Optional[ColumnasArchivo]:
+        if not self.habilitada:
+            return None
+        with self._lock:
+            entrada = self._entradas.get(archivo_id)
+            if entrada is None or entrada[0] != version:
+                CACHE_COLUMNAR_CONSULTAS.labels("fallo").inc()
+                return None
+            self._entradas.move_to_end(archivo_id)
+        CACHE_COLUMNAR_CONSULTAS.labels("acierto").inc()
+        return entrada[1]
+
+    def guardar(self, archivo_id: int, version: Hashable, columnas: ColumnasArchivo):
+        if not self.habilitada or columnas.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            self._quitar(archivo_id)
+            while self._entradas and self.bytes_usados + columnas.nbytes > self.max_bytes:
+                self._quitar(next(iter(self._entradas)))
+                CACHE_COLUMNAR_DESALOJOS.inc()
+            self._entradas[archivo_id] = (version, columnas)
+            self.bytes_usados += columnas.nbytes
+            CACHE_COLUMNAR_BYTES.set(self.bytes_usados)
+
+    def invalidar(self, archivo_id: int):
+        with self._lock:
+            self._quitar(archivo_id)
+            CACHE_COLUMNAR_BYTES.set(self.bytes_usados)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self.bytes_usados = 0
+            CACHE_COLUMNAR_BYTES.set(0)
+
+    def _quitar(self, archivo_id: int):
+        entrada = self._entradas.pop(archivo_id, None)
+        if entrada is not None:
+            self.bytes_usados -= entrada[1].nbytes
+
+
+cache_columnar = CacheColumnar(settings.CACHE_COLUMNAR_MAX_MB * 1024 * 1024)
@@ -0,0 +1,265 @@
+"""
+Cargas de archivos por bloques, reanudables.
+
+El cliente inicia la carga con el nombre y el tamaño del archivo, envía bloques contiguos
+(PUT con Content-Range) y la finaliza para ingerir el archivo. Cada bloque se recibe
+primero en un archivo temporal mientras se calcula su sha256 y solo se agrega al archivo
+de la carga si está completo, coincide con el checksum declarado y empieza justo donde
+terminó el anterior. Un bloque cortado a mitad de camino no deja bytes a medias: el
+cliente consulta `recibidos` y reanuda desde ahí. Una carga se ingiere una sola vez: al
+finalizarla de nuevo se devuelve el resultado guardado.
+"""
+import hashlib
+import os
+import shutil
+import uuid
+from contextlib import contextmanager, suppress
+from datetime import datetime, timedelta
+from typing import AsyncIterator, List, Optional
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.carga import CargaArchivo
+from app.schemas.carga import CargaArchivoCreate
+from app.services.formatos_archivo import FORMATOS, formato_archivo
+
+# Bytes que se copian por vez al agregar un bloque o calcular un sha256
+_TAMANO_COPIA = 1024 * 1024
+
+# Estados de una carga
+RECIBIENDO = "recibiendo"
+INGIRIENDO = "ingiriendo"
+INGERIDA = "ingerida"
+
+
+class ConflictoCarga(Exception):
+    """
+    El bloque no continúa los bytes recibidos, la carga aún no está completa o ya se está
+    ingiriendo. `recibidos` indica desde qué byte reanudar.
+    """
+
+    def __init__(self, mensaje: str, recibidos: int):
+        self.recibidos = recibidos
+        super().__init__(mensaje)
+
+
+def calcular_sha256(ruta: str) -> str:
+    """
+    sha256 de un archivo, leyéndolo por partes.
+    """
+    digest = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for parte in iter(lambda: f.read(_TAMANO_COPIA), b""):
+            digest.update(parte)
+    return digest.hexdigest()
+
+
+def _agregar_bloque(ruta: str, temporal: str, posicion: int):
+    """
+    Escribe el bloque a partir de `posicion`, descartando lo que haya quedado después de
+    un intento anterior interrumpido, y lo sincroniza a disco antes de confirmarlo.
+    """
+    with open(ruta, "r+b") as destino, open(temporal, "rb") as origen:
+        destino.truncate(posicion)
+        destino.seek(posicion)
+        shutil.copyfileobj(origen, destino, _TAMANO_COPIA)
+        destino.flush()
+        os.fsync(destino.fileno())
+
+
+class CargaService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @staticmethod
+    def ruta(carga_id: str) -> str:
+        """
+        Archivo donde se acumulan los bloques recibidos de la carga.
+        """
+        return os.path.join(settings.CARGAS_DIRECTORIO, f"{carga_id}.parte")
+
+    async def crear_carga(self, datos: CargaArchivoCreate) -> CargaArchivo:
+        """
+        Inicia una carga con un archivo vacío en el directorio de cargas.
+        """
+        if formato_archivo(datos.nombre_archivo) is None:
+            raise ValueError(f"Formato no admitido; se admiten {', '.join(FORMATOS)}")
+
+        carga = CargaArchivo(
+            id=uuid.uuid4().hex,
+            nombre_archivo=datos.nombre_archivo,
+            tamano=datos.tamano,
+            recibidos=0,
+            sha256=datos.sha256.lower() if datos.sha256 else None,
+        )
+        os.makedirs(settings.CARGAS_DIRECTORIO, exist_ok=True)
+        open(self.ruta(carga.id), "wb").close()
+        self.db.add(carga)
+        await self.db.commit()
+        await self.db.refresh(carga)
+        return carga
+
+    async def get_carga(self, carga_id: str) -> Optional[CargaArchivo]:
+        return await self.db.get(CargaArchivo, carga_id)
+
+    async def recibir_bloque(self, carga_id: str, inicio: int, fin: int, total: int,
+                             contenido: AsyncIterator[bytes], sha256: Optional[str] = None) -> Optional[CargaArchivo]:
+        """
+        Recibe los bytes `inicio`-`fin` (inclusive) de la carga. Un bloque ya recibido se
+        acepta sin volver a escribirlo, para que el cliente pueda reintentar sin riesgo.
+        Devuelve None si la carga no existe.
+        """
+        carga = await self.get_carga(carga_id)
+        if carga is None:
+            return None
+        if total != carga.tamano:
+            raise ValueError(f"El tamaño total {total} no coincide con el de la carga ({carga.tamano})")
+        if not 0 <= inicio <= fin < total:
+            raise ValueError(f"Rango de bytes no válido: {inicio}-{fin}/{total}")
+        longitud = fin - inicio + 1
+        if longitud > settings.CARGAS_BLOQUE_MAX_MB * 1024 * 1024:
+            raise ValueError(f"El bloque supera el máximo de {settings.CARGAS_BLOQUE_MAX_MB} MB")
+
+        temporal = f"{self.ruta(carga_id)}.{uuid.uuid4().hex}"
+        try:
+            digest, recibido = hashlib.sha256(), 0
+            with open(temporal, "wb") as f:
+                async for parte in contenido:
+                    recibido += len(parte)
+                    if recibido > longitud:
+                        raise ValueError(f"El bloque tiene más de los {longitud} bytes indicados en Content-Range")
+                    digest.update(parte)
+                    await run_in_threadpool(f.write, parte)
+            if recibido != longitud:
+                raise ValueError(f"Se recibieron {recibido} de los {longitud} bytes del bloque")
+            if sha256 and digest.hexdigest() != sha256.lower():
+                raise ValueError("El sha256 del bloque no coincide; vuelva a enviarlo")
+
+            # El bloqueo de la fila ordena los bloques que llegan a la vez a distintos procesos
+            result = await self.db.execute(
+                select(CargaArchivo).where(CargaArchivo.id == carga_id)
+                .with_for_update().execution_options(populate_existing=True)
+            )
+            carga = result.scalar_one()
+            if inicio != carga.recibidos:
+                if fin < carga.recibidos:
+                    await self.db.commit()
+                    return carga
+                raise ConflictoCarga(
+                    f"El bloque debe comenzar en el byte {carga.recibidos}", carga.recibidos
+                )
+            await run_in_threadpool(_agregar_bloque, self.ruta(carga_id), temporal, carga.recibidos)
+            carga.recibidos += longitud
+            carga.fecha_actualizacion = datetime.utcnow()
+            await self.db.commit()
+            await self.db.refresh(carga)
+            return carga
+        except BaseException:
+            with suppress(Exception):
+                await self.db.rollback()
+            raise
+        finally:
+            with suppress(FileNotFoundError):
+                os.remove(temporal)
+
+    async def _bloquear(self, carga_id: str) -> Optional[CargaArchivo]:
+        result = await self.db.execute(
+            select(CargaArchivo).where(CargaArchivo.id == carga_id)
+            .with_for_update().execution_options(populate_existing=True)
+        )
+        return result.scalar_one_or_none()
+
+    async def iniciar_ingesta(self, carga_id: str) -> Optional[CargaArchivo]:
+        """
+        Verifica que se hayan recibido todos los bytes y, si se declaró, el sha256 del
+        archivo completo, y marca la carga como en ingesta. La fila queda bloqueada hasta
+        entonces: de dos finalizaciones simultáneas solo una ingiere la carga y la otra
+        recibe un conflicto. Una carga en ingesta desde hace más de
+        CARGAS_INGESTA_PLAZO_MINUTOS se considera abandonada (el proceso que la ingería se
+        detuvo) y admite otro intento. Una carga ya ingerida se devuelve sin cambios, con
+        su `resultado`. Devuelve None si la carga no existe.
+        """
+        try:
+            carga = await self._bloquear(carga_id)
+            if carga is None or carga.estado == INGERIDA:
+                await self.db.commit()
+                return carga
+            abandonada = datetime.utcnow() - timedelta(minutes=settings.CARGAS_INGESTA_PLAZO_MINUTOS)
+            if carga.estado == INGIRIENDO and carga.fecha_actualizacion > abandonada:
+                raise ConflictoCarga("La carga ya se está ingiriendo", carga.recibidos)
+            if carga.recibidos != carga.tamano:
+                raise ConflictoCarga(
+                    f"Faltan {carga.tamano - carga.recibidos} bytes para completar la carga", carga.recibidos
+                )
+            if carga.sha256 and await run_in_threadpool(calcular_sha256, self.ruta(carga_id)) != carga.sha256:
+                raise ValueError(
+                    "El sha256 del archivo no coincide con el declarado; elimine la carga y vuelva a iniciarla"
+                )
+            carga.estado = INGIRIENDO
+            carga.fecha_actualizacion = datetime.utcnow()
+            await self.db.commit()
+            await self.db.refresh(carga)
+            return carga
+        except BaseException:
+            with suppress(Exception):
+                await self.db.rollback()
+            raise
+
+    async def terminar_ingesta(self, carga_id: str, resultado: Optional[dict]):
+        """
+        Guarda el resultado de la ingesta y elimina los bloques recibidos; la carga se
+        conserva hasta vencer para responder lo mismo si se vuelve a finalizar. Sin
+        `resultado` (el archivo se rechazó o la ingesta falló) la carga vuelve a admitir
+        otro intento.
+        """
+        try:
+            carga = await self._bloquear(carga_id)
+            if carga is not None:
+                carga.estado = RECIBIENDO if resultado is None else INGERIDA
+                carga.resultado = resultado
+                carga.fecha_actualizacion = datetime.utcnow()
+            await self.db.commit()
+        except BaseException:
+            with suppress(Exception):
+                await self.db.rollback()
+            raise
+        if resultado is not None:
+            with suppress(FileNotFoundError):
+                os.remove(self.ruta(carga_id))
+
+    @contextmanager
+    def abrir(self, carga: CargaArchivo):
+        """
+        Abre el archivo completo de la carga como un archivo subido, para ingerirlo.
+        """
+        with open(self.ruta(carga.id), "rb") as f:
+            yield UploadFile(file=f, filename=carga.nombre_archivo, size=carga.tamano)
+
+    async def eliminar_carga(self, carga_id: str) -> bool:
+        """
+        Elimina la carga y su archivo. Devuelve False si no existe.
+        """
+        carga = await self.get_carga(carga_id)
+        if carga is None:
+            return False
+        await self.db.delete(carga)
+        await self.db.commit()
+        with suppress(FileNotFoundError):
+            os.remove(self.ruta(carga_id))
+        return True
+
+    async def eliminar_cargas_vencidas(self, horas: int) -> List[str]:
+        """
+        Elimina las cargas sin actividad hace más de `horas` horas, incluidas las ya
+        ingeridas. Devuelve sus IDs.
+        """
+        limite = datetime.utcnow() - timedelta(hours=horas)
+        result = await self.db.execute(select(CargaArchivo.id).where(CargaArchivo.fecha_actualizacion < limite))
+        carga_ids = list(result.scalars().all())
+        for carga_id in carga_ids:
+            await self.eliminar_carga(carga_id)
+        return carga_ids
@@ -0,0 +1,359 @@
+"""
+Motor de comparación vectorizado sobre las columnas de dos archivos.
+
+Las transacciones se emparejan por los campos clave del perfil de comparación. Si una
+clave se repite dentro de un archivo se usa su última ocurrencia, y los resultados
+siguen el orden de la primera aparición de cada clave (primero las del archivo 1, luego
+las exclusivas del 2). Cada pareja lleva una máscara de bits con los campos comparados
+que difieren, en el orden en que el perfil los declara.
+"""
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+
+from app.services.cache_columnar import ESTADOS, ColumnasArchivo, IndiceClaves, indexar_claves
+from app.services.perfiles_comparacion import PERFIL_ESTANDAR, PerfilComparacion
+
+# numpy y pandas se importan dentro de las funciones para no cargarlos al iniciar la aplicación.
+
+ETIQUETA_EXACTA = "Coincidencia exacta"
+ETIQUETA_SOLO_ARCHIVO_1 = "Solo en Archivo 1"
+ETIQUETA_SOLO_ARCHIVO_2 = "Solo en Archivo 2"
+PREFIJO_DIFERENCIA = "Diferencia en "
+
+EXACTA, DIFERENCIA, SOLO_ARCHIVO_1, SOLO_ARCHIVO_2 = range(4)
+# En los conteos, los códigos desde aquí corresponden a cada máscara de diferencias
+CODIGO_DIFERENCIAS = 4
+
+# Hojas del Excel de resultados y las categorías que contiene cada una
+HOJAS = (
+    ("Coincidencias Exactas", (EXACTA,)),
+    ("Coincidencias con Diferencias", (DIFERENCIA,)),
+    ("Solo en Archivo 1", (SOLO_ARCHIVO_1,)),
+    ("Solo en Archivo 2", (SOLO_ARCHIVO_2,)),
+)
+
+# Escala de las tolerancias a las unidades de las columnas (centavos y microsegundos)
+ESCALAS_TOLERANCIA = {"monto": 100, "fecha": 1_000_000}
+
+
+def nombre_campo(campo: str) -> str:
+    return campo.replace("_", " ")
+
+
+def etiqueta_diferencia(mascara: int, campos: Tuple[str, ...]) -> str:
+    """
+    Etiqueta de una máscara de diferencias, p. ej. "Diferencia en monto, estado".
+    """
+    return PREFIJO_DIFERENCIA + ", ".join(
+        nombre_campo(campo) for bit, campo in enumerate(campos) if mascara >> bit & 1
+    )
+
+
+def tipos_coincidencia(campos: Tuple[str, ...], presentes=()) -> list:
+    """
+    Tipos de coincidencia de un perfil en orden. Siempre incluye la coincidencia exacta,
+    la diferencia en cada campo y los exclusivos de cada archivo; las combinaciones de
+    varios campos, solo si están en `presentes`.
+    """
+    simples = [etiqueta_diferencia(1 << bit, campos) for bit in range(len(campos))]
+    combinadas = [
+        etiqueta_diferencia(mascara, campos)
+        for mascara in range(1, 2 ** len(campos)) if mascara & (mascara - 1)
+    ]
+    return [
+        ETIQUETA_EXACTA, *simples, *(tipo for tipo in combinadas if tipo in presentes),
+        ETIQUETA_SOLO_ARCHIVO_1, ETIQUETA_SOLO_ARCHIVO_2,
+    ]
+
+
+def _tabla_etiquetas(campos: Tuple[str, ...]):
+    import numpy as np
+
+    return np.array([
+        ETIQUETA_EXACTA, None, ETIQUETA_SOLO_ARCHIVO_1, ETIQUETA_SOLO_ARCHIVO_2, None,
+        *(etiqueta_diferencia(mascara, campos) for mascara in range(1, 2 ** len(campos))),
+    ], dtype=object)
+
+
+def codigos_conteo(categoria, diferencias):
+    """
+    Código de conteo de cada entrada: su categoría, o CODIGO_DIFERENCIAS más su máscara
+    si tiene diferencias.
+    """
+    import numpy as np
+
+    return np.where(categoria == DIFERENCIA, CODIGO_DIFERENCIAS + diferencias.astype(np.int16), categoria)
+
+
+@dataclass(frozen=True)
+class EvaluadorDiferencias:
+    """
+    Perfil compilado: campos comparados y su umbral en las unidades de las columnas.
+    """
+    campos: Tuple[str, ...]
+    umbrales: Tuple[int, ...]
+
+    def evaluar(self, valores1: dict, valores2: dict):
+        """
+        Devuelve la máscara de bits de los campos que difieren en cada pareja, a partir
+        de los valores de cada campo alineados por pareja.
+        """
+        import numpy as np
+
+        mascara = np.zeros(len(valores1[self.campos[0]]), dtype=np.uint8)
+        for bit, (campo, umbral) in enumerate(zip(self.campos, self.umbrales)):
+            a, b = valores1[campo], valores2[campo]
+            difiere = np.abs(a - b) > umbral if umbral else a != b
+            mascara |= difiere.astype(np.uint8) << bit
+        return mascara
+
+
+def compilar(perfil: PerfilComparacion) -> EvaluadorDiferencias:
+    return EvaluadorDiferencias(
+        campos=perfil.campos,
+        umbrales=tuple(
+            round(perfil.tolerancias.get(campo, 0) * ESCALAS_TOLERANCIA.get(campo, 0)) for campo in perfil.campos
+        ),
+    )
+
+
+def valores_campos(columnas: ColumnasArchivo, filas, campos: Tuple[str, ...]) -> dict:
+    """
+    Valores de los campos comparados en las filas dadas; las fechas como enteros para
+    poder aplicar la tolerancia.
+    """
+    valores = {}
+    for campo in campos:
+        arreglo = columnas.valores(campo)[filas]
+        valores[campo] = arreglo.view("int64") if campo == "fecha" else arreglo
+    return valores
+
+
+@dataclass
+class ResultadoComparacion:
+    """
+    Una entrada por clave comparada: filas de cada archivo (-1 si no está), su categoría
+    y la máscara de los campos que difieren.
+    """
+    filas_1: Any  # ndarray int64
+    filas_2: Any  # ndarray int64
+    categoria: Any  # ndarray int8 (EXACTA, DIFERENCIA, SOLO_ARCHIVO_1, SOLO_ARCHIVO_2)
+    diferencias: Any  # ndarray uint8 con un bit por campo comparado
+    campos: Tuple[str, ...] = PERFIL_ESTANDAR.campos
+    totales: Any = None  # conteos por código de conteo ya calculados (p. ej. por fragmento)
+
+    def __len__(self):
+        return len(self.categoria)
+
+    def etiquetas(self):
+        return _tabla_etiquetas(self.campos)[codigos_conteo(self.categoria, self.diferencias)]
+
+    def conteos(self):
+        import numpy as np
+
+        totales = self.totales
+        if totales is None:
+            totales = np.bincount(
+                codigos_conteo(self.categoria, self.diferencias),
+                minlength=CODIGO_DIFERENCIAS + 2 ** len(self.campos),
+            )
+        por_tipo = {
+            tipo: int(total) for tipo, total in zip(_tabla_etiquetas(self.campos), totales) if tipo is not None
+        }
+        presentes = [tipo for tipo, total in por_tipo.items() if total]
+        return {tipo: por_tipo[tipo] for tipo in tipos_coincidencia(self.campos, presentes)}
+
+
+def buscar(claves, otras):
+    """
+    Busca cada clave en `otras` (ordenadas) y devuelve la máscara de presencia y su posición.
+    """
+    import numpy as np
+
+    if len(otras) == 0:
+        return np.zeros(len(claves), dtype=bool), np.zeros(len(claves), dtype=np.int64)
+    posiciones = np.minimum(np.searchsorted(otras, claves), len(otras) - 1)
+    return otras[posiciones] == claves, posiciones
+
+
+def categorizar(pareja, valores1: dict, valores2: dict, evaluador: EvaluadorDiferencias):
+    """
+    Categoriza las claves del archivo 1. `pareja` es la posición de cada clave en las
+    claves del archivo 2 (-1 si no está); los valores están alineados con las claves.
+    Devuelve la categoría y la máscara de diferencias de cada clave.
+    """
+    import numpy as np
+
+    en_2 = pareja >= 0
+    posiciones = pareja[en_2]
+    diferencias = np.zeros(len(pareja), dtype=np.uint8)
+    diferencias[en_2] = evaluador.evaluar(
+        {campo: v[en_2] for campo, v in valores1.items()},
+        {campo: v[posiciones] for campo, v in valores2.items()},
+    )
+    categoria = np.full(len(pareja), SOLO_ARCHIVO_1, dtype=np.int8)
+    categoria[en_2] = np.where(diferencias[en_2] != 0, DIFERENCIA, EXACTA)
+    return categoria, diferencias
+
+
+def ensamblar(indice1: IndiceClaves, indice2: IndiceClaves, pareja, categoria, diferencias, en_1,
+              columnas1: ColumnasArchivo, columnas2: ColumnasArchivo,
+              perfil: PerfilComparacion) -> Optional[ResultadoComparacion]:
+    """
+    Arma el resultado en el orden de primera aparición. Devuelve None si alguna pareja
+    emparejada por hash tiene claves distintas (colisión de hash).
+    """
+    import numpy as np
+
+    en_2 = pareja >= 0
+    f1, f2 = indice1.ultima[en_2], indice2.ultima[pareja[en_2]]
+    for campo in perfil.claves:
+        if not np.array_equal(columnas1.valores(campo)[f1], columnas2.valores(campo)[f2]):
+            return None
+    filas_2 = np.full(len(pareja), -1, dtype=np.int64)
+    filas_2[en_2] = f2
+    orden1 = np.argsort(indice1.primera, kind="stable")
+
+    # Claves exclusivas del archivo 2
+    solo_2 = ~en_1
+    orden2 = np.argsort(indice2.primera[solo_2], kind="stable")
+    filas_solo_2 = indice2.ultima[solo_2][orden2]
+
+    return ResultadoComparacion(
+        filas_1=np.concatenate([indice1.ultima[orden1], np.full(len(filas_solo_2), -1, dtype=np.int64)]),
+        filas_2=np.concatenate([filas_2[orden1], filas_solo_2]),
+        categoria=np.concatenate([
+            categoria[orden1], np.full(len(filas_solo_2), SOLO_ARCHIVO_2, dtype=np.int8)
+        ]),
+        diferencias=np.concatenate([diferencias[orden1], np.zeros(len(filas_solo_2), dtype=np.uint8)]),
+        campos=perfil.campos,
+    )
+
+
+def _clasificar(indice1: IndiceClaves, indice2: IndiceClaves, columnas1: ColumnasArchivo,
+                columnas2: ColumnasArchivo, perfil: PerfilComparacion):
+    import numpy as np
+
+    en_2, posiciones = buscar(indice1.claves, indice2.claves)
+    pareja = np.where(en_2, posiciones, -1)
+    categoria, diferencias = categorizar(
+        pareja,
+        valores_campos(columnas1, indice1.ultima, perfil.campos),
+        valores_campos(columnas2, indice2.ultima, perfil.campos),
+        compilar(perfil),
+    )
+    en_1, _ = buscar(indice2.claves, indice1.claves)
+    return ensamblar(indice1, indice2, pareja, categoria, diferencias, en_1, columnas1, columnas2, perfil)
+
+
+def _codigos_exactos(columnas1: ColumnasArchivo, columnas2: ColumnasArchivo, claves: Tuple[str, ...]):
+    """
+    Códigos enteros exactos de las claves de ambos archivos, combinando campo a campo.
+    """
+    import numpy as np
+    import pandas as pd
+
+    codigos = None
+    for campo in claves:
+        codigos_campo, unicos = pd.factorize(np.concatenate([columnas1.valores(campo), columnas2.valores(campo)]))
+        # Se vuelve a factorizar para que los códigos combinados no crezcan con cada campo
+        codigos = codigos_campo if codigos is None else pd.factorize(codigos * len(unicos) + codigos_campo)[0]
+    return codigos
+
+
+def comparar_columnas(columnas1: ColumnasArchivo, columnas2: ColumnasArchivo,
+                      perfil: PerfilComparacion = PERFIL_ESTANDAR) -> ResultadoComparacion:
+    """
+    Clasifica las transacciones de dos archivos con operaciones vectorizadas sobre claves
+    enteras (ordenamiento y búsqueda binaria) según el perfil de comparación.
+
+    Usa los índices por hash de cada archivo, repartidos en fragmentos paralelos si el
+    tamaño lo justifica; ante una colisión, recurre a códigos exactos obtenidos al
+    factorizar las claves de ambos archivos juntos.
+    """
+    from app.services.comparacion_paralela import comparar_en_paralelo, numero_fragmentos
+
+    indice1, indice2 = columnas1.indice(perfil.claves), columnas2.indice(perfil.claves)
+    if indice1.exacto and indice2.exacto:
+        fragmentos = numero_fragmentos(len(columnas1) + len(columnas2))
+        if fragmentos > 1:
+            resultado = comparar_en_paralelo(columnas1, columnas2, fragmentos, perfil)
+        else:
+            resultado = _clasificar(indice1, indice2, columnas1, columnas2, perfil)
+        if resultado is not None:
+            return resultado
+
+    n1 = len(columnas1)
+    codigos = _codigos_exactos(columnas1, columnas2, perfil.claves)
+    valores1 = [columnas1.valores(campo) for campo in perfil.claves]
+    valores2 = [columnas2.valores(campo) for campo in perfil.claves]
+    return _clasificar(
+        indexar_claves(codigos[:n1], valores1),
+        indexar_claves(codigos[n1:], valores2),
+        columnas1, columnas2, perfil,
+    )
+
+
+def _montos(columnas: ColumnasArchivo, filas):
+    import numpy as np
+
+    presentes = filas >= 0
+    montos = np.full(len(filas), np.nan)
+    montos[presentes] = columnas.monto_centavos[filas[presentes]] / 100
+    return montos
+
+
+def _estados(columnas: ColumnasArchivo, filas):
+    import numpy as np
+
+    presentes = filas >= 0
+    estados = np.full(len(filas), None, dtype=object)
+    estados[presentes] = np.asarray(ESTADOS, dtype=object)[columnas.estado[filas[presentes]]]
+    return estados
+
+
+def _valores_archivo(columnas: ColumnasArchivo, filas, campo: str):
+    import numpy as np
+
+    presentes = filas >= 0
+    arreglo = columnas.valores(campo)
+    valores = np.full(len(filas), np.datetime64("NaT") if campo == "fecha" else None, dtype=arreglo.dtype)
+    valores[presentes] = arreglo[filas[presentes]]
+    return valores
+
+
+def construir_hojas(resultado: ResultadoComparacion, columnas1: ColumnasArchivo, columnas2: ColumnasArchivo):
+    """
+    Materializa el resultado como un DataFrame por hoja, omitiendo las hojas vacías. Los
+    campos descriptivos comparados por el perfil se muestran también del archivo 2.
+    """
+    import numpy as np
+    import pandas as pd
+
+    etiquetas = resultado.etiquetas()
+    comparados_archivo_2 = [
+        campo for campo in ("fecha", "cuenta_origen", "cuenta_destino") if campo in resultado.campos
+    ]
+    hojas = {}
+    for nombre, categorias in HOJAS:
+        seleccion = np.isin(resultado.categoria, categorias)
+        if not seleccion.any():
+            continue
+        filas_1, filas_2 = resultado.filas_1[seleccion], resultado.filas_2[seleccion]
+        # Los datos descriptivos vienen del archivo 1, salvo para los exclusivos del archivo 2
+        base, filas = (columnas2, filas_2) if categorias == (SOLO_ARCHIVO_2,) else (columnas1, filas_1)
+        hoja = {
+            "id_transaccion": base.id_transaccion[filas],
+            "fecha": base.fecha[filas],
+            "cuenta_origen": base.cuenta_origen[filas],
+            "cuenta_destino": base.cuenta_destino[filas],
+            "monto_archivo_1": _montos(columnas1, filas_1),
+            "monto_archivo_2": _montos(columnas2, filas_2),
+            "estado_archivo_1": _estados(columnas1, filas_1),
+            "estado_archivo_2": _estados(columnas2, filas_2),
+        }
+        for campo in comparados_archivo_2:
+            hoja[f"{campo}_archivo_2"] = _valores_archivo(columnas2, filas_2, campo)
+        hoja["tipo_coincidencia"] = etiquetas[seleccion]
+        hojas[nombre] = pd.DataFrame(hoja)
+    return hojas
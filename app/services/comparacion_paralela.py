@@ -0,0 +1,197 @@
+"""
+Comparación en paralelo por fragmentos.
+
+Las claves de emparejamiento son hashes uniformes y están ordenadas, así que dividir
+el espacio de hashes en rangos iguales reparte las claves en fragmentos contiguos de
+ambos archivos. Cada fragmento se clasifica en un proceso del pool leyendo y
+escribiendo arreglos en memoria compartida; solo viajan nombres y límites.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from app.core.config import settings
+from app.services.cache_columnar import ColumnasArchivo
+from app.services.comparacion_motor import (
+    CODIGO_DIFERENCIAS, SOLO_ARCHIVO_2, EvaluadorDiferencias, buscar, categorizar, codigos_conteo, compilar,
+    ensamblar, valores_campos,
+)
+from app.services.perfiles_comparacion import PerfilComparacion
+
+# numpy y pandas se importan dentro de las funciones para no cargarlos al iniciar la aplicación.
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def numero_fragmentos(filas: int) -> int:
+    """
+    Fragmentos a usar para comparar `filas` transacciones; 1 si no conviene paralelizar.
+    """
+    fragmentos = settings.COMPARACION_FRAGMENTOS or os.cpu_count() or 1
+    if fragmentos < 2 or filas < settings.COMPARACION_PARALELA_MIN_FILAS:
+        return 1
+    return fragmentos
+
+
+def _obtener_pool(procesos: int) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: el proceso principal tiene hilos y un event loop que no deben copiarse con fork
+            _pool = ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def cerrar_pool():
+    """
+    Detiene los procesos de comparación, si se iniciaron.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+class BloqueCompartido:
+    """
+    Varios arreglos de numpy contiguos en un único segmento de memoria compartida.
+    """
+
+    def __init__(self, arreglos: dict):
+        import numpy as np
+        from multiprocessing import shared_memory
+
+        campos, desplazamiento = {}, 0
+        for nombre, arreglo in arreglos.items():
+            campos[nombre] = (desplazamiento, arreglo.dtype.str, arreglo.shape)
+            # Alinear cada arreglo a 8 bytes
+            desplazamiento += -(-arreglo.nbytes // 8) * 8
+        self.shm = shared_memory.SharedMemory(create=True, size=max(desplazamiento, 8))
+        self.spec = (self.shm.name, campos)
+        for nombre, arreglo in arreglos.items():
+            self.arreglo(nombre)[...] = arreglo
+
+    def arreglo(self, nombre: str):
+        return _vista(self.shm, self.spec[1][nombre])
+
+    def cerrar(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _vista(shm, campo):
+    import numpy as np
+
+    desplazamiento, dtype, forma = campo
+    return np.ndarray(forma, dtype=dtype, buffer=shm.buf, offset=desplazamiento)
+
+
+def _clasificar_fragmento(spec, evaluador: EvaluadorDiferencias, inicio1: int, fin1: int, inicio2: int, fin2: int):
+    """
+    Clasifica un fragmento (se ejecuta en un proceso del pool). Escribe categorías,
+    diferencias, parejas y presencia en los arreglos compartidos y devuelve los conteos
+    del fragmento.
+    """
+    from multiprocessing import shared_memory
+
+    shm = shared_memory.SharedMemory(name=spec[0])
+    try:
+        return _clasificar_vistas(shm, spec[1], evaluador, inicio1, fin1, inicio2, fin2)
+    finally:
+        shm.close()
+
+
+def _clasificar_vistas(shm, campos, evaluador: EvaluadorDiferencias, inicio1, fin1, inicio2, fin2):
+    import numpy as np
+
+    v = {nombre: _vista(shm, campo) for nombre, campo in campos.items()}
+    claves1, claves2 = v["claves1"][inicio1:fin1], v["claves2"][inicio2:fin2]
+    en_2, posiciones = buscar(claves1, claves2)
+    pareja = np.where(en_2, posiciones, -1)
+    categoria, diferencias = categorizar(
+        pareja,
+        {campo: v[f"{campo}1"][inicio1:fin1] for campo in evaluador.campos},
+        {campo: v[f"{campo}2"][inicio2:fin2] for campo in evaluador.campos},
+        evaluador,
+    )
+    en_1, _ = buscar(claves2, claves1)
+
+    v["categoria1"][inicio1:fin1] = categoria
+    v["diferencias1"][inicio1:fin1] = diferencias
+    v["pareja1"][inicio1:fin1] = np.where(en_2, pareja + inicio2, -1)
+    v["en_1"][inicio2:fin2] = en_1
+
+    conteos = np.bincount(
+        codigos_conteo(categoria, diferencias), minlength=CODIGO_DIFERENCIAS + 2 ** len(evaluador.campos)
+    )
+    conteos[SOLO_ARCHIVO_2] = int((~en_1).sum())
+    return conteos
+
+
+def _valores_compartibles(valores1: dict, valores2: dict):
+    """
+    Convierte los campos de texto en códigos enteros comunes a ambos archivos, para
+    poder ubicarlos en memoria compartida.
+    """
+    import numpy as np
+    import pandas as pd
+
+    for campo in valores1:
+        if valores1[campo].dtype == object:
+            n1 = len(valores1[campo])
+            codigos, _ = pd.factorize(np.concatenate([valores1[campo], valores2[campo]]))
+            valores1[campo], valores2[campo] = codigos[:n1], codigos[n1:]
+    return valores1, valores2
+
+
+def comparar_en_paralelo(columnas1: ColumnasArchivo, columnas2: ColumnasArchivo, fragmentos: int,
+                         perfil: PerfilComparacion):
+    """
+    Compara dos archivos repartiendo el espacio de hashes en `fragmentos` procesos.
+    Devuelve None si detecta una colisión de hash.
+    """
+    import numpy as np
+
+    evaluador = compilar(perfil)
+    indice1, indice2 = columnas1.indice(perfil.claves), columnas2.indice(perfil.claves)
+    k1, k2 = len(indice1.claves), len(indice2.claves)
+    valores1, valores2 = _valores_compartibles(
+        valores_campos(columnas1, indice1.ultima, perfil.campos),
+        valores_campos(columnas2, indice2.ultima, perfil.campos),
+    )
+    bloque = BloqueCompartido({
+        "claves1": indice1.claves,
+        **{f"{campo}1": valores for campo, valores in valores1.items()},
+        "claves2": indice2.claves,
+        **{f"{campo}2": valores for campo, valores in valores2.items()},
+        "categoria1": np.zeros(k1, dtype=np.int8),
+        "diferencias1": np.zeros(k1, dtype=np.uint8),
+        "pareja1": np.zeros(k1, dtype=np.int64),
+        "en_1": np.zeros(k2, dtype=bool),
+    })
+    try:
+        limites = np.array([(2 ** 64 // fragmentos) * i for i in range(1, fragmentos)], dtype=np.uint64)
+        cortes1 = np.concatenate([[0], np.searchsorted(indice1.claves, limites), [k1]])
+        cortes2 = np.concatenate([[0], np.searchsorted(indice2.claves, limites), [k2]])
+        pool = _obtener_pool(fragmentos)
+        futuros = [
+            pool.submit(_clasificar_fragmento, bloque.spec, evaluador,
+                        int(cortes1[i]), int(cortes1[i + 1]), int(cortes2[i]), int(cortes2[i + 1]))
+            for i in range(fragmentos)
+        ]
+        totales = sum(futuro.result() for futuro in futuros)
+        pareja = bloque.arreglo("pareja1").copy()
+        categoria = bloque.arreglo("categoria1").copy()
+        diferencias = bloque.arreglo("diferencias1").copy()
+        en_1 = bloque.arreglo("en_1").copy()
+    finally:
+        bloque.cerrar()
+
+    resultado = ensamblar(indice1, indice2, pareja, categoria, diferencias, en_1, columnas1, columnas2, perfil)
+    if resultado is not None:
+        resultado.totales = totales
+    return resultado
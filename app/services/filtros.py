@@ -0,0 +1,86 @@
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+from app.models.transaccion import Transaccion
+from app.services.cache_columnar import ColumnasArchivo
+
+
+@dataclass(frozen=True)
+class FiltroComparacion:
+    """
+    Ventana de fechas (días completos, ambos extremos incluidos) y cuenta de origen o
+    destino que delimitan las transacciones a comparar.
+    """
+    fecha_desde: Optional[date] = None
+    fecha_hasta: Optional[date] = None
+    cuenta: Optional[str] = None
+
+    @property
+    def activo(self) -> bool:
+        return any(v is not None for v in (self.fecha_desde, self.fecha_hasta, self.cuenta))
+
+    @property
+    def _inicio(self) -> Optional[datetime]:
+        return datetime.combine(self.fecha_desde, time.min) if self.fecha_desde else None
+
+    @property
+    def _fin(self) -> Optional[datetime]:
+        # Límite exclusivo: el día siguiente a fecha_hasta
+        return datetime.combine(self.fecha_hasta + timedelta(days=1), time.min) if self.fecha_hasta else None
+
+    def condiciones(self):
+        """
+        Condiciones SQL del filtro; la ventana de fechas usa el índice (archivo_id, fecha).
+        """
+        condiciones = []
+        if self._inicio:
+            condiciones.append(Transaccion.fecha >= self._inicio)
+        if self._fin:
+            condiciones.append(Transaccion.fecha < self._fin)
+        if self.cuenta is not None:
+            condiciones.append((Transaccion.cuenta_origen == self.cuenta) | (Transaccion.cuenta_destino == self.cuenta))
+        return condiciones
+
+    def aplicar(self, columnas: ColumnasArchivo) -> ColumnasArchivo:
+        """
+        Aplica el filtro sobre columnas ya cargadas (por ejemplo, desde la caché).
+        """
+        import numpy as np
+
+        if not self.activo:
+            return columnas
+        mascara = np.ones(len(columnas), dtype=bool)
+        if self._inicio:
+            mascara &= columnas.fecha >= np.datetime64(self._inicio, "us")
+        if self._fin:
+            mascara &= columnas.fecha < np.datetime64(self._fin, "us")
+        if self.cuenta is not None:
+            mascara &= (columnas.cuenta_origen == self.cuenta) | (columnas.cuenta_destino == self.cuenta)
+        return ColumnasArchivo(
+            archivo_id=columnas.archivo_id,
+            id_transaccion=columnas.id_transaccion[mascara],
+            fecha=columnas.fecha[mascara],
+            cuenta_origen=columnas.cuenta_origen[mascara],
+            cuenta_destino=columnas.cuenta_destino[mascara],
+            monto_centavos=columnas.monto_centavos[mascara],
+            estado=columnas.estado[mascara],
+        )
+
+
+def filtro_comparacion(
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    cuenta: Optional[str] = None,
+) -> FiltroComparacion:
+    """
+    Dependencia con los parámetros opcionales de filtro de las comparaciones.
+    """
+    if fecha_desde and fecha_hasta and fecha_desde > fecha_hasta:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="fecha_desde no puede ser posterior a fecha_hasta"
+        )
+    return FiltroComparacion(fecha_desde, fecha_hasta, cuenta)
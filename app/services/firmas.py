@@ -0,0 +1,84 @@
+"""
+Firmas MinHash (bottom-k) de los IDs de transacción de cada archivo.
+
+La firma son los k hashes de 64 bits más chicos de los IDs distintos del archivo. Con
+dos firmas se estima el índice de Jaccard de sus conjuntos de IDs: de los k hashes más
+chicos de la unión, la fracción que aparece en ambas firmas. Si el archivo tiene menos
+de k IDs distintos la firma es el conjunto completo y la estimación es exacta.
+"""
+from typing import List, Optional
+
+# numpy y pandas se importan dentro de las funciones para no cargarlos al iniciar la aplicación.
+
+# Valor de relleno para firmas con menos de k hashes (mayor que cualquier hash real)
+_RELLENO = 2 ** 64 - 1
+
+
+def calcular_firma(ids, tamano: int) -> bytes:
+    """
+    Calcula la firma de los IDs (como texto) y la serializa como uint64 little-endian.
+    """
+    import numpy as np
+    import pandas as pd
+
+    hashes = np.unique(pd.util.hash_array(np.asarray(ids, dtype=object), categorize=False))
+    return hashes[:tamano].astype("<u8").tobytes()
+
+
+def combinar_firmas(firmas: List[bytes], tamano: int) -> bytes:
+    """
+    Firma de la unión de varios conjuntos de IDs a partir de sus firmas: los k hashes más
+    chicos de la unión están entre los k más chicos de alguno de los conjuntos.
+    """
+    import numpy as np
+
+    hashes = np.unique(np.concatenate([leer_firma(firma) for firma in firmas]))
+    return hashes[:tamano].astype("<u8").tobytes()
+
+
+def leer_firma(firma: bytes):
+    import numpy as np
+
+    return np.frombuffer(firma, dtype="<u8")
+
+
+def tamano_comun(firmas: List[bytes], ids_distintos: List[Optional[int]], tamano: int) -> int:
+    """
+    Tamaño de firma con el que se pueden comparar todas: una firma incompleta calculada
+    con un tamaño menor (antes de cambiar la configuración) obliga a truncar las demás.
+    """
+    incompletas = [
+        len(firma) // 8 for firma, distintos in zip(firmas, ids_distintos)
+        if distintos is None or len(firma) // 8 < distintos
+    ]
+    return min([tamano, *incompletas])
+
+
+def estimar_jaccard(firma: bytes, candidatas: List[bytes], tamano: int):
+    """
+    Estima el índice de Jaccard de una firma contra cada candidata, de forma vectorizada:
+    ordena cada par de firmas unidas, toma los `tamano` valores distintos más chicos y
+    cuenta los repetidos (presentes en ambas).
+    """
+    import numpy as np
+
+    if not candidatas:
+        return np.zeros(0)
+    matriz = np.full((len(candidatas) + 1, tamano), _RELLENO, dtype=np.uint64)
+    for fila, f in enumerate([firma, *candidatas]):
+        valores = leer_firma(f)[:tamano]
+        matriz[fila, :len(valores)] = valores
+
+    unidas = np.sort(np.concatenate([np.broadcast_to(matriz[0], matriz[1:].shape), matriz[1:]], axis=1), axis=1)
+    repetidos = unidas[:, 1:] == unidas[:, :-1]
+    distintos = np.concatenate([np.ones((len(unidas), 1), dtype=bool), ~repetidos], axis=1) & (unidas != _RELLENO)
+    en_union = distintos & (np.cumsum(distintos, axis=1) <= tamano)
+    comunes = (repetidos & en_union[:, :-1]).sum(axis=1)
+    return comunes / np.maximum(en_union.sum(axis=1), 1)
+
+
+def coincidencias_estimadas(jaccard: float, ids_1: int, ids_2: int) -> int:
+    """
+    IDs en común según el índice de Jaccard: |A ∩ B| = J (|A| + |B|) / (1 + J).
+    """
+    return int(round(jaccard * (ids_1 + ids_2) / (1 + jaccard)))
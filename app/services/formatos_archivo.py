@@ -0,0 +1,133 @@
+"""
+Formatos de archivo admitidos para la ingesta y lectura por partes de cada uno.
+
+- Excel (.xlsx, .xls): se parsean las hojas seleccionadas, en paralelo si son varias.
+- CSV y TSV (.csv, .tsv): se detectan la codificación y el separador con el inicio del
+  archivo y se leen por bloques de filas desde el archivo subido, sin cargarlo entero.
+  Todas las columnas se leen como texto para no perder ceros a la izquierda en IDs y
+  cuentas ni inferir tipos distintos en cada bloque.
+- Parquet (.parquet): se lee por lotes de registros con pyarrow, que ya vienen tipados.
+
+Cada formato produce partes (hoja, DataFrame, mapeo) que siguen el mismo camino de
+normalización, validación e inserción por lotes.
+"""
+import codecs
+import csv
+import os
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+from app.services.lectura_hojas import leer_hojas
+from app.services.validacion_archivo import HOJA_PREDETERMINADA, ArchivoInvalido, leer_muestra
+
+# pandas y pyarrow se importan dentro de las funciones para no cargarlos al iniciar la aplicación.
+
+FORMATOS = {
+    ".xlsx": "excel",
+    ".xls": "excel",
+    ".csv": "csv",
+    ".tsv": "tsv",
+    ".parquet": "parquet",
+}
+# Bytes del inicio del archivo con los que se detectan codificación y separador
+_BYTES_DETECCION = 64 * 1024
+_SEPARADORES = ",;|\t"
+
+
+def formato_archivo(nombre_archivo: str) -> Optional[str]:
+    """
+    Formato según la extensión del archivo, o None si no se admite.
+    """
+    return FORMATOS.get(os.path.splitext(nombre_archivo or "")[1].lower())
+
+
+def detectar_texto(fuente, formato: str) -> Tuple[str, str]:
+    """
+    Detecta la codificación (UTF-8, con o sin BOM, o Windows-1252) y el separador de un
+    archivo de texto a partir de su inicio. Deja el archivo al principio.
+    """
+    fuente.seek(0)
+    muestra = fuente.read(_BYTES_DETECCION)
+    fuente.seek(0)
+
+    if muestra.startswith(codecs.BOM_UTF8):
+        encoding = "utf-8-sig"
+    else:
+        try:
+            # final=False: la muestra puede cortar un carácter multibyte al final
+            codecs.getincrementaldecoder("utf-8")().decode(muestra, final=False)
+            encoding = "utf-8"
+        except UnicodeDecodeError:
+            encoding = "cp1252"
+
+    if formato == "tsv":
+        return encoding, "\t"
+    lineas = muestra.decode(encoding, errors="replace").splitlines()[:20]
+    try:
+        return encoding, csv.Sniffer().sniff("\n".join(lineas), delimiters=_SEPARADORES).delimiter
+    except csv.Error:
+        return encoding, ","
+
+
+def _leer_texto(fuente, formato: str, **kwargs):
+    import pandas as pd
+
+    encoding, separador = detectar_texto(fuente, formato)
+    return pd.read_csv(fuente, sep=separador, encoding=encoding, encoding_errors="replace", dtype=str, **kwargs)
+
+
+def leer_muestras(fuente, formato: str, filas: int, hojas=None) -> Dict[Union[int, str], object]:
+    """
+    Lee la cabecera y las primeras `filas` filas de cada hoja (o del archivo, si no es
+    Excel). `fuente` es el contenido para Excel y el archivo subido para los demás.
+    """
+    if formato == "excel":
+        return leer_muestra(fuente, filas, hojas)
+    if hojas:
+        raise ArchivoInvalido(["Solo se pueden elegir hojas en archivos Excel"])
+
+    try:
+        if formato == "parquet":
+            import pyarrow.parquet as pq
+
+            fuente.seek(0)
+            archivo = pq.ParquetFile(fuente)
+            lote = next(archivo.iter_batches(batch_size=filas), None)
+            df = lote.to_pandas() if lote is not None else archivo.schema_arrow.empty_table().to_pandas()
+        else:
+            df = _leer_texto(fuente, formato, nrows=filas)
+    except Exception as e:
+        raise ArchivoInvalido([f"No se pudo leer el archivo {formato.upper()}: {e}"]) from e
+    finally:
+        fuente.seek(0)
+    return {HOJA_PREDETERMINADA: df}
+
+
+def leer_partes(fuente, formato: str, mapeos: dict, tamano_bloque: int) -> Iterator[tuple]:
+    """
+    Genera las partes (hoja, DataFrame, mapeo) del archivo completo. Excel se parsea de una
+    vez (todas las hojas en paralelo); CSV, TSV y Parquet, por bloques de `tamano_bloque`
+    filas cuyo índice continúa el del bloque anterior, para numerar bien las filas.
+    """
+    if formato == "excel":
+        dfs = leer_hojas(fuente, list(mapeos))
+        for (hoja, mapped_columns), df in zip(mapeos.items(), dfs):
+            yield hoja, df, mapped_columns
+        return
+
+    mapped_columns = mapeos[HOJA_PREDETERMINADA]
+    fuente.seek(0)
+    if formato == "parquet":
+        import pandas as pd
+        import pyarrow.parquet as pq
+
+        inicio = 0
+        for lote in pq.ParquetFile(fuente).iter_batches(batch_size=tamano_bloque):
+            df = lote.to_pandas(split_blocks=True)
+            df.index = pd.RangeIndex(inicio, inicio + len(df))
+            inicio += len(df)
+            yield HOJA_PREDETERMINADA, df, mapped_columns
+        return
+
+    with _leer_texto(fuente, formato, chunksize=tamano_bloque) as bloques:
+        for df in bloques:
+            yield HOJA_PREDETERMINADA, df, mapped_columns
@@ -0,0 +1,106 @@
+"""
+Lectura en paralelo de las hojas de un libro Excel.
+
+Parsear una hoja con openpyxl es CPU puro y retiene el GIL, así que con varias hojas
+cada una se parsea en un proceso del pool: el libro se escribe una vez en un archivo
+temporal, a los procesos viajan su ruta y el nombre de la hoja, y vuelve el DataFrame.
+Con una sola hoja (o un solo proceso) se leen en el proceso actual abriendo el libro
+una vez.
+"""
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import suppress
+from typing import List, Optional, Union
+
+from app.core.config import settings
+
+# pandas se importa dentro de las funciones para no cargarlo al iniciar la aplicación.
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _procesos_configurados() -> int:
+    return settings.INGESTA_PROCESOS_HOJAS or os.cpu_count() or 1
+
+
+def numero_procesos(hojas: int) -> int:
+    """
+    Procesos a usar para parsear `hojas` hojas; 1 si no conviene paralelizar.
+    """
+    return max(1, min(_procesos_configurados(), hojas))
+
+
+def _obtener_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # El pool se comparte entre solicitudes: se dimensiona por la configuración,
+            # no por las hojas del primer libro
+            # spawn: el proceso principal tiene hilos y un event loop que no deben copiarse con fork
+            _pool = ProcessPoolExecutor(max_workers=_procesos_configurados(),
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def cerrar_pool():
+    """
+    Detiene los procesos de lectura de hojas, si se iniciaron.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def _leer_hoja(ruta: str, hoja: Union[int, str]):
+    """
+    Parsea una hoja completa del libro en `ruta` (se ejecuta en un proceso del pool).
+    """
+    import pandas as pd
+
+    return pd.read_excel(ruta, sheet_name=hoja)
+
+
+def leer_hojas(contents: bytes, hojas: List[Union[int, str]]) -> list:
+    """
+    Parsea las hojas indicadas y devuelve sus DataFrames en el mismo orden. Cada llamada
+    tiene a lo sumo `numero_procesos` hojas en el pool a la vez.
+    """
+    import pandas as pd
+
+    procesos = numero_procesos(len(hojas))
+    if procesos < 2:
+        leidas = pd.read_excel(io.BytesIO(contents), sheet_name=list(hojas))
+        return [leidas[hoja] for hoja in hojas]
+
+    descriptor, ruta = tempfile.mkstemp(suffix=".xlsx")
+    try:
+        with os.fdopen(descriptor, "wb") as f:
+            f.write(contents)
+
+        pool = _obtener_pool()
+        pendientes = list(enumerate(hojas))
+        futuros, resultados = {}, [None] * len(hojas)
+        try:
+            while pendientes or futuros:
+                while pendientes and len(futuros) < procesos:
+                    posicion, hoja = pendientes.pop(0)
+                    futuros[pool.submit(_leer_hoja, ruta, hoja)] = posicion
+                terminados, _ = wait(futuros, return_when=FIRST_COMPLETED)
+                for futuro in terminados:
+                    resultados[futuros.pop(futuro)] = futuro.result()
+        finally:
+            for futuro in futuros:
+                futuro.cancel()
+            # Las hojas en curso todavía leen el archivo temporal
+            wait(futuros)
+        return resultados
+    finally:
+        with suppress(FileNotFoundError):
+            os.remove(ruta)
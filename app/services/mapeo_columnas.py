@@ -0,0 +1,122 @@
+"""
+Mapeo de las columnas de un archivo a los campos de la transacción.
+
+Cada cabecera normalizada se identifica por su firma (sha256 de los nombres de columna
+ordenados). Al cargar un archivo el mapeo se busca primero en la caché del proceso, luego
+en los perfiles de mapeo registrados y, si no hay ninguno, se detecta con los alias
+conocidos. Así una cabecera conocida no repite la detección y una cabecera nueva se
+registra una vez como perfil en lugar de agregar alias al código.
+"""
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+
+# Alias conocidos de cada campo, en orden de preferencia
+ALIAS_COLUMNAS = {
+    'id_transaccion': ['id_transaccion', 'id', 'identificador', 'codigo'],
+    'fecha': ['fecha', 'date', 'fecha_transaccion'],
+    'cuenta_origen': ['cuenta_origen', 'origen', 'source', 'from'],
+    'cuenta_destino': ['cuenta_destino', 'destino', 'destination', 'to'],
+    'monto': ['monto', 'amount', 'valor', 'value'],
+    'estado': ['estado', 'status', 'state']
+}
+CAMPOS_MAPEO = tuple(ALIAS_COLUMNAS)
+
+# Cabeceras distintas que se recuerdan como máximo
+_MAX_ENTRADAS = 1024
+
+
+def normalizar_cabecera(columnas: Iterable) -> List[str]:
+    """
+    Normaliza los nombres de las columnas: minúsculas y sin espacios en los extremos.
+    """
+    return [str(col).lower().strip() for col in columnas]
+
+
+def firma_cabecera(columnas: Iterable[str]) -> str:
+    """
+    Firma de una cabecera ya normalizada. No depende del orden de las columnas porque
+    el mapeo se hace por nombre.
+    """
+    contenido = json.dumps(sorted(columnas), ensure_ascii=False)
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def detectar_mapeo(columnas: Iterable[str]) -> Dict[str, str]:
+    """
+    Detecta el mapeo con los alias conocidos.
+    """
+    presentes = set(columnas)
+    mapeo = {}
+    for campo, alias in ALIAS_COLUMNAS.items():
+        for col in alias:
+            if col in presentes:
+                mapeo[campo] = col
+                break
+
+        if campo not in mapeo:
+            raise ValueError(f"No se encontró columna para {campo}")
+    return mapeo
+
+
+def validar_mapeo(mapeo: Dict[str, str], columnas: Iterable[str]) -> Dict[str, str]:
+    """
+    Verifica que el mapeo cubra todos los campos con columnas de la cabecera y lo
+    devuelve con los nombres de columna normalizados.
+    """
+    faltantes = [campo for campo in CAMPOS_MAPEO if campo not in mapeo]
+    if faltantes:
+        raise ValueError(f"Faltan campos en el mapeo: {', '.join(faltantes)}")
+    desconocidos = [campo for campo in mapeo if campo not in CAMPOS_MAPEO]
+    if desconocidos:
+        raise ValueError(f"Campos no válidos en el mapeo: {', '.join(desconocidos)}")
+
+    presentes = set(columnas)
+    normalizado = {campo: normalizar_cabecera([col])[0] for campo, col in mapeo.items()}
+    ausentes = [col for col in normalizado.values() if col not in presentes]
+    if ausentes:
+        raise ValueError(f"Columnas del mapeo que no están en la cabecera: {', '.join(ausentes)}")
+    return {campo: normalizado[campo] for campo in CAMPOS_MAPEO}
+
+
+class CacheMapeos:
+    """
+    Caché en memoria de los mapeos por firma de cabecera. Las entradas vencen después
+    de `ttl` segundos para que cada proceso vea los perfiles registrados desde otro.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entradas: "OrderedDict[str, Tuple[float, Dict[str, str]]]" = OrderedDict()
+
+    def obtener(self, firma: str) -> Optional[Dict[str, str]]:
+        entrada = self._entradas.get(firma)
+        if entrada is None:
+            return None
+        vencimiento, mapeo = entrada
+        if time.monotonic() >= vencimiento:
+            del self._entradas[firma]
+            return None
+        self._entradas.move_to_end(firma)
+        return mapeo
+
+    def guardar(self, firma: str, mapeo: Dict[str, str]):
+        if self.ttl <= 0:
+            return
+        self._entradas[firma] = (time.monotonic() + self.ttl, mapeo)
+        self._entradas.move_to_end(firma)
+        while len(self._entradas) > _MAX_ENTRADAS:
+            self._entradas.popitem(last=False)
+
+    def invalidar(self, firma: str):
+        self._entradas.pop(firma, None)
+
+    def limpiar(self):
+        self._entradas.clear()
+
+
+cache_mapeos = CacheMapeos(settings.MAPEO_CACHE_TTL)
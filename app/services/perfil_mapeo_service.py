@@ -0,0 +1,87 @@
+from typing import Dict, List
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.perfil_mapeo import PerfilMapeo
+from app.schemas.perfil_mapeo import PerfilMapeoCreate
+from app.services.mapeo_columnas import (
+    cache_mapeos, detectar_mapeo, firma_cabecera, normalizar_cabecera, validar_mapeo,
+)
+
+
+class PerfilMapeoService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def resolver_mapeo(self, columnas: List[str]) -> Dict[str, str]:
+        """
+        Obtiene el mapeo de una cabecera normalizada: de la caché, del perfil registrado
+        con su firma o, si no hay ninguno, detectándolo con los alias conocidos.
+        """
+        firma = firma_cabecera(columnas)
+        mapeo = cache_mapeos.obtener(firma)
+        if mapeo is not None:
+            return mapeo
+
+        result = await self.db.execute(select(PerfilMapeo.mapeo).where(PerfilMapeo.firma_cabecera == firma))
+        mapeo = result.scalar_one_or_none()
+        if mapeo is None:
+            try:
+                mapeo = detectar_mapeo(columnas)
+            except ValueError as e:
+                raise ValueError(
+                    f"{e}. Registre un perfil de mapeo para la cabecera: {', '.join(columnas)}"
+                ) from e
+        cache_mapeos.guardar(firma, mapeo)
+        return mapeo
+
+    async def crear_perfil(self, datos: PerfilMapeoCreate) -> PerfilMapeo:
+        """
+        Registra un perfil de mapeo para la cabecera indicada.
+        """
+        columnas = normalizar_cabecera(datos.columnas)
+        mapeo = validar_mapeo(datos.mapeo, columnas)
+        firma = firma_cabecera(columnas)
+
+        result = await self.db.execute(
+            select(PerfilMapeo).where(or_(PerfilMapeo.nombre == datos.nombre, PerfilMapeo.firma_cabecera == firma))
+        )
+        existente = result.scalars().first()
+        if existente is not None:
+            if existente.nombre == datos.nombre:
+                raise ValueError(f"Ya existe un perfil de mapeo llamado {datos.nombre}")
+            raise ValueError(f"La cabecera ya tiene el perfil de mapeo {existente.nombre}")
+
+        perfil = PerfilMapeo(
+            nombre=datos.nombre,
+            procesador=datos.procesador,
+            firma_cabecera=firma,
+            columnas=columnas,
+            mapeo=mapeo,
+        )
+        self.db.add(perfil)
+        await self.db.commit()
+        await self.db.refresh(perfil)
+        # La cabecera pudo quedar en caché con el mapeo detectado por alias
+        cache_mapeos.invalidar(firma)
+        return perfil
+
+    async def get_perfiles(self) -> List[PerfilMapeo]:
+        """
+        Obtiene los perfiles de mapeo registrados.
+        """
+        result = await self.db.execute(select(PerfilMapeo).order_by(PerfilMapeo.nombre))
+        return result.scalars().all()
+
+    async def eliminar_perfil(self, perfil_id: int) -> bool:
+        """
+        Elimina un perfil de mapeo. Devuelve False si no existe.
+        """
+        perfil = await self.db.get(PerfilMapeo, perfil_id)
+        if perfil is None:
+            return False
+        await self.db.delete(perfil)
+        await self.db.commit()
+        cache_mapeos.invalidar(perfil.firma_cabecera)
+        return True
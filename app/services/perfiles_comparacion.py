@@ -0,0 +1,89 @@
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+# Campos que pueden formar la clave de emparejamiento y campos que se pueden comparar
+CAMPOS_CLAVE = ("id_transaccion", "fecha", "cuenta_origen", "cuenta_destino")
+CAMPOS_COMPARABLES = ("monto", "estado", "fecha", "cuenta_origen", "cuenta_destino")
+# Unidades de tolerancia: monto en la moneda del archivo, fecha en segundos
+CAMPOS_CON_TOLERANCIA = ("monto", "fecha")
+
+
+@dataclass(frozen=True)
+class PerfilComparacion:
+    """
+    Define cómo se emparejan y comparan las transacciones de dos archivos: los campos
+    que forman la clave, los campos comparados (en el orden en que se informan las
+    diferencias) y una tolerancia opcional por campo.
+    """
+    nombre: str
+    claves: Tuple[str, ...]
+    campos: Tuple[str, ...]
+    tolerancias: Dict[str, float] = field(default_factory=dict)
+
+    def __post_init__(self):
+        if not self.claves:
+            raise ValueError(f"El perfil {self.nombre} debe tener al menos un campo clave")
+        if not self.campos:
+            raise ValueError(f"El perfil {self.nombre} debe comparar al menos un campo")
+        for campo in self.claves:
+            if campo not in CAMPOS_CLAVE:
+                raise ValueError(f"Campo clave no válido en el perfil {self.nombre}: {campo}")
+        for campo in self.campos:
+            if campo not in CAMPOS_COMPARABLES:
+                raise ValueError(f"Campo comparado no válido en el perfil {self.nombre}: {campo}")
+            if campo in self.claves:
+                raise ValueError(f"El campo {campo} no puede ser clave y comparado a la vez en el perfil {self.nombre}")
+        if len(set(self.claves)) != len(self.claves) or len(set(self.campos)) != len(self.campos):
+            raise ValueError(f"El perfil {self.nombre} tiene campos repetidos")
+        for campo, tolerancia in self.tolerancias.items():
+            if campo not in self.campos or campo not in CAMPOS_CON_TOLERANCIA:
+                raise ValueError(f"Tolerancia no válida en el perfil {self.nombre}: {campo}")
+            if tolerancia < 0:
+                raise ValueError(f"La tolerancia de {campo} no puede ser negativa en el perfil {self.nombre}")
+
+    @property
+    def estandar(self) -> bool:
+        return self.nombre == PERFIL_ESTANDAR.nombre
+
+    @classmethod
+    def desde_config(cls, nombre: str, config: dict) -> "PerfilComparacion":
+        return cls(
+            nombre=nombre,
+            claves=tuple(config.get("claves", ())),
+            campos=tuple(config.get("campos", ())),
+            tolerancias=dict(config.get("tolerancias", {})),
+        )
+
+
+# Emparejamiento por ID de transacción comparando monto y estado
+PERFIL_ESTANDAR = PerfilComparacion("estandar", ("id_transaccion",), ("monto", "estado"))
+
+
+def cargar_perfiles(configuracion: dict) -> Dict[str, PerfilComparacion]:
+    """
+    Construye los perfiles disponibles: el estándar más los definidos en la configuración.
+    """
+    perfiles = {PERFIL_ESTANDAR.nombre: PERFIL_ESTANDAR}
+    for nombre, config in configuracion.items():
+        perfiles[nombre] = PerfilComparacion.desde_config(nombre, config)
+    return perfiles
+
+
+# Se validan al importar para que un perfil mal configurado impida iniciar la aplicación
+perfiles_comparacion = cargar_perfiles(settings.PERFILES_COMPARACION)
+
+
+def perfil_comparacion(perfil: str = PERFIL_ESTANDAR.nombre) -> PerfilComparacion:
+    """
+    Dependencia que resuelve el perfil de comparación por su nombre.
+    """
+    if perfil not in perfiles_comparacion:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Perfil de comparación no encontrado: {perfil}"
+        )
+    return perfiles_comparacion[perfil]
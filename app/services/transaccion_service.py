@@ -1,8 +1,12 @@
 from typing import List, Optional
-from sqlalchemy import select
+from sqlalchemy import String, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import undefer
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.models.archivo import Archivo
 from app.models.transaccion import Transaccion
+from app.schemas.transaccion import AparicionTransaccion, HistorialTransaccion
 
 
 class TransaccionService:
@@ -19,9 +23,9 @@ class TransaccionService:
 
     async def get_transaccion(self, transaccion_id: int) -> Optional[Transaccion]:
         """
-        Obtiene una transacción por su ID.
+        Obtiene una transacción por su ID, incluidas sus columnas adicionales.
         """
-        query = select(Transaccion).where(Transaccion.id == transaccion_id)
+        query = select(Transaccion).options(undefer(Transaccion.extra_data)).where(Transaccion.id == transaccion_id)
         result = await self.db.execute(query)
         return result.scalars().first()
 
@@ -31,4 +35,37 @@ class TransaccionService:
         """
         query = select(Transaccion).where(Transaccion.archivo_id == archivo_id)
         result = await self.db.execute(query)
-        return result.scalars().all() 
\ No newline at end of file
+        return result.scalars().all() 
+
+    async def get_historial(self, ids_transaccion: List[str]) -> List[HistorialTransaccion]:
+        """
+        Obtiene en qué archivos apareció cada ID de transacción, con su fecha, monto y estado.
+
+        Los IDs viajan como un único parámetro de tipo arreglo (`= ANY($1)`), así la consulta
+        es la misma para cualquier cantidad de IDs y se resuelve con el índice cubriente.
+        """
+        ids_transaccion = list(dict.fromkeys(ids_transaccion))
+        query = (
+            select(
+                Transaccion.id_transaccion, Transaccion.archivo_id, Archivo.nombre_archivo,
+                Transaccion.fecha, Transaccion.monto, Transaccion.estado,
+            )
+            .join(Archivo, Archivo.id == Transaccion.archivo_id)
+            .where(Transaccion.id_transaccion == any_(bindparam("ids", ids_transaccion, type_=ARRAY(String))))
+            .order_by(Transaccion.id_transaccion, Transaccion.fecha, Transaccion.archivo_id)
+        )
+        result = await self.db.execute(query)
+        
+        apariciones = {id_transaccion: [] for id_transaccion in ids_transaccion}
+        for fila in result:
+            apariciones[fila.id_transaccion].append(AparicionTransaccion(
+                archivo_id=fila.archivo_id,
+                nombre_archivo=fila.nombre_archivo,
+                fecha=fila.fecha,
+                monto=fila.monto,
+                estado=fila.estado,
+            ))
+        return [
+            HistorialTransaccion(id_transaccion=id_transaccion, apariciones=lista)
+            for id_transaccion, lista in apariciones.items()
+        ]
@@ -0,0 +1,153 @@
+"""
+Validación previa de los archivos de transacciones.
+
+Antes de parsear el libro completo se leen la cabecera y las primeras filas, se resuelve
+el mapeo de columnas y se verifican los formatos de fecha, monto y estado de la muestra.
+Un archivo mal formado se rechaza en milisegundos con el detalle de las columnas y filas
+con problemas, sin escribir nada en la base de datos.
+
+Durante la ingesta las mismas verificaciones se aplican a todas las filas y la política
+de filas inválidas decide si se rechaza el archivo, se omiten las filas o se guardan en
+cuarentena.
+"""
+import io
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from app.services.cache_columnar import ESTADOS
+
+# pandas se importa dentro de las funciones para no cargarlo al iniciar la aplicación.
+
+# Campos que no pueden quedar vacíos
+CAMPOS_OBLIGATORIOS = ("id_transaccion", "fecha", "monto", "estado")
+# Hoja que se carga si no se indica ninguna (la primera) y valor para cargar todas
+HOJA_PREDETERMINADA = 0
+TODAS_LAS_HOJAS = "*"
+# Qué hacer con las filas inválidas durante la ingesta
+POLITICAS_FILAS_INVALIDAS = ("rechazar", "omitir", "cuarentena")
+# Filas de ejemplo que se informan por error
+_MAX_FILAS_ERROR = 5
+
+
+class ArchivoInvalido(ValueError):
+    """
+    El archivo no se puede procesar. `errores` detalla cada problema encontrado.
+    """
+
+    def __init__(self, errores: List[str]):
+        self.errores = errores
+        super().__init__("; ".join(errores))
+
+
+def seleccionar_hojas(nombres: List[str], hojas: Optional[List[str]] = None) -> List[Union[int, str]]:
+    """
+    Hojas a cargar: la primera (por posición) si no se indica ninguna, todas con "*" o
+    las indicadas por nombre.
+    """
+    if not hojas:
+        return [HOJA_PREDETERMINADA]
+    if list(hojas) == [TODAS_LAS_HOJAS]:
+        return list(nombres)
+    faltantes = [hoja for hoja in hojas if hoja not in nombres]
+    if faltantes:
+        raise ArchivoInvalido([
+            f"Hojas no encontradas en el libro: {', '.join(faltantes)} (hojas: {', '.join(nombres)})"
+        ])
+    return list(dict.fromkeys(hojas))
+
+
+def leer_muestra(contents: bytes, filas: int, hojas: Optional[List[str]] = None) -> Dict[Union[int, str], Any]:
+    """
+    Lee la cabecera y las primeras `filas` filas de cada hoja seleccionada. pandas abre el
+    libro una sola vez con openpyxl en modo de solo lectura, así que no se cargan las
+    filas restantes.
+    """
+    import pandas as pd
+
+    try:
+        with pd.ExcelFile(io.BytesIO(contents)) as libro:
+            seleccion = seleccionar_hojas(libro.sheet_names, hojas)
+            return {hoja: libro.parse(hoja, nrows=filas) for hoja in seleccion}
+    except ArchivoInvalido:
+        raise
+    except Exception as e:
+        raise ArchivoInvalido([f"No se pudo leer el archivo Excel: {e}"]) from e
+
+
+def _filas(mascara) -> str:
+    # Número de fila en la hoja: la cabecera es la fila 1
+    filas = [str(i + 2) for i in mascara[mascara].index[:_MAX_FILAS_ERROR]]
+    if mascara.sum() > _MAX_FILAS_ERROR:
+        filas.append("...")
+    return ", ".join(filas)
+
+
+def validar_filas(df, mapped_columns: Dict[str, str]) -> List[Tuple[str, str, Any]]:
+    """
+    Calcula de forma vectorizada, para todas las filas, los campos obligatorios vacíos y
+    los formatos de fecha, monto y estado no válidos, con las mismas conversiones que la
+    ingesta. Devuelve (verificación, motivo, máscara de filas) de cada verificación que falla.
+    """
+    import pandas as pd
+
+    invalidas = []
+    vacios = {}
+    for campo in CAMPOS_OBLIGATORIOS:
+        col = mapped_columns[campo]
+        vacios[campo] = df[col].isna()
+        invalidas.append(("vacio", f"Valores vacíos en la columna '{col}' ({campo})", vacios[campo]))
+
+    col = mapped_columns['fecha']
+    fechas = pd.to_datetime(df[col], errors='coerce')
+    invalidas.append(('fecha', f"Fechas no válidas en la columna '{col}'", fechas.isna() & ~vacios['fecha']))
+
+    col = mapped_columns['monto']
+    montos = df[col].astype(str).str.replace('$', '', regex=False).str.replace(',', '', regex=False)
+    invalidas.append((
+        'monto', f"Montos no válidos en la columna '{col}'",
+        pd.to_numeric(montos, errors='coerce').isna() & ~vacios['monto'],
+    ))
+
+    col = mapped_columns['estado']
+    invalidas.append((
+        'estado', f"Estados no válidos en la columna '{col}'",
+        ~df[col].astype(str).isin(ESTADOS) & ~vacios['estado'],
+    ))
+    return [(verificacion, motivo, mascara) for verificacion, motivo, mascara in invalidas if mascara.any()]
+
+
+def resumir_errores(df, invalidas, mapped_columns: Dict[str, str]) -> List[str]:
+    """
+    Un mensaje por verificación con las primeras filas que fallan.
+    """
+    errores = []
+    for verificacion, motivo, mascara in invalidas:
+        if verificacion == 'estado':
+            col = mapped_columns['estado']
+            valores = ", ".join(sorted(df.loc[mascara, col].astype(str).unique())[:_MAX_FILAS_ERROR])
+            errores.append(f"{motivo} ({valores}), filas {_filas(mascara)}; se admiten {', '.join(ESTADOS)}")
+        else:
+            errores.append(f"{motivo}, filas {_filas(mascara)}")
+    return errores
+
+
+def motivos_filas(invalidas):
+    """
+    Máscara de las filas con algún error y los motivos de cada una, separados por "; ".
+    """
+    mascara = invalidas[0][2].copy()
+    for _, _, otra in invalidas[1:]:
+        mascara |= otra
+    motivos = None
+    for _, motivo, otra in invalidas:
+        # Solo se arman cadenas para las filas inválidas
+        actual = otra[mascara].map({True: motivo, False: ""})
+        motivos = actual if motivos is None else motivos.str.cat(actual, sep="; ")
+    return mascara, motivos.str.strip("; ").str.replace(r"(; )+", "; ", regex=True)
+
+
+def validar_muestra(df, mapped_columns: Dict[str, str]) -> List[str]:
+    """
+    Verifica una muestra de filas. Devuelve los errores encontrados.
+    """
+    df = df.reset_index(drop=True)
+    return resumir_errores(df, validar_filas(df, mapped_columns), mapped_columns)
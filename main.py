@@ -1,14 +1,41 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.api import api_router
 from app.core.config import settings
+from app.core.metricas import actualizar_metricas_pool, exportar_metricas, monitorear_event_loop
+from app.core.precalentamiento import precalentar_pool, precargar_modulos
+from app.db.session import engine
+from app.services import comparacion_paralela, lectura_hojas
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Monitorear el retraso del event loop mientras la aplicación esté activa
+    tareas = [asyncio.create_task(monitorear_event_loop(settings.METRICAS_INTERVALO_LAG))]
+
+    # Precalentar librerías pesadas y conexiones sin bloquear el arranque
+    if settings.PRECALENTAR_AL_INICIAR:
+        precargar_modulos()
+        tareas.append(asyncio.create_task(precalentar_pool(engine, settings.PRECALENTAR_CONEXIONES)))
+    try:
+        yield
+    finally:
+        for tarea in tareas:
+            tarea.cancel()
+        comparacion_paralela.cerrar_pool()
+        lectura_hojas.cerrar_pool()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description="API para análisis y comparación de transacciones bancarias",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Configurar CORS
@@ -25,8 +52,15 @@ app.add_middleware(
 async def health_check():
     return {"status": "ok"}
 
+# Endpoint de métricas en formato Prometheus
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    actualizar_metricas_pool(engine.pool)
+    contenido, content_type = exportar_metricas()
+    return Response(content=contenido, media_type=content_type)
+
 # Incluir rutas de la API
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,4 @@
+"""
+Este módulo contiene los benchmarks de rendimiento de CloseAI.
+Incluye un generador de estados de cuenta sintéticos y los scripts de medición.
+"""
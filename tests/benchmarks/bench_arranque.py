@@ -0,0 +1,66 @@
+"""
+Benchmark del tiempo de importación de la aplicación con `python -X importtime`.
+
+Uso:
+    python -m tests.benchmarks.bench_arranque --repeticiones 5 --presupuesto-ms 1000
+
+Termina con código 1 si la mediana supera el presupuesto o si se cargan
+librerías pesadas durante el arranque, para usarlo como control en CI.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+from app.core.precalentamiento import MODULOS_PESADOS
+
+RAIZ_PROYECTO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def medir_importacion(modulo="main"):
+    """
+    Importa el módulo en un intérprete nuevo y devuelve (tiempo acumulado en ms, módulos importados).
+    """
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=RAIZ_PROYECTO, capture_output=True, text=True, check=True,
+    )
+
+    tiempo_us = None
+    importados = set()
+    for linea in resultado.stderr.splitlines():
+        if not linea.startswith("import time:") or "|" not in linea:
+            continue
+        _, acumulado, nombre = linea.split("|")
+        nombre_limpio = nombre.strip()
+        importados.add(nombre_limpio.split(".")[0])
+        if nombre_limpio == modulo and nombre.startswith(" ") and not nombre.startswith("  "):
+            tiempo_us = int(acumulado)
+    return (tiempo_us or 0) / 1000, importados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mide el tiempo de arranque de la aplicación")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--presupuesto-ms", type=float, default=1000.0)
+    args = parser.parse_args()
+
+    # La primera importación calienta la caché de bytecode y no se cuenta
+    medir_importacion()
+    tiempos = []
+    for _ in range(args.repeticiones):
+        tiempo_ms, importados = medir_importacion()
+        tiempos.append(tiempo_ms)
+
+    mediana = statistics.median(tiempos)
+    pesados = sorted(set(MODULOS_PESADOS) & importados)
+    print(f"Importación de main: mediana={mediana:.1f}ms min={min(tiempos):.1f}ms max={max(tiempos):.1f}ms "
+          f"(presupuesto {args.presupuesto_ms:.0f}ms)")
+
+    if pesados:
+        print(f"Librerías pesadas cargadas al iniciar: {', '.join(pesados)}")
+        sys.exit(1)
+    if mediana > args.presupuesto_ms:
+        print("El tiempo de arranque supera el presupuesto")
+        sys.exit(1)
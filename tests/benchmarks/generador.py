@@ -0,0 +1,175 @@
+"""
+Generador reproducible de pares de estados de cuenta sintéticos.
+
+Produce dos DataFrames con un solapamiento controlado de IDs, tasas de
+discrepancia en monto y estado, IDs duplicados y formatos "sucios"
+(encabezados con mayúsculas y espacios, montos con símbolo de moneda y
+separador de miles, distintos formatos de fecha).
+"""
+import argparse
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Límite de filas de una hoja de Excel (incluye el encabezado)
+MAX_FILAS_EXCEL = 1_048_575
+
+# Formatos que la ingesta interpreta sin ambigüedad entre día y mes
+FORMATOS_FECHA = ['%Y-%m-%d', '%Y/%m/%d', '%Y-%m-%d %H:%M:%S']
+ESTADOS = np.array(['Exitosa', 'Fallida'])
+
+
+@dataclass
+class ParametrosGenerador:
+    filas: int = 10_000
+    solapamiento: float = 0.8
+    tasa_diferencia_monto: float = 0.02
+    tasa_diferencia_estado: float = 0.01
+    tasa_duplicados: float = 0.001
+    formatos_sucios: bool = True
+    semilla: int = 42
+
+
+def _ids(numeros):
+    return np.char.add('TX', np.char.zfill(numeros.astype(str), 10))
+
+
+def _cuentas(rng, n):
+    return np.char.zfill(rng.integers(0, 10**10, n).astype(str), 10)
+
+
+def _aplicar_duplicados(rng, ids, tasa):
+    """
+    Reemplaza una fracción de IDs por IDs ya existentes en el mismo archivo.
+    """
+    n_duplicados = int(len(ids) * tasa)
+    if n_duplicados == 0:
+        return ids
+    destinos = rng.choice(len(ids), n_duplicados, replace=False)
+    origenes = rng.integers(0, len(ids), n_duplicados)
+    ids = ids.copy()
+    ids[destinos] = ids[origenes]
+    return ids
+
+
+def _ensuciar(rng, df):
+    """
+    Aplica formatos heterogéneos a un DataFrame limpio.
+    """
+    # Formato de fecha único por archivo, como ocurre con cada procesador
+    formato_fecha = FORMATOS_FECHA[rng.integers(0, len(FORMATOS_FECHA))]
+    df['fecha'] = df['fecha'].dt.strftime(formato_fecha)
+
+    # Una fracción de montos con símbolo de moneda y separador de miles
+    montos = df['monto'].map('{:,.2f}'.format).to_numpy(dtype=object)
+    con_simbolo = rng.random(len(df)) < 0.3
+    montos[con_simbolo] = np.char.add('$', montos[con_simbolo].astype(str))
+    df['monto'] = montos
+
+    # Encabezados con mayúsculas y espacios
+    df.columns = [f" {col.upper()} " if i % 2 else col.title() for i, col in enumerate(df.columns)]
+    return df
+
+
+def generar_par(parametros: ParametrosGenerador):
+    """
+    Genera un par de estados de cuenta (archivo 1, archivo 2) de forma reproducible.
+    """
+    rng = np.random.default_rng(parametros.semilla)
+    n = parametros.filas
+    n_comunes = int(n * parametros.solapamiento)
+
+    # IDs: los comunes se comparten y el resto es exclusivo de cada archivo
+    numeros = rng.permutation(3 * n)
+    ids1 = _ids(numeros[:n])
+    ids2 = np.concatenate([ids1[:n_comunes], _ids(numeros[n:2 * n - n_comunes])])
+
+    fechas1 = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 31 * 24 * 3600, n), unit='s')
+    montos1 = np.round(rng.lognormal(6, 1.5, n), 2)
+    estados1 = ESTADOS[(rng.random(n) < 0.1).astype(int)]
+    origen1, destino1 = _cuentas(rng, n), _cuentas(rng, n)
+
+    df1 = pd.DataFrame({
+        'id_transaccion': _aplicar_duplicados(rng, ids1, parametros.tasa_duplicados),
+        'fecha': fechas1.floor('D'),
+        'cuenta_origen': origen1,
+        'cuenta_destino': destino1,
+        'monto': montos1,
+        'estado': estados1,
+    })
+
+    # El archivo 2 copia las transacciones comunes y agrega las exclusivas
+    n_exclusivas = n - n_comunes
+    montos2 = np.concatenate([montos1[:n_comunes], np.round(rng.lognormal(6, 1.5, n_exclusivas), 2)])
+    estados2 = np.concatenate([estados1[:n_comunes], ESTADOS[(rng.random(n_exclusivas) < 0.1).astype(int)]])
+
+    # Discrepancias controladas sobre las transacciones comunes
+    dif_monto = rng.random(n_comunes) < parametros.tasa_diferencia_monto
+    montos2[:n_comunes][dif_monto] = np.round(montos2[:n_comunes][dif_monto] * rng.uniform(0.5, 1.5, dif_monto.sum()), 2)
+    dif_estado = rng.random(n_comunes) < parametros.tasa_diferencia_estado
+    estados2[:n_comunes][dif_estado] = np.where(estados2[:n_comunes][dif_estado] == 'Exitosa', 'Fallida', 'Exitosa')
+
+    df2 = pd.DataFrame({
+        'id_transaccion': _aplicar_duplicados(rng, ids2, parametros.tasa_duplicados),
+        'fecha': np.concatenate([fechas1[:n_comunes], fechas1[rng.integers(0, n, n_exclusivas)]]),
+        'cuenta_origen': np.concatenate([origen1[:n_comunes], _cuentas(rng, n_exclusivas)]),
+        'cuenta_destino': np.concatenate([destino1[:n_comunes], _cuentas(rng, n_exclusivas)]),
+        'monto': montos2,
+        'estado': estados2,
+    })
+    df2['fecha'] = pd.to_datetime(df2['fecha']).dt.floor('D')
+
+    # Mezclar el orden de las filas del archivo 2
+    df2 = df2.iloc[rng.permutation(n)].reset_index(drop=True)
+
+    if parametros.formatos_sucios:
+        df1 = _ensuciar(rng, df1)
+        df2 = _ensuciar(rng, df2)
+
+    return df1, df2
+
+
+def guardar(df, ruta):
+    """
+    Guarda un DataFrame en Excel o CSV según la extensión de la ruta.
+    """
+    if ruta.endswith('.csv'):
+        df.to_csv(ruta, index=False)
+    elif ruta.endswith('.xlsx'):
+        if len(df) > MAX_FILAS_EXCEL:
+            raise ValueError(f"Excel admite como máximo {MAX_FILAS_EXCEL} filas por hoja ({len(df)} solicitadas)")
+        df.to_excel(ruta, index=False)
+    else:
+        raise ValueError(f"Formato no soportado: {ruta}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera un par de estados de cuenta sintéticos")
+    parser.add_argument("--filas", type=int, default=10_000)
+    parser.add_argument("--solapamiento", type=float, default=0.8)
+    parser.add_argument("--tasa-diferencia-monto", type=float, default=0.02)
+    parser.add_argument("--tasa-diferencia-estado", type=float, default=0.01)
+    parser.add_argument("--tasa-duplicados", type=float, default=0.001)
+    parser.add_argument("--limpio", action="store_true", help="No aplicar formatos heterogéneos")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--formato", choices=["xlsx", "csv"], default="xlsx")
+    parser.add_argument("--directorio", default=os.path.join(os.path.dirname(__file__), "datos"))
+    args = parser.parse_args()
+
+    df1, df2 = generar_par(ParametrosGenerador(
+        filas=args.filas,
+        solapamiento=args.solapamiento,
+        tasa_diferencia_monto=args.tasa_diferencia_monto,
+        tasa_diferencia_estado=args.tasa_diferencia_estado,
+        tasa_duplicados=args.tasa_duplicados,
+        formatos_sucios=not args.limpio,
+        semilla=args.semilla,
+    ))
+
+    os.makedirs(args.directorio, exist_ok=True)
+    for i, df in enumerate((df1, df2), start=1):
+        ruta = os.path.join(args.directorio, f"estado_{args.filas}_{args.semilla}_{i}.{args.formato}")
+        guardar(df, ruta)
+        print(f"- {ruta}")
@@ -0,0 +1,327 @@
+"""
+Benchmarks de ingesta, comparación y exportación contra una base PostgreSQL local.
+
+Uso:
+    python -m tests.benchmarks.run_benchmarks --tamanos 10000,100000 --salida resultados.json
+    python -m tests.benchmarks.run_benchmarks --tamanos 10000 --comparar-con resultados_base.json
+
+Cada benchmark reporta filas por segundo, pico de memoria residente (RSS) y
+latencias p50/p95. Los resultados incluyen el commit actual para poder
+compararlos entre versiones.
+"""
+import argparse
+import asyncio
+import importlib.util
+import io
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+from fastapi import UploadFile
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.models.base import Base
+from app.models.transaccion import Transaccion
+from app.services.archivo_service import ArchivoService
+from app.services.cache_columnar import cache_columnar
+from app.services.comparacion_motor import comparar_columnas
+from app.services.comparacion_paralela import cerrar_pool as cerrar_pool_comparacion
+from tests.benchmarks.generador import MAX_FILAS_EXCEL, ParametrosGenerador, generar_par
+
+TAMANO_LOTE_CARGA = 10_000
+
+
+def _reiniciar_pico_memoria():
+    """
+    Reinicia el pico de RSS del proceso (solo Linux). Devuelve False si no es posible.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _pico_memoria_mb():
+    """
+    Devuelve el pico de RSS del proceso en MB.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for linea in f:
+                if linea.startswith("VmHWM:"):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if platform.system() == "Darwin" else pico / 1024
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    indice = min(int(round(p / 100 * (len(ordenados) - 1))), len(ordenados) - 1)
+    return ordenados[indice]
+
+
+async def medir(nombre, filas, funcion, repeticiones):
+    """
+    Ejecuta una función asíncrona varias veces y resume su rendimiento.
+    """
+    latencias = []
+    _reiniciar_pico_memoria()
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        await funcion()
+        latencias.append(time.perf_counter() - inicio)
+
+    p50 = statistics.median(latencias)
+    resultado = {
+        "benchmark": nombre,
+        "filas": filas,
+        "repeticiones": repeticiones,
+        "p50_s": round(p50, 4),
+        "p95_s": round(_percentil(latencias, 95), 4),
+        "filas_por_segundo": round(filas / p50) if p50 > 0 else None,
+        "pico_rss_mb": round(_pico_memoria_mb(), 1),
+    }
+    print(f"{nombre:<45} {filas:>10} filas  p50={resultado['p50_s']:>8.3f}s  "
+          f"p95={resultado['p95_s']:>8.3f}s  {resultado['filas_por_segundo'] or 0:>10} filas/s  "
+          f"RSS={resultado['pico_rss_mb']:>8.1f}MB")
+    return resultado
+
+
+async def cargar_directo(session_factory, nombre, df):
+    """
+    Carga un DataFrame en la base sin pasar por el pipeline de ingesta, para preparar comparaciones.
+    """
+    servicio = ArchivoService(None)
+    df = servicio._procesar_dataframe(servicio._normalizar_columnas(df.copy()))
+
+    async with session_factory() as session:
+        # Registra el archivo junto con su partición de transacciones
+        archivo = await ArchivoService(session)._registrar_archivo(nombre)
+
+        filas = [
+            {
+                "archivo_id": archivo.id,
+                "id_transaccion": str(id_transaccion),
+                "fecha": fecha.to_pydatetime(),
+                "cuenta_origen": str(origen),
+                "cuenta_destino": str(destino),
+                "monto": monto,
+                "estado": str(estado),
+            }
+            for id_transaccion, fecha, origen, destino, monto, estado in zip(
+                df["id_transaccion"], df["fecha"], df["cuenta_origen"],
+                df["cuenta_destino"], df["monto"], df["estado"],
+            )
+        ]
+        for inicio in range(0, len(filas), TAMANO_LOTE_CARGA):
+            await session.execute(insert(Transaccion), filas[inicio:inicio + TAMANO_LOTE_CARGA])
+        await session.commit()
+        return archivo.id
+
+
+def _upload_file(df, formato, nombre):
+    buffer = io.BytesIO()
+    if formato == "xlsx":
+        df.to_excel(buffer, index=False)
+    elif formato == "csv":
+        df.to_csv(buffer, index=False)
+    else:
+        df.to_parquet(buffer, index=False)
+    return buffer.getvalue(), nombre
+
+
+async def benchmarks_ingesta(session_factory, tamano, df, repeticiones):
+    resultados = []
+    for formato in ("xlsx", "csv", "parquet"):
+        nombre_benchmark = f"ingesta_{'excel' if formato == 'xlsx' else formato}"
+        if formato == "xlsx" and tamano > MAX_FILAS_EXCEL:
+            print(f"{nombre_benchmark:<45} {tamano:>10} filas  omitido: supera el límite de filas de Excel")
+            continue
+        if formato == "parquet" and importlib.util.find_spec("pyarrow") is None:
+            print(f"{nombre_benchmark:<45} {tamano:>10} filas  omitido: pyarrow no está instalado")
+            continue
+
+        contenido, nombre = _upload_file(df, formato, f"bench_{tamano}.{formato}")
+
+        async def ingestar(contenido=contenido, nombre=nombre):
+            async with session_factory() as session:
+                archivo = UploadFile(file=io.BytesIO(contenido), filename=nombre, size=len(contenido))
+                await ArchivoService(session).procesar_archivo(archivo)
+
+        resultados.append(await medir(nombre_benchmark, tamano, ingestar, repeticiones))
+    return resultados
+
+
+async def benchmarks_comparacion(session_factory, tamano, archivo_id_1, archivo_id_2, repeticiones, fragmentos):
+    metodos = {
+        "comparacion_coincidencias_exactas": "identificar_coincidencias_exactas",
+        "comparacion_discrepancias": "identificar_discrepancias",
+        "comparacion_transacciones_unicas": "identificar_transacciones_unicas",
+    }
+    resultados = []
+    for nombre, metodo in metodos.items():
+        async def comparar(metodo=metodo):
+            async with session_factory() as session:
+                await getattr(ArchivoService(session), metodo)(archivo_id_1, archivo_id_2)
+
+        resultados.append(await medir(nombre, 2 * tamano, comparar, repeticiones))
+
+    async def cargar_columnas():
+        async with session_factory() as session:
+            servicio = ArchivoService(session)
+            return [
+                await servicio._cargar_columnas(await servicio.get_resumen_archivo(archivo_id))
+                for archivo_id in (archivo_id_1, archivo_id_2)
+            ]
+
+    # Lectura de las columnas desde la base y desde la caché columnar
+    max_bytes = cache_columnar.max_bytes
+    try:
+        cache_columnar.max_bytes = 0
+        resultados.append(await medir("comparacion_columnas_base", 2 * tamano, cargar_columnas, repeticiones))
+        cache_columnar.max_bytes = 2 ** 62
+        columnas1, columnas2 = await cargar_columnas()
+        resultados.append(await medir("comparacion_columnas_cache", 2 * tamano, cargar_columnas, repeticiones))
+    finally:
+        cache_columnar.limpiar()
+        cache_columnar.max_bytes = max_bytes
+
+    # Clasificación en memoria: en el proceso actual y repartida en fragmentos paralelos
+    async def clasificar():
+        comparar_columnas(columnas1, columnas2)
+
+    configuracion = (settings.COMPARACION_FRAGMENTOS, settings.COMPARACION_PARALELA_MIN_FILAS)
+    try:
+        settings.COMPARACION_FRAGMENTOS = 1
+        resultados.append(await medir("comparacion_kernel", 2 * tamano, clasificar, repeticiones))
+        settings.COMPARACION_FRAGMENTOS = fragmentos or os.cpu_count() or 1
+        settings.COMPARACION_PARALELA_MIN_FILAS = 0
+        if settings.COMPARACION_FRAGMENTOS > 1:
+            # La primera comparación inicia los procesos del pool; no se mide
+            comparar_columnas(columnas1, columnas2)
+            resultados.append(await medir(
+                f"comparacion_kernel_{settings.COMPARACION_FRAGMENTOS}_fragmentos", 2 * tamano, clasificar, repeticiones
+            ))
+    finally:
+        settings.COMPARACION_FRAGMENTOS, settings.COMPARACION_PARALELA_MIN_FILAS = configuracion
+        cerrar_pool_comparacion()
+    return resultados
+
+
+async def benchmarks_exportacion(session_factory, tamano, archivo_id_1, archivo_id_2, repeticiones):
+    formatos = {
+        "exportacion_excel": "comparar_archivos_excel",
+    }
+    resultados = []
+    for nombre, metodo in formatos.items():
+        async def exportar(metodo=metodo):
+            async with session_factory() as session:
+                respuesta = await getattr(ArchivoService(session), metodo)(archivo_id_1, archivo_id_2)
+                # Consumir el cuerpo para incluir la serialización completa
+                async for _ in respuesta.body_iterator:
+                    pass
+
+        resultados.append(await medir(nombre, 2 * tamano, exportar, repeticiones))
+    return resultados
+
+
+def _commit_actual():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar_con(resultados, ruta_base):
+    """
+    Imprime la variación de p50 y filas/s respecto a un archivo de resultados anterior.
+    """
+    with open(ruta_base) as f:
+        base = json.load(f)
+    indice = {(r["benchmark"], r["filas"]): r for r in base["resultados"]}
+    print(f"\nComparación con {base.get('commit')} ({ruta_base}):")
+    for r in resultados:
+        anterior = indice.get((r["benchmark"], r["filas"]))
+        if not anterior:
+            continue
+        variacion = (r["p50_s"] - anterior["p50_s"]) / anterior["p50_s"] * 100 if anterior["p50_s"] else 0
+        print(f"{r['benchmark']:<45} {r['filas']:>10} filas  p50 {anterior['p50_s']:.3f}s -> {r['p50_s']:.3f}s ({variacion:+.1f}%)")
+
+
+async def main(args):
+    engine = create_async_engine(args.database_uri)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    suites = set(args.suites.split(","))
+    resultados = []
+    for tamano in [int(t) for t in args.tamanos.split(",")]:
+        df1, df2 = generar_par(ParametrosGenerador(
+            filas=tamano,
+            solapamiento=args.solapamiento,
+            tasa_diferencia_monto=args.tasa_diferencia_monto,
+            tasa_diferencia_estado=args.tasa_diferencia_estado,
+            tasa_duplicados=args.tasa_duplicados,
+            semilla=args.semilla,
+        ))
+
+        if "ingesta" in suites:
+            resultados += await benchmarks_ingesta(session_factory, tamano, df1, args.repeticiones)
+
+        if suites & {"comparacion", "exportacion"}:
+            archivo_id_1 = await cargar_directo(session_factory, f"bench_{tamano}_1", df1)
+            archivo_id_2 = await cargar_directo(session_factory, f"bench_{tamano}_2", df2)
+            if "comparacion" in suites:
+                resultados += await benchmarks_comparacion(
+                    session_factory, tamano, archivo_id_1, archivo_id_2, args.repeticiones, args.fragmentos
+                )
+            if "exportacion" in suites:
+                resultados += await benchmarks_exportacion(session_factory, tamano, archivo_id_1, archivo_id_2, args.repeticiones)
+
+    await engine.dispose()
+
+    reporte = {
+        "commit": _commit_actual(),
+        "fecha": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "parametros": {k: v for k, v in vars(args).items() if k not in ("database_uri", "salida", "comparar_con")},
+        "resultados": resultados,
+    }
+    if args.salida:
+        with open(args.salida, "w") as f:
+            json.dump(reporte, f, indent=2)
+        print(f"\nResultados guardados en {args.salida}")
+    if args.comparar_con:
+        comparar_con(resultados, args.comparar_con)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks de rendimiento de CloseAI")
+    parser.add_argument("--tamanos", default="10000", help="Tamaños separados por coma (filas por archivo)")
+    parser.add_argument("--suites", default="ingesta,comparacion,exportacion")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--solapamiento", type=float, default=0.8)
+    parser.add_argument("--tasa-diferencia-monto", type=float, default=0.02)
+    parser.add_argument("--tasa-diferencia-estado", type=float, default=0.01)
+    parser.add_argument("--tasa-duplicados", type=float, default=0.001)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--fragmentos", type=int, default=0,
+                        help="Fragmentos de la comparación paralela (por defecto uno por CPU)")
+    parser.add_argument("--database-uri", default=os.getenv("BENCH_DATABASE_URI", str(settings.DATABASE_URI)))
+    parser.add_argument("--salida", help="Ruta del JSON de resultados")
+    parser.add_argument("--comparar-con", help="JSON de resultados de otro commit para comparar")
+    asyncio.run(main(parser.parse_args()))
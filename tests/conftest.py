@@ -55,6 +55,7 @@ async def create_test_data(db_session):
     """
     Crear datos de prueba en la base de datos.
     """
+    from app.db.particiones import crear_particion
     from app.models.archivo import Archivo
     from app.models.transaccion import Transaccion
     from datetime import datetime
@@ -67,6 +68,9 @@ async def create_test_data(db_session):
     db_session.add(archivo1)
     db_session.add(archivo2)
     await db_session.flush()
+    # Sin partición por defecto, cada archivo necesita su partición antes de sus transacciones
+    for archivo in (archivo1, archivo2):
+        await crear_particion(db_session, archivo.id)
     
     # Crear transacciones para el archivo 1
     transacciones_archivo1 = [
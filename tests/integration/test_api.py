@@ -60,4 +60,15 @@ def test_upload_file_endpoint():
     
     # Si es un error 500, no verificamos el contenido de la respuesta
     if response.status_code != 500:
-        assert "detail" in response.json()  # Debe contener un mensaje de error 
\ No newline at end of file
+        assert "detail" in response.json()  # Debe contener un mensaje de error
+
+
+def test_metrics_endpoint():
+    """
+    Prueba que el endpoint de métricas exponga el formato de Prometheus.
+    """
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert "text/plain" in response.headers["content-type"]
+    assert "closeai_etapa_duracion_segundos" in response.text
+    assert 'closeai_db_pool_conexiones{estado="en_uso"}' in response.text
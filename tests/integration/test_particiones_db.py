@@ -0,0 +1,27 @@
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import func, insert, select, text
+
+from app.models.archivo import Archivo
+from app.models.transaccion import Transaccion
+from app.services.archivo_service import ArchivoService
+
+
+# Prueba para verificar que un archivo se elimina con su partición en un esquema creado con create_all
+@pytest.mark.asyncio
+async def test_eliminar_archivo_esquema_create_all(db_session):
+    servicio = ArchivoService(db_session)
+    archivo = await servicio._registrar_archivo("enero.csv")
+    await db_session.execute(insert(Transaccion), [{
+        "archivo_id": archivo.id, "id_transaccion": "T1", "fecha": datetime(2023, 1, 1),
+        "cuenta_origen": "1", "cuenta_destino": "2", "monto": Decimal("10.00"), "estado": "Exitosa",
+    }])
+    await db_session.commit()
+
+    assert await servicio.eliminar_archivo(archivo.id)
+
+    particion = await db_session.execute(text("SELECT to_regclass(:particion)"), {"particion": f"transacciones_p{archivo.id}"})
+    assert particion.scalar() is None
+    archivos = await db_session.execute(select(func.count()).select_from(Archivo))
+    assert archivos.scalar() == 0
@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+
+from app.core.admision import ControlAdmision, PresupuestoMemoria, estimar_memoria_comparacion
+from app.core.config import settings
+
+
+@pytest.fixture
+def control():
+    return ControlAdmision("prueba", max_concurrencia=1, max_cola=1, presupuesto=PresupuestoMemoria(1000))
+
+
+# Prueba para verificar que se respeta el límite de concurrencia
+@pytest.mark.asyncio
+async def test_admision_limita_concurrencia(control):
+    activos = 0
+    maximo = 0
+
+    async def operacion():
+        nonlocal activos, maximo
+        async with control.admitir():
+            activos += 1
+            maximo = max(maximo, activos)
+            await asyncio.sleep(0.01)
+            activos -= 1
+
+    await asyncio.gather(operacion(), operacion())
+
+    assert maximo == 1
+
+
+# Prueba para verificar el rechazo con 429 cuando la cola está llena
+@pytest.mark.asyncio
+async def test_admision_cola_llena(control):
+    liberar = asyncio.Event()
+
+    async def ocupar():
+        async with control.admitir():
+            await liberar.wait()
+
+    async def esperar():
+        async with control.admitir():
+            pass
+
+    ocupante = asyncio.create_task(ocupar())
+    await asyncio.sleep(0)
+    en_cola = asyncio.create_task(esperar())
+    await asyncio.sleep(0)
+
+    with pytest.raises(HTTPException) as error:
+        async with control.admitir():
+            pass
+
+    assert error.value.status_code == 429
+    assert error.value.headers["Retry-After"] == str(settings.ADMISION_RETRY_AFTER)
+
+    liberar.set()
+    await asyncio.gather(ocupante, en_cola)
+
+
+# Prueba para verificar el rechazo con 503 cuando se agota la espera
+@pytest.mark.asyncio
+async def test_admision_timeout(control, monkeypatch):
+    monkeypatch.setattr(settings, "ADMISION_TIMEOUT_COLA", 0.01)
+
+    async with control.admitir():
+        with pytest.raises(HTTPException) as error:
+            async with control.admitir():
+                pass
+
+    assert error.value.status_code == 503
+    assert control.en_espera == 0
+
+
+# Prueba para verificar la admisión según la memoria estimada
+@pytest.mark.asyncio
+async def test_admision_memoria(control):
+    with pytest.raises(HTTPException) as error:
+        async with control.admitir(memoria_estimada=2000):
+            pass
+    assert error.value.status_code == 413
+
+    async with control.admitir(memoria_estimada=800):
+        assert control.presupuesto.reservado == 800
+    assert control.presupuesto.reservado == 0
+
+
+# Prueba para verificar que una solicitud que espera memoria no ocupa un lugar que otra más chica puede usar
+@pytest.mark.asyncio
+async def test_admision_espera_memoria_sin_ocupar_lugar():
+    control = ControlAdmision("prueba", max_concurrencia=2, max_cola=2, presupuesto=PresupuestoMemoria(1000))
+    liberar = asyncio.Event()
+
+    async def ocupar(memoria):
+        async with control.admitir(memoria):
+            await liberar.wait()
+
+    ocupante = asyncio.create_task(ocupar(800))
+    await asyncio.sleep(0)
+    grande = asyncio.create_task(ocupar(500))
+    await asyncio.sleep(0)
+
+    async with control.admitir(100):
+        assert control.presupuesto.reservado == 900
+
+    liberar.set()
+    await asyncio.gather(ocupante, grande)
+    assert control.presupuesto.reservado == 0
+
+
+# Prueba para verificar la estimación de memoria de una comparación por filas
+def test_estimar_memoria_comparacion():
+    assert estimar_memoria_comparacion(1000) == 1000 * settings.ADMISION_BYTES_POR_FILA_COMPARACION
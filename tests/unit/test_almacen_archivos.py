@@ -0,0 +1,112 @@
+import hashlib
+import io
+
+import pandas as pd
+import pytest
+from fastapi import UploadFile
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services import almacen_archivos
+from app.services.archivo_service import ArchivoService
+from app.services.formatos_archivo import HOJA_PREDETERMINADA, leer_partes
+
+DATOS = b"id,fecha,origen,destino,monto,estado\n" + b"T1,2023-01-01,1,2,10,Exitosa\n" * 10
+
+
+@pytest.fixture(autouse=True)
+def directorio(tmp_path):
+    with patch('app.services.almacen_archivos.settings.ALMACEN_DIRECTORIO', str(tmp_path)):
+        yield tmp_path
+
+
+# Prueba para verificar que un contenido se guarda una sola vez bajo su sha256
+def test_guardar_sin_duplicar(directorio):
+    fuente = io.BytesIO(DATOS)
+    fuente.seek(5)
+
+    sha256 = almacen_archivos.guardar(fuente)
+
+    assert sha256 == hashlib.sha256(DATOS).hexdigest()
+    assert fuente.tell() == 0
+    assert almacen_archivos.guardar(DATOS) == sha256
+    guardados = [ruta for ruta in directorio.rglob("*") if ruta.is_file()]
+    assert guardados == [directorio / sha256[:2] / sha256[2:4] / sha256]
+    assert guardados[0].read_bytes() == DATOS
+
+    almacen_archivos.eliminar(sha256)
+    assert not almacen_archivos.existe(sha256)
+
+
+# Prueba para verificar que CSV y Parquet se parsean desde el almacén mapeados en memoria
+@pytest.mark.parametrize("formato", ["csv", "parquet"])
+def test_abrir_y_leer(formato):
+    if formato == "parquet":
+        pytest.importorskip("pyarrow")
+        contenido = io.BytesIO()
+        pd.read_csv(io.BytesIO(DATOS), dtype=str).to_parquet(contenido, index=False)
+        contenido = contenido.getvalue()
+    else:
+        contenido = DATOS
+    sha256 = almacen_archivos.guardar(contenido)
+
+    with almacen_archivos.abrir(sha256, formato) as fuente:
+        partes = list(leer_partes(fuente, formato, {HOJA_PREDETERMINADA: {}}, 4))
+
+    assert [len(df) for _, df, _ in partes] == [4, 4, 2]
+    assert list(partes[-1][1].index) == [8, 9]
+    assert partes[0][1]["monto"].tolist() == ["10"] * 4
+
+
+def base_de_datos(archivos_con_original=0):
+    db = AsyncMock()
+    db.execute.return_value.scalar_one_or_none = MagicMock(return_value=None)
+    db.execute.return_value.scalar = MagicMock(return_value=archivos_con_original)
+    return db
+
+
+def sentencias(db):
+    return [str(c.args[0]) for c in db.execute.call_args_list]
+
+
+# Prueba para verificar que el original se borra con su bloqueo tomado y solo si nadie lo usa
+@pytest.mark.asyncio
+@pytest.mark.parametrize("archivos_con_original", [0, 1])
+async def test_eliminar_original_sin_uso(archivos_con_original):
+    sha256 = almacen_archivos.guardar(DATOS)
+    db = base_de_datos(archivos_con_original)
+
+    await ArchivoService(db)._eliminar_original_sin_uso(sha256)
+
+    assert "pg_advisory_xact_lock" in sentencias(db)[0]
+    assert "count" in sentencias(db)[1]
+    assert almacen_archivos.existe(sha256) == bool(archivos_con_original)
+    db.commit.assert_awaited_once()
+
+
+# Prueba para verificar que registrar un archivo restaura el original si se borró tras guardarlo
+@pytest.mark.asyncio
+async def test_registrar_archivo_restaura_original():
+    sha256 = almacen_archivos.guardar(DATOS)
+    almacen_archivos.eliminar(sha256)
+    db = base_de_datos()
+    db.add = MagicMock(side_effect=lambda archivo: setattr(archivo, 'id', 1))
+
+    with patch('app.services.archivo_service.crear_particion', AsyncMock()):
+        archivo = await ArchivoService(db)._registrar_archivo("enero.csv", sha256, {}, io.BytesIO(DATOS))
+
+    assert archivo.sha256 == sha256
+    assert almacen_archivos.existe(sha256)
+    assert "pg_advisory_xact_lock" in sentencias(db)[0]
+
+
+# Prueba para verificar que si falla el registro del archivo no queda su original huérfano
+@pytest.mark.asyncio
+async def test_procesar_archivo_falla_registro():
+    db = base_de_datos()
+    archivo = UploadFile(file=io.BytesIO(DATOS), filename="enero.csv", size=len(DATOS))
+
+    with patch.object(ArchivoService, '_registrar_archivo', AsyncMock(side_effect=RuntimeError("sin conexión"))), \
+            pytest.raises(RuntimeError):
+        await ArchivoService(db).procesar_archivo(archivo)
+
+    assert not almacen_archivos.existe(hashlib.sha256(DATOS).hexdigest())
@@ -1,4 +1,6 @@
+import asyncio
 import io
+import time
 import pytest
 import pandas as pd
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -8,7 +10,6 @@ from datetime import datetime
 
 from app.services.archivo_service import ArchivoService
 from app.models.archivo import Archivo
-from app.models.transaccion import Transaccion
 
 
 # Fixture para crear un servicio de archivo con una base de datos simulada
@@ -50,6 +51,14 @@ def sample_excel_file():
 async def test_procesar_archivo(archivo_service, sample_excel_file):
     # Configurar el comportamiento del mock de la base de datos
     archivo_service.db.flush = AsyncMock()
+    # Sin perfiles de mapeo registrados: el mapeo se detecta con los alias
+    resultado = MagicMock()
+    resultado.scalar_one_or_none.return_value = None
+    archivo_service.db.execute = AsyncMock(return_value=resultado)
+    # El archivo necesita un ID para crear su partición de transacciones
+    archivo_service.db.add = MagicMock(
+        side_effect=lambda obj: setattr(obj, 'id', 1) if isinstance(obj, Archivo) else None
+    )
     
     # Llamar al método a probar
     result = await archivo_service.procesar_archivo(sample_excel_file)
@@ -58,9 +67,67 @@ async def test_procesar_archivo(archivo_service, sample_excel_file):
     assert archivo_service.db.add.called
     assert archivo_service.db.flush.called
     
-    # Verificar que se agregaron transacciones a la base de datos
-    # El número de llamadas a add debe ser 4 (1 para el archivo + 3 para las transacciones)
-    assert archivo_service.db.add.call_count >= 4
+    # Verificar que las transacciones se insertaron en bloque, en una sola sentencia
+    inserciones = [c for c in archivo_service.db.execute.call_args_list
+                   if len(c.args) == 2 and c.args[0].table.name == 'transacciones']
+    assert len(inserciones) == 1
+    assert len(inserciones[0].args[1]) == result.total_transacciones
+
+
+# Prueba para verificar que un archivo mal formado se rechaza antes de escribir en la base
+@pytest.mark.asyncio
+async def test_procesar_archivo_invalido(archivo_service):
+    from app.services.validacion_archivo import ArchivoInvalido
+
+    df = pd.DataFrame({'id': ['T1'], 'fecha': ['2023-01-01'], 'monto': [1.0], 'estado': ['Exitosa']})
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    mock_file = MagicMock(spec=UploadFile)
+    mock_file.filename = "incompleto.xlsx"
+    mock_file.read = AsyncMock(return_value=buffer.getvalue())
+    resultado = MagicMock()
+    resultado.scalar_one_or_none.return_value = None
+    archivo_service.db.execute = AsyncMock(return_value=resultado)
+    archivo_service.db.add = MagicMock()
+
+    with pytest.raises(ArchivoInvalido, match="cuenta_origen"):
+        await archivo_service.procesar_archivo(mock_file)
+
+    assert not archivo_service.db.add.called
+    assert not archivo_service.db.commit.called
+
+
+# Prueba para verificar cada política de filas inválidas sobre el archivo completo
+@pytest.mark.parametrize("politica", ["rechazar", "omitir", "cuarentena"])
+def test_separar_filas_invalidas(politica):
+    from app.services.mapeo_columnas import detectar_mapeo
+    from app.services.validacion_archivo import ArchivoInvalido
+
+    df = pd.DataFrame({
+        'id': ['T1', 'T2', 'T3'],
+        'fecha': ['2023-01-01', '2023-01-02', '2023-01-03'],
+        'origen': ['1', '2', '3'],
+        'destino': ['4', '5', '6'],
+        'monto': [10.5, 'abc', 3],
+        'estado': ['Exitosa', 'Fallida', 'Exitosa'],
+    })
+    mapped_columns = detectar_mapeo(df.columns)
+
+    if politica == "rechazar":
+        with pytest.raises(ArchivoInvalido, match="Montos no válidos en la columna 'monto', filas 3"):
+            ArchivoService._separar_filas_invalidas(df, mapped_columns, politica)
+        return
+
+    validas, cuarentena = ArchivoService._separar_filas_invalidas(df, mapped_columns, politica)
+    assert validas['id'].tolist() == ['T1', 'T3']
+    assert len(cuarentena) == 1
+    assert cuarentena[0]['fila'] == 3
+    assert cuarentena[0]['motivos'] == "Montos no válidos en la columna 'monto'"
+    if politica == "cuarentena":
+        assert cuarentena[0]['datos']['monto'] == 'abc'
+        assert list(cuarentena[0]['datos']) == list(df.columns)
+    else:
+        assert cuarentena[0]['datos'] is None
 
 
 # Prueba para verificar la normalización de columnas
@@ -125,4 +192,173 @@ def test_setup_archivo_service_methods():
     
     # Verificar que los métodos son llamables
     assert callable(service._normalizar_columnas)
-    assert callable(service._procesar_dataframe) 
\ No newline at end of file
+    assert callable(service._procesar_dataframe)
+
+
+# Prueba para verificar el cálculo de estadísticas del archivo durante la ingesta
+def test_calcular_estadisticas(archivo_service):
+    df = pd.DataFrame({
+        'id': ['T1', 'T2', 'T2', 'T3'],
+        'fecha': pd.to_datetime(['2023-01-05', '2023-01-01', '2023-01-03', '2023-01-10']),
+        'origen': ['A', 'B', 'B', 'C'],
+        'destino': ['B', 'C', 'C', 'D'],
+        'monto': [Decimal('10.50'), Decimal('2.25'), Decimal('2.25'), Decimal('7.00')],
+        'estado': ['Exitosa', 'Fallida', 'Exitosa', 'Exitosa'],
+    })
+    mapped_columns = {
+        'id_transaccion': 'id', 'fecha': 'fecha', 'cuenta_origen': 'origen',
+        'cuenta_destino': 'destino', 'monto': 'monto', 'estado': 'estado',
+    }
+
+    estadisticas = archivo_service._calcular_estadisticas(df, mapped_columns)
+
+    assert estadisticas['total_transacciones'] == 4
+    assert estadisticas['ids_distintos'] == 3
+    assert estadisticas['monto_total'] == Decimal('22.00')
+    assert estadisticas['fecha_min'] == datetime(2023, 1, 1)
+    assert estadisticas['fecha_max'] == datetime(2023, 1, 10)
+    assert estadisticas['transacciones_exitosas'] == 3
+    assert estadisticas['transacciones_fallidas'] == 1
+    assert estadisticas['cuentas_distintas'] == 4
+    assert len(estadisticas['firma_ids']) == 3 * 8
+
+
+# Prueba para verificar que extra_data solo guarda las columnas no mapeadas, serializables a JSON
+def test_filas_transacciones_extra_data(archivo_service):
+    import numpy as np
+
+    df = pd.DataFrame({
+        'id': ['T1', 'T2'],
+        'fecha': pd.to_datetime(['2023-01-05', '2023-01-06']),
+        'origen': ['A', 'B'],
+        'destino': ['B', 'C'],
+        'monto': [Decimal('10.50'), Decimal('2.25')],
+        'estado': ['Exitosa', 'Fallida'],
+        'referencia': [101, 102],
+        'nota': ['urgente', np.nan],
+    })
+    mapped_columns = {
+        'id_transaccion': 'id', 'fecha': 'fecha', 'cuenta_origen': 'origen',
+        'cuenta_destino': 'destino', 'monto': 'monto', 'estado': 'estado',
+    }
+    filas = archivo_service._filas_transacciones(1, df, mapped_columns)
+
+    assert filas[0]['archivo_id'] == 1
+    assert filas[0]['extra_data'] == {'referencia': 101, 'nota': 'urgente'}
+    assert type(filas[0]['extra_data']['referencia']) is int
+    assert filas[1]['extra_data'] == {'referencia': 102, 'nota': None}
+    assert filas[1]['monto'] == Decimal('2.25')
+    assert type(filas[1]['fecha']) is datetime
+    filas = archivo_service._filas_transacciones(1, df[list(mapped_columns.values())], mapped_columns)
+    assert filas[1]['extra_data'] is None
+
+
+# Prueba para verificar que las celdas vacías de columnas extra de monto y fecha se guardan como null
+def test_valor_json_celdas_vacias(archivo_service):
+    df = pd.DataFrame({
+        'monto_comision': ['1.50', None],
+        'fecha_liquidacion': ['2023-01-05', None],
+    })
+
+    df = archivo_service._procesar_dataframe(df)
+    extra = [{col: ArchivoService._valor_json(val) for col, val in fila.items()} for _, fila in df.iterrows()]
+
+    assert extra[0] == {'monto_comision': 1.5, 'fecha_liquidacion': '2023-01-05T00:00:00'}
+    assert extra[1] == {'monto_comision': None, 'fecha_liquidacion': None}
+    assert ArchivoService._valor_json(Decimal('NaN')) is None
+    assert ArchivoService._valor_json(pd.NaT) is None
+
+
+# Prueba para verificar la estimación de solapamiento a partir de las estadísticas
+def test_estimar_solapamiento():
+    archivo1 = Archivo(id=1, ids_distintos=100, fecha_min=datetime(2023, 1, 1), fecha_max=datetime(2023, 1, 11))
+    archivo2 = Archivo(id=2, ids_distintos=40, fecha_min=datetime(2023, 1, 6), fecha_max=datetime(2023, 1, 21))
+
+    estimacion = ArchivoService._estimar_solapamiento(archivo1, archivo2)
+
+    # Rango común de 5 días: la mitad del archivo 1 (50 IDs) y un tercio del archivo 2 (~13 IDs)
+    assert estimacion['coincidencias_estimadas'] == 13
+    assert estimacion['coincidencias_maximas'] == 40
+    assert estimacion['solo_archivo_1_estimadas'] == 87
+    assert estimacion['solo_archivo_2_estimadas'] == 27
+
+
+# Prueba para verificar que el resumen de comparación se resuelve con una consulta agregada
+def test_consulta_resumen_comparacion():
+    from sqlalchemy.dialects import postgresql
+    
+    consulta = str(ArchivoService._consulta_resumen_comparacion(1, 2).compile(dialect=postgresql.dialect()))
+    
+    assert "DISTINCT ON (transacciones.id_transaccion)" in consulta
+    assert "FULL OUTER JOIN" in consulta
+    assert "GROUP BY comparacion.tipo_coincidencia" in consulta
+
+
+# Prueba para verificar que el resumen incluye todos los tipos de coincidencia
+@pytest.mark.asyncio
+async def test_resumen_comparacion_completa_tipos(archivo_service):
+    fila = MagicMock(
+        tipo_coincidencia="Diferencia en monto", cantidad=2,
+        monto_archivo_1=Decimal("10.00"), monto_archivo_2=Decimal("15.00"), diferencia_monto=Decimal("5.00"),
+    )
+    archivo_service.db.execute = AsyncMock(return_value=[fila])
+    
+    with patch.object(ArchivoService, "get_resumen_archivo", AsyncMock(return_value=Archivo(id=1))):
+        resumen = await archivo_service.resumen_comparacion(1, 2)
+    
+    tipos = {t.tipo_coincidencia: t for t in resumen.tipos}
+    assert len(tipos) == 5
+    assert tipos["Diferencia en monto"].cantidad == 2
+    assert tipos["Diferencia en monto"].diferencia_monto == Decimal("5.00")
+    assert tipos["Coincidencia exacta"].cantidad == 0
+
+
+# Prueba para verificar que la comparación por lote carga la referencia una sola vez
+@pytest.mark.asyncio
+async def test_comparar_lote(archivo_service):
+    from app.services.cache_columnar import construir_columnas
+    
+    def columnas(archivo, filtro=None):
+        filas = [
+            ("TXN001", datetime(2023, 1, 1), "1", "2", Decimal("10.00"), "Exitosa"),
+            ("TXN00%d" % (archivo.id + 1), datetime(2023, 1, 2), "1", "2", Decimal("5.00"), "Fallida"),
+        ]
+        return construir_columnas(archivo.id, filas)
+    
+    cargar = AsyncMock(side_effect=columnas)
+    with patch.object(ArchivoService, "get_resumen_archivo", AsyncMock(side_effect=lambda i: Archivo(id=i))), \
+            patch.object(ArchivoService, "_cargar_columnas", cargar):
+        lote = await archivo_service.comparar_lote(1, [2, 3, 2])
+    
+    assert [c.args[0].id for c in cargar.call_args_list] == [1, 2, 3]
+    assert [c.archivo_id for c in lote.comparaciones] == [2, 3]
+    assert lote.comparaciones[0].conteos["Coincidencia exacta"] == 1
+    assert lote.totales["Solo en Archivo 1"] == 2
+    assert lote.totales["Solo en Archivo 2"] == 2
+
+
+# Prueba para verificar que si falla la carga de un archivo del lote se esperan las comparaciones iniciadas
+@pytest.mark.asyncio
+async def test_comparar_lote_error_en_carga(archivo_service):
+    from app.services.cache_columnar import construir_columnas
+    
+    terminadas = []
+    
+    def comparar(referencia, columnas, perfil):
+        time.sleep(0.05)
+        terminadas.append(columnas)
+    
+    async def columnas(archivo, filtro=None):
+        if archivo.id == 3:
+            # La comparación del archivo 2 ya está en curso cuando falla la carga
+            await asyncio.sleep(0.01)
+            raise RuntimeError("sin conexión")
+        return construir_columnas(archivo.id, [("TXN001", datetime(2023, 1, 1), "1", "2", Decimal("10.00"), "Exitosa")])
+    
+    with patch.object(ArchivoService, "get_resumen_archivo", AsyncMock(side_effect=lambda i: Archivo(id=i))), \
+            patch.object(ArchivoService, "_cargar_columnas", AsyncMock(side_effect=columnas)), \
+            patch("app.services.archivo_service.comparar_columnas", comparar):
+        with pytest.raises(RuntimeError, match="sin conexión"):
+            await archivo_service.comparar_lote(1, [2, 3])
+    
+    assert len(terminadas) == 1
@@ -0,0 +1,29 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.core.precalentamiento import MODULOS_PESADOS, precalentar_pool
+from tests.benchmarks.bench_arranque import medir_importacion
+
+
+# Prueba para verificar que el arranque no importa las librerías pesadas
+def test_arranque_sin_librerias_pesadas():
+    _, importados = medir_importacion("main")
+
+    assert "main" in importados
+    assert not set(MODULOS_PESADOS) & importados
+
+
+# Prueba para verificar que el precalentamiento abre las conexiones solicitadas
+@pytest.mark.asyncio
+async def test_precalentar_pool():
+    conexion = AsyncMock()
+    contexto = MagicMock()
+    contexto.__aenter__ = AsyncMock(return_value=conexion)
+    contexto.__aexit__ = AsyncMock(return_value=False)
+    engine = MagicMock()
+    engine.connect.return_value = contexto
+
+    await precalentar_pool(engine, 3)
+
+    assert engine.connect.call_count == 3
+    assert conexion.execute.await_count == 3
@@ -0,0 +1,57 @@
+from datetime import datetime
+from decimal import Decimal
+
+from app.services.cache_columnar import CacheColumnar, construir_columnas
+
+
+def _columnas(archivo_id, n=3):
+    filas = [
+        (f"TXN{i:03d}", datetime(2023, 1, i + 1), "123456", "654321", Decimal("100.50") + i, "Exitosa" if i % 2 else "Fallida")
+        for i in range(n)
+    ]
+    return construir_columnas(archivo_id, filas)
+
+
+# Prueba para verificar que las columnas conservan los valores originales
+def test_construir_columnas():
+    columnas = _columnas(1)
+
+    assert len(columnas) == 3
+    assert columnas.monto_centavos.tolist() == [10050, 10150, 10250]
+    assert columnas.estado.tolist() == [1, 0, 1]
+    assert columnas.nbytes > 0
+
+    filas = list(columnas.filas())
+    assert filas[1].id_transaccion == "TXN001"
+    assert filas[1].fecha == datetime(2023, 1, 2)
+    assert filas[1].monto == Decimal("101.50")
+    assert filas[1].estado == "Exitosa"
+
+
+# Prueba para verificar el desalojo LRU por bytes y la validación de versión
+def test_cache_columnar_lru():
+    uno, dos, tres = _columnas(1), _columnas(2), _columnas(3)
+    cache = CacheColumnar(uno.nbytes + dos.nbytes)
+
+    cache.guardar(1, "v1", uno)
+    cache.guardar(2, "v1", dos)
+    assert cache.obtener(1, "v1") is uno
+    assert cache.obtener(1, "v2") is None
+
+    # El archivo 2 es el menos usado recientemente y se desaloja
+    cache.guardar(3, "v1", tres)
+    assert cache.obtener(2, "v1") is None
+    assert cache.obtener(1, "v1") is uno
+    assert cache.bytes_usados <= cache.max_bytes
+
+    cache.invalidar(1)
+    assert cache.obtener(1, "v1") is None
+
+
+# Prueba para verificar que la caché deshabilitada no guarda nada
+def test_cache_columnar_deshabilitada():
+    cache = CacheColumnar(0)
+    cache.guardar(1, "v1", _columnas(1))
+
+    assert cache.obtener(1, "v1") is None
+    assert cache.bytes_usados == 0
@@ -0,0 +1,155 @@
+import asyncio
+import io
+import time
+import pytest
+import pandas as pd
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi import Response, UploadFile
+
+from app.api.endpoints.archivos import _procesar_upload, reingerir_archivo
+from app.core.cancelacion import Cancelacion, OperacionCancelada, ejecutar_cancelable
+from app.models.archivo import Archivo
+from app.services import almacen_archivos
+from app.services.archivo_service import ArchivoService
+
+CSV = b"id_transaccion,fecha,cuenta_origen,cuenta_destino,monto,estado\nTXN001,2023-01-01,1,2,10,Exitosa\n"
+
+
+# Prueba para verificar que sin plazo ni solicitud la verificación no cancela
+def test_cancelacion_sin_plazo():
+    Cancelacion().verificar()
+
+
+# Prueba para verificar la cancelación por plazo vencido
+def test_cancelacion_por_plazo():
+    cancelacion = Cancelacion("prueba", plazo=0.000001)
+
+    with pytest.raises(OperacionCancelada) as error:
+        time.sleep(0.001)
+        cancelacion.verificar()
+
+    assert error.value.motivo == "plazo"
+    assert error.value.status_code == 504
+
+
+# Prueba para verificar que la desconexión del cliente interrumpe la tarea en curso
+@pytest.mark.asyncio
+async def test_ejecutar_cancelable_desconexion():
+    request = MagicMock()
+    request.is_disconnected = AsyncMock(side_effect=[False, True])
+    cancelacion = Cancelacion("prueba", request)
+    interrumpida = False
+
+    async def operacion_larga():
+        nonlocal interrumpida
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            interrumpida = True
+            raise
+
+    with pytest.raises(OperacionCancelada) as error:
+        await ejecutar_cancelable(operacion_larga(), cancelacion)
+
+    assert error.value.motivo == "desconexion"
+    assert error.value.status_code == 499
+    assert interrumpida
+
+
+# Prueba para verificar que se devuelve el resultado si no hay cancelación
+@pytest.mark.asyncio
+async def test_ejecutar_cancelable_resultado():
+    async def operacion():
+        return 42
+
+    assert await ejecutar_cancelable(operacion(), Cancelacion("prueba")) == 42
+
+
+# Prueba para verificar que una ingesta cancelada hace rollback sin commit
+@pytest.mark.asyncio
+async def test_procesar_archivo_cancelado_hace_rollback():
+    df = pd.DataFrame({
+        'id_transaccion': ['TXN001'],
+        'fecha': ['2023-01-01'],
+        'cuenta_origen': ['123456'],
+        'cuenta_destino': ['654321'],
+        'monto': [100.50],
+        'estado': ['Exitosa']
+    })
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    archivo = MagicMock(spec=UploadFile)
+    archivo.filename = "cancelado.xlsx"
+    archivo.read = AsyncMock(return_value=buffer.getvalue())
+
+    db = AsyncMock()
+    db.add = MagicMock(side_effect=lambda obj: setattr(obj, 'id', 1) if isinstance(obj, Archivo) else None)
+    # Sin perfiles de mapeo registrados: el mapeo se detecta con los alias
+    db.execute.return_value.scalar_one_or_none = MagicMock(return_value=None)
+    # La partición se elimina con una conexión propia en autocommit
+    conexion = AsyncMock()
+    conexion.execution_options = AsyncMock(return_value=conexion)
+    db.bind = MagicMock()
+    db.bind.connect.return_value.__aenter__.return_value = conexion
+    servicio = ArchivoService(db)
+    cancelacion = Cancelacion("ingesta")
+    cancelacion.cancelar("desconexion")
+
+    with pytest.raises(OperacionCancelada):
+        await servicio.procesar_archivo(archivo, cancelacion)
+
+    # Solo se registró el archivo; al cancelar se deshace y se elimina con su partición
+    assert servicio.db.rollback.await_count == 1
+    assert servicio.db.add.call_count == 1
+    sentencias = [str(llamada.args[0]) for llamada in conexion.execute.call_args_list]
+    assert "DROP TABLE transacciones_p1" in sentencias
+
+
+def base_de_datos():
+    db = AsyncMock()
+    db.add = MagicMock(side_effect=lambda obj: setattr(obj, 'id', 1) if isinstance(obj, Archivo) else None)
+    db.execute.return_value.scalar_one_or_none = MagicMock(return_value=None)
+    conexion = AsyncMock()
+    conexion.execution_options = AsyncMock(return_value=conexion)
+    db.bind = MagicMock()
+    db.bind.connect.return_value.__aenter__.return_value = conexion
+    return db
+
+
+def solicitud_desconectada():
+    # El cliente se desconecta mientras se parsea la primera parte
+    request = MagicMock()
+    request.headers = {}
+    request.is_disconnected = AsyncMock(side_effect=[False, True])
+    return request
+
+
+def partes_lentas(*args):
+    time.sleep(0.3)
+    yield from ()
+
+
+# Prueba para verificar que una carga cancelada mientras se parsea responde con el código de la cancelación
+@pytest.mark.asyncio
+async def test_upload_cancelado_durante_parseo(tmp_path):
+    archivo = UploadFile(file=io.BytesIO(CSV), filename="enero.csv", size=len(CSV))
+
+    with patch('app.services.archivo_service.leer_partes', partes_lentas), \
+            patch('app.services.almacen_archivos.settings.ALMACEN_DIRECTORIO', str(tmp_path)):
+        respuesta = await _procesar_upload(solicitud_desconectada(), Response(), archivo, None, [], False, base_de_datos())
+
+    assert respuesta.status_code == 499
+
+
+# Prueba para verificar que una reingesta cancelada mientras se parsea responde con el código de la cancelación
+@pytest.mark.asyncio
+async def test_reingesta_cancelada_durante_parseo(tmp_path):
+    with patch('app.services.almacen_archivos.settings.ALMACEN_DIRECTORIO', str(tmp_path)):
+        sha256 = almacen_archivos.guardar(CSV)
+        archivo = Archivo(id=1, nombre_archivo="enero.csv", sha256=sha256, opciones_ingesta={"formato": "csv"})
+
+        with patch('app.services.archivo_service.leer_partes', partes_lentas), \
+                patch.object(ArchivoService, 'get_resumen_archivo', AsyncMock(return_value=archivo)):
+            respuesta = await reingerir_archivo(solicitud_desconectada(), 1, None, base_de_datos())
+
+    assert respuesta.status_code == 499
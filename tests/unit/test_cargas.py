@@ -0,0 +1,141 @@
+import hashlib
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.models.carga import CargaArchivo
+from app.services.carga_service import CargaService, ConflictoCarga
+
+DATOS = b"id,fecha,origen,destino,monto,estado\n" + b"T1,2023-01-01,1,2,10,Exitosa\n" * 10
+
+
+async def contenido(datos: bytes, tamano: int = 7):
+    # Simula el cuerpo de la solicitud recibido en partes
+    for inicio in range(0, len(datos), tamano):
+        yield datos[inicio:inicio + tamano]
+
+
+@pytest.fixture
+def servicio(tmp_path):
+    carga = CargaArchivo(id="c1", nombre_archivo="enero.csv", tamano=len(DATOS), recibidos=0,
+                         sha256=hashlib.sha256(DATOS).hexdigest(), estado="recibiendo")
+    db = AsyncMock()
+    db.get = AsyncMock(return_value=carga)
+    db.execute.return_value = MagicMock(scalar_one=MagicMock(return_value=carga),
+                                        scalar_one_or_none=MagicMock(return_value=carga))
+    with patch('app.services.carga_service.settings.CARGAS_DIRECTORIO', str(tmp_path)):
+        (tmp_path / "c1.parte").write_bytes(b"")
+        yield CargaService(db), carga, tmp_path / "c1.parte"
+
+
+async def enviar(servicio, inicio, fin, datos=None, sha256=None):
+    datos = DATOS[inicio:fin + 1] if datos is None else datos
+    return await servicio.recibir_bloque("c1", inicio, fin, len(DATOS), contenido(datos), sha256)
+
+
+# Prueba para verificar que los bloques se agregan en orden y un bloque repetido no se vuelve a escribir
+@pytest.mark.asyncio
+async def test_recibir_bloques(servicio):
+    servicio, carga, ruta = servicio
+
+    await enviar(servicio, 0, 99, sha256=hashlib.sha256(DATOS[:100]).hexdigest())
+    await enviar(servicio, 0, 99)
+    assert carga.recibidos == 100
+
+    with pytest.raises(ConflictoCarga) as error:
+        await enviar(servicio, 200, 299)
+    assert error.value.recibidos == 100
+
+    await enviar(servicio, 100, len(DATOS) - 1)
+    assert carga.recibidos == len(DATOS)
+    assert ruta.read_bytes() == DATOS
+    assert list(ruta.parent.iterdir()) == [ruta]
+
+
+# Prueba para verificar que un bloque incompleto o con otro checksum no se agrega
+@pytest.mark.asyncio
+async def test_recibir_bloque_invalido(servicio):
+    servicio, carga, ruta = servicio
+
+    with pytest.raises(ValueError, match="sha256"):
+        await enviar(servicio, 0, 99, sha256="0" * 64)
+    with pytest.raises(ValueError, match="Se recibieron 50"):
+        await enviar(servicio, 0, 99, datos=DATOS[:50])
+    with pytest.raises(ValueError, match="Rango"):
+        await enviar(servicio, 99, 0)
+
+    assert carga.recibidos == 0
+    assert ruta.read_bytes() == b""
+
+
+# Prueba para verificar que se descartan los bytes que dejó un bloque interrumpido
+@pytest.mark.asyncio
+async def test_recibir_bloque_despues_de_corte(servicio):
+    servicio, carga, ruta = servicio
+    await enviar(servicio, 0, 99)
+    with open(ruta, "ab") as f:
+        f.write(b"basura")
+
+    await enviar(servicio, 100, len(DATOS) - 1)
+
+    assert ruta.read_bytes() == DATOS
+
+
+# Prueba para verificar la verificación de tamaño y sha256 al finalizar
+@pytest.mark.asyncio
+async def test_iniciar_ingesta(servicio):
+    servicio, carga, ruta = servicio
+    with pytest.raises(ConflictoCarga, match="Faltan"):
+        await servicio.iniciar_ingesta("c1")
+
+    await enviar(servicio, 0, len(DATOS) - 1)
+    carga.sha256 = "0" * 64
+    with pytest.raises(ValueError, match="sha256"):
+        await servicio.iniciar_ingesta("c1")
+    assert carga.estado == "recibiendo"
+
+    carga.sha256 = hashlib.sha256(DATOS).hexdigest()
+    assert await servicio.iniciar_ingesta("c1") is carga
+    assert carga.estado == "ingiriendo"
+    # Una segunda finalización simultánea no vuelve a ingerir la carga
+    with pytest.raises(ConflictoCarga, match="ingiriendo"):
+        await servicio.iniciar_ingesta("c1")
+
+
+# Prueba para verificar que una carga abandonada en ingesta admite otro intento
+@pytest.mark.asyncio
+async def test_iniciar_ingesta_abandonada(servicio):
+    servicio, carga, ruta = servicio
+    await enviar(servicio, 0, len(DATOS) - 1)
+    await servicio.iniciar_ingesta("c1")
+
+    # El proceso que ingería la carga se detuvo antes de terminarla
+    carga.fecha_actualizacion = datetime.utcnow() - timedelta(minutes=61)
+    with patch('app.services.carga_service.settings.CARGAS_INGESTA_PLAZO_MINUTOS', 60):
+        assert await servicio.iniciar_ingesta("c1") is carga
+
+    assert carga.estado == "ingiriendo"
+    assert carga.fecha_actualizacion > datetime.utcnow() - timedelta(minutes=1)
+
+
+# Prueba para verificar que una carga ingerida conserva su resultado sin sus bloques
+@pytest.mark.asyncio
+async def test_terminar_ingesta(servicio):
+    servicio, carga, ruta = servicio
+    await enviar(servicio, 0, len(DATOS) - 1)
+    await servicio.iniciar_ingesta("c1")
+
+    # Un archivo rechazado deja la carga lista para otro intento
+    await servicio.terminar_ingesta("c1", None)
+    assert carga.estado == "recibiendo"
+    assert ruta.exists()
+
+    await servicio.iniciar_ingesta("c1")
+    await servicio.terminar_ingesta("c1", {"archivo_id": 7, "filas_invalidas": 0})
+
+    assert carga.estado == "ingerida"
+    assert not ruta.exists()
+    assert (await servicio.iniciar_ingesta("c1")).resultado == {"archivo_id": 7, "filas_invalidas": 0}
+    # Reenviar un bloque de una carga ingerida no tiene efecto
+    await enviar(servicio, 0, 99)
+    assert not ruta.exists()
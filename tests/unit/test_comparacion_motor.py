@@ -0,0 +1,193 @@
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from app.services.cache_columnar import construir_columnas
+from app.services.comparacion_motor import comparar_columnas, construir_hojas
+from app.services.perfiles_comparacion import PERFIL_ESTANDAR, PerfilComparacion
+
+
+def _filas(ids, seed):
+    aleatorio = random.Random(seed)
+    return [
+        (
+            id_transaccion,
+            datetime(2023, 1, 1) + timedelta(days=aleatorio.randint(0, 30)),
+            str(aleatorio.randint(1, 5)),
+            str(aleatorio.randint(1, 5)),
+            Decimal(aleatorio.choice(["10.00", "10.50", "20.00"])),
+            aleatorio.choice(["Exitosa", "Fallida"]),
+        )
+        for id_transaccion in ids
+    ]
+
+
+CAMPOS = ("id_transaccion", "fecha", "cuenta_origen", "cuenta_destino", "monto", "estado")
+
+
+def _clasificar_con_diccionarios(filas1, filas2, perfil=PERFIL_ESTANDAR):
+    # Referencia: comparación recorriendo diccionarios por clave (la última ocurrencia gana)
+    def clave(fila):
+        return tuple(fila[CAMPOS.index(campo)] for campo in perfil.claves)
+
+    def difiere(campo, t1, t2):
+        a, b = t1[CAMPOS.index(campo)], t2[CAMPOS.index(campo)]
+        tolerancia = perfil.tolerancias.get(campo, 0)
+        if campo == "fecha":
+            return abs((a - b).total_seconds()) > tolerancia
+        if campo == "monto":
+            return abs(a - b) > Decimal(str(tolerancia))
+        return a != b
+
+    transacciones1 = {clave(f): f for f in filas1}
+    transacciones2 = {clave(f): f for f in filas2}
+    resultado = []
+    for k, t1 in transacciones1.items():
+        t2 = transacciones2.get(k)
+        if t2 is None:
+            resultado.append((k, "Solo en Archivo 1"))
+            continue
+        diferentes = [campo.replace("_", " ") for campo in perfil.campos if difiere(campo, t1, t2)]
+        if diferentes:
+            resultado.append((k, "Diferencia en " + ", ".join(diferentes)))
+        else:
+            resultado.append((k, "Coincidencia exacta"))
+    for k in transacciones2:
+        if k not in transacciones1:
+            resultado.append((k, "Solo en Archivo 2"))
+    return resultado
+
+
+def _clasificados(resultado, columnas1, columnas2, perfil=PERFIL_ESTANDAR):
+    claves = [
+        tuple((columnas1 if f1 >= 0 else columnas2).valores(campo)[f1 if f1 >= 0 else f2] for campo in perfil.claves)
+        for f1, f2 in zip(resultado.filas_1, resultado.filas_2)
+    ]
+    return list(zip(claves, resultado.etiquetas()))
+
+
+# Prueba para verificar que el motor vectorizado clasifica igual que la comparación por diccionarios
+def test_comparar_columnas_equivale_a_diccionarios():
+    aleatorio = random.Random(7)
+    ids1 = [f"TXN{aleatorio.randint(0, 300)}" for _ in range(400)]
+    ids2 = [f"TXN{aleatorio.randint(100, 400)}" for _ in range(400)]
+    filas1, filas2 = _filas(ids1, 1), _filas(ids2, 2)
+    columnas1, columnas2 = construir_columnas(1, filas1), construir_columnas(2, filas2)
+
+    resultado = comparar_columnas(columnas1, columnas2)
+
+    esperado = _clasificar_con_diccionarios(filas1, filas2)
+    assert _clasificados(resultado, columnas1, columnas2) == esperado
+    # Una fila que difiere en monto y estado informa ambos campos
+    assert any(tipo == "Diferencia en monto, estado" for _, tipo in esperado)
+    assert resultado.conteos()["Diferencia en monto, estado"] > 0
+
+
+# Prueba para verificar un perfil con clave compuesta, más campos comparados y tolerancias
+def test_comparar_columnas_con_perfil():
+    perfil = PerfilComparacion(
+        "referencia_cuenta",
+        claves=("id_transaccion", "cuenta_origen"),
+        campos=("monto", "estado", "fecha", "cuenta_destino"),
+        tolerancias={"monto": 0.5, "fecha": 86400 * 10},
+    )
+    aleatorio = random.Random(3)
+    ids1 = [f"TXN{aleatorio.randint(0, 60)}" for _ in range(400)]
+    ids2 = [f"TXN{aleatorio.randint(20, 80)}" for _ in range(400)]
+    filas1, filas2 = _filas(ids1, 1), _filas(ids2, 2)
+    columnas1, columnas2 = construir_columnas(1, filas1), construir_columnas(2, filas2)
+
+    resultado = comparar_columnas(columnas1, columnas2, perfil)
+
+    esperado = _clasificar_con_diccionarios(filas1, filas2, perfil)
+    assert _clasificados(resultado, columnas1, columnas2, perfil) == esperado
+    tipos = {tipo for _, tipo in esperado}
+    assert "Diferencia en monto" in tipos and "Diferencia en cuenta destino" in tipos
+    # La diferencia de 0.50 en el monto queda dentro de la tolerancia
+    assert not any("monto" in tipo for _, tipo in _clasificar_con_diccionarios(
+        [("A", datetime(2023, 1, 1), "1", "2", Decimal("10.00"), "Exitosa")],
+        [("A", datetime(2023, 1, 1), "1", "2", Decimal("10.50"), "Exitosa")], perfil,
+    ))
+
+    hojas = construir_hojas(resultado, columnas1, columnas2)
+    assert "cuenta_destino_archivo_2" in hojas["Coincidencias con Diferencias"]
+    assert "fecha_archivo_2" in hojas["Coincidencias Exactas"]
+
+
+# Prueba para verificar las hojas generadas y los casos con archivos vacíos
+def test_construir_hojas():
+    filas1 = [
+        ("A", datetime(2023, 1, 1), "1", "2", Decimal("10.00"), "Exitosa"),
+        ("B", datetime(2023, 1, 2), "1", "2", Decimal("5.00"), "Exitosa"),
+        ("B", datetime(2023, 1, 2), "1", "2", Decimal("7.00"), "Exitosa"),
+    ]
+    filas2 = [
+        ("B", datetime(2023, 1, 2), "1", "2", Decimal("7.00"), "Fallida"),
+        ("C", datetime(2023, 1, 3), "3", "4", Decimal("1.25"), "Exitosa"),
+    ]
+    columnas1, columnas2 = construir_columnas(1, filas1), construir_columnas(2, filas2)
+
+    hojas = construir_hojas(comparar_columnas(columnas1, columnas2), columnas1, columnas2)
+
+    assert list(hojas) == ["Coincidencias con Diferencias", "Solo en Archivo 1", "Solo en Archivo 2"]
+    diferencias = hojas["Coincidencias con Diferencias"].iloc[0]
+    assert diferencias["tipo_coincidencia"] == "Diferencia en estado"
+    assert diferencias["monto_archivo_1"] == 7.0
+    assert hojas["Solo en Archivo 2"].iloc[0]["cuenta_origen"] == "3"
+
+    vacio = construir_columnas(3, [])
+    assert comparar_columnas(columnas1, vacio).conteos()["Solo en Archivo 1"] == 2
+    assert len(comparar_columnas(vacio, vacio)) == 0
+
+
+# Prueba para verificar que una colisión de hash recurre a la comparación exacta
+def test_comparar_columnas_colision_de_hash():
+    import numpy as np
+    from app.services.cache_columnar import CLAVES_ID, indexar_claves
+
+    filas1 = _filas(["A", "B", "C"], 1)
+    filas2 = _filas(["B", "D"], 2)
+    columnas1, columnas2 = construir_columnas(1, filas1), construir_columnas(2, filas2)
+    # Simular que todos los IDs comparten el mismo hash
+    columnas1.indices[CLAVES_ID] = indexar_claves(np.zeros(3, dtype=np.uint64), [columnas1.id_transaccion])
+    columnas2.indices[CLAVES_ID] = indexar_claves(np.zeros(2, dtype=np.uint64), [columnas2.id_transaccion])
+    assert not columnas1.indice().exacto
+
+    resultado = comparar_columnas(columnas1, columnas2)
+
+    categorias = list(resultado.etiquetas())
+    assert categorias.count("Solo en Archivo 1") == 2
+    assert categorias.count("Solo en Archivo 2") == 1
+    assert len(resultado) == 4
+
+
+# Prueba para verificar que la comparación por fragmentos en paralelo da el mismo resultado
+def test_comparar_columnas_en_paralelo(monkeypatch):
+    import numpy as np
+    from app.core.config import settings
+    from app.services.comparacion_paralela import cerrar_pool
+
+    aleatorio = random.Random(11)
+    ids1 = [f"TXN{aleatorio.randint(0, 3000)}" for _ in range(2000)]
+    ids2 = [f"TXN{aleatorio.randint(1000, 4000)}" for _ in range(2000)]
+    columnas1 = construir_columnas(1, _filas(ids1, 1))
+    columnas2 = construir_columnas(2, _filas(ids2, 2))
+    perfil = PerfilComparacion(
+        "cuentas", claves=("id_transaccion",), campos=("monto", "cuenta_origen", "cuenta_destino")
+    )
+    seriales = [comparar_columnas(columnas1, columnas2), comparar_columnas(columnas1, columnas2, perfil)]
+
+    monkeypatch.setattr(settings, "COMPARACION_FRAGMENTOS", 3)
+    monkeypatch.setattr(settings, "COMPARACION_PARALELA_MIN_FILAS", 0)
+    try:
+        paralelos = [comparar_columnas(columnas1, columnas2), comparar_columnas(columnas1, columnas2, perfil)]
+    finally:
+        cerrar_pool()
+
+    for serial, paralelo in zip(seriales, paralelos):
+        assert paralelo.totales is not None
+        assert paralelo.conteos() == serial.conteos()
+        assert np.array_equal(paralelo.filas_1, serial.filas_1)
+        assert np.array_equal(paralelo.filas_2, serial.filas_2)
+        assert np.array_equal(paralelo.categoria, serial.categoria)
+        assert np.array_equal(paralelo.diferencias, serial.diferencias)
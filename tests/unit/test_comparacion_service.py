@@ -182,11 +182,8 @@ async def test_identificar_transacciones_unicas(archivo_service, sample_transacc
 @pytest.mark.asyncio
 async def test_generar_excel_comparacion(archivo_service, sample_transacciones_1, sample_transacciones_2):
     # Crear mocks para los archivos
-    archivo1 = MagicMock()
-    archivo1.transacciones = sample_transacciones_1
-    
-    archivo2 = MagicMock()
-    archivo2.transacciones = sample_transacciones_2
+    archivo1 = MagicMock(id=1, fecha_carga=datetime(2023, 1, 10))
+    archivo2 = MagicMock(id=2, fecha_carga=datetime(2023, 1, 10))
     
     # Configurar el comportamiento del mock de la base de datos
     mock_result1 = MagicMock()
@@ -195,8 +192,19 @@ async def test_generar_excel_comparacion(archivo_service, sample_transacciones_1
     mock_result2 = MagicMock()
     mock_result2.scalars().first.return_value = archivo2
     
+    # Las transacciones se leen como columnas, en el orden en que fueron cargadas
+    def filas(transacciones):
+        resultado = MagicMock()
+        resultado.all.return_value = [
+            (t.id_transaccion, t.fecha, t.cuenta_origen, t.cuenta_destino, t.monto, t.estado)
+            for t in transacciones
+        ]
+        return resultado
+    
     # Configurar el comportamiento del mock de execute
-    archivo_service.db.execute = AsyncMock(side_effect=[mock_result1, mock_result2])
+    archivo_service.db.execute = AsyncMock(side_effect=[
+        mock_result1, mock_result2, filas(sample_transacciones_1), filas(sample_transacciones_2)
+    ])
     
     # Llamar al método a probar
     result = await archivo_service.comparar_archivos_excel(1, 2)
@@ -0,0 +1,49 @@
+import pytest
+from datetime import date, datetime
+from decimal import Decimal
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.models.transaccion import Transaccion
+from app.services.cache_columnar import construir_columnas
+from app.services.filtros import FiltroComparacion, filtro_comparacion
+
+
+@pytest.fixture
+def columnas():
+    filas = [
+        ("TXN001", datetime(2023, 1, 1, 9), "1", "2", Decimal("10.00"), "Exitosa"),
+        ("TXN002", datetime(2023, 1, 2, 23, 59), "3", "4", Decimal("20.00"), "Fallida"),
+        ("TXN003", datetime(2023, 1, 3), "1", "5", Decimal("30.00"), "Exitosa"),
+    ]
+    return construir_columnas(1, filas)
+
+
+# Prueba para verificar el filtro en memoria con ventana de días completos y cuenta
+def test_aplicar_filtro(columnas):
+    ventana = FiltroComparacion(fecha_desde=date(2023, 1, 2), fecha_hasta=date(2023, 1, 2))
+    assert ventana.aplicar(columnas).id_transaccion.tolist() == ["TXN002"]
+
+    por_cuenta = FiltroComparacion(cuenta="1")
+    assert por_cuenta.aplicar(columnas).id_transaccion.tolist() == ["TXN001", "TXN003"]
+
+    assert FiltroComparacion().aplicar(columnas) is columnas
+
+
+# Prueba para verificar que el filtro se traduce a condiciones SQL sobre fecha y cuentas
+def test_condiciones_filtro():
+    filtro = FiltroComparacion(fecha_desde=date(2023, 1, 2), fecha_hasta=date(2023, 1, 2), cuenta="1")
+    consulta = select(Transaccion.id).where(*filtro.condiciones())
+    sql = str(consulta.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+    assert "transacciones.fecha >= '2023-01-02 00:00:00'" in sql
+    assert "transacciones.fecha < '2023-01-03 00:00:00'" in sql
+    assert "transacciones.cuenta_origen = '1' OR transacciones.cuenta_destino = '1'" in sql
+
+
+# Prueba para verificar que se rechaza una ventana de fechas invertida
+def test_filtro_fechas_invertidas():
+    with pytest.raises(HTTPException) as error:
+        filtro_comparacion(fecha_desde=date(2023, 1, 3), fecha_hasta=date(2023, 1, 1))
+    assert error.value.status_code == 400
@@ -0,0 +1,47 @@
+from app.services.firmas import (
+    calcular_firma, combinar_firmas, coincidencias_estimadas, estimar_jaccard, leer_firma, tamano_comun,
+)
+
+
+# Prueba para verificar que la firma guarda los k hashes más chicos de los IDs distintos
+def test_calcular_firma():
+    firma = calcular_firma(["A", "B", "B", "C"], 2)
+    completa = calcular_firma(["C", "A", "B"], 256)
+
+    assert len(leer_firma(firma)) == 2
+    assert len(leer_firma(completa)) == 3
+    assert list(leer_firma(firma)) == list(leer_firma(completa)[:2])
+
+
+# Prueba para verificar que la firma de varias partes es la misma que la del archivo completo
+def test_combinar_firmas():
+    ids = [f"TXN{i % 3000}" for i in range(5000)]
+    partes = [calcular_firma(ids[inicio:inicio + 1000], 256) for inicio in range(0, 5000, 1000)]
+
+    assert combinar_firmas(partes, 256) == calcular_firma(ids, 256)
+    assert combinar_firmas([calcular_firma(["A"], 256), calcular_firma(["A", "B"], 256)], 256) == calcular_firma(["A", "B"], 256)
+
+
+# Prueba para verificar la estimación del índice de Jaccard entre firmas
+def test_estimar_jaccard():
+    ids = [f"TXN{i}" for i in range(20000)]
+    firma = calcular_firma(ids[:10000], 256)
+    candidatas = [calcular_firma(ids[inicio:inicio + 10000], 256) for inicio in (0, 5000, 15000)]
+
+    jaccard = estimar_jaccard(firma, candidatas, 256)
+
+    assert jaccard[0] == 1.0
+    assert abs(jaccard[1] - 1 / 3) < 0.1
+    assert jaccard[2] == 0.0
+    # Con menos IDs que el tamaño de la firma la estimación es exacta
+    assert estimar_jaccard(calcular_firma(["A", "B", "C"], 256), [calcular_firma(["B", "C", "D"], 256)], 256)[0] == 0.5
+    assert coincidencias_estimadas(0.5, 3, 3) == 2
+
+
+# Prueba para verificar que una firma incompleta más corta reduce el tamaño común
+def test_tamano_comun():
+    firmas = [calcular_firma([f"T{i}" for i in range(500)], 256), calcular_firma([f"T{i}" for i in range(500)], 128),
+              calcular_firma(["A"], 256)]
+
+    assert tamano_comun(firmas, [500, 500, 1], 256) == 128
+    assert tamano_comun(firmas[::2], [500, 1], 256) == 256
@@ -0,0 +1,140 @@
+import io
+from decimal import Decimal
+import pytest
+import pandas as pd
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi import UploadFile
+
+from app.models.archivo import Archivo
+from app.services.archivo_service import ArchivoService
+from app.services.formatos_archivo import detectar_texto, formato_archivo, leer_muestras, leer_partes
+from app.services.validacion_archivo import HOJA_PREDETERMINADA, ArchivoInvalido
+
+CSV = (
+    "ID;Fecha;Origen;Destino;Monto;Estado;Descripción\n"
+    "001;2023-01-01;0100;0200;1000.50;Exitosa;Cafetería\n"
+    "002;2023-01-02;0101;0201;20;Fallida;Almacén\n"
+    "003;2023-01-03;0102;0202;30;Exitosa;Peñalolén\n"
+)
+
+
+def archivo_subido(contenido: bytes, nombre: str):
+    return UploadFile(file=io.BytesIO(contenido), filename=nombre, size=len(contenido))
+
+
+def base_de_datos():
+    db = AsyncMock()
+    db.add = MagicMock(side_effect=lambda obj: setattr(obj, 'id', 1) if isinstance(obj, Archivo) else None)
+    db.execute.return_value.scalar_one_or_none = MagicMock(return_value=None)
+    # IDs y cuentas distintos, contados en la base cuando el archivo tiene varias partes
+    db.execute.return_value.one = MagicMock(return_value=(3, 6))
+    return db
+
+
+def filas_insertadas(db):
+    return [fila for c in db.execute.call_args_list
+            if len(c.args) == 2 and c.args[0].table.name == 'transacciones' for fila in c.args[1]]
+
+
+# Prueba para verificar el formato según la extensión
+def test_formato_archivo():
+    assert formato_archivo("enero.XLSX") == "excel"
+    assert formato_archivo("enero.csv") == "csv"
+    assert formato_archivo("enero.tsv") == "tsv"
+    assert formato_archivo("enero.parquet") == "parquet"
+    assert formato_archivo("enero.pdf") is None
+
+
+# Prueba para verificar la detección de codificación y separador
+def test_detectar_texto():
+    assert detectar_texto(io.BytesIO(CSV.encode("cp1252")), "csv") == ("cp1252", ";")
+    assert detectar_texto(io.BytesIO(CSV.encode("utf-8-sig")), "csv") == ("utf-8-sig", ";")
+    assert detectar_texto(io.BytesIO(CSV.replace(";", ",").encode("utf-8")), "csv") == ("utf-8", ",")
+    assert detectar_texto(io.BytesIO(CSV.replace(";", "\t").encode("utf-8")), "tsv") == ("utf-8", "\t")
+
+
+# Prueba para verificar que la muestra de un CSV se lee como texto, sin perder ceros a la izquierda
+def test_leer_muestras_csv():
+    fuente = io.BytesIO(CSV.encode("cp1252"))
+    muestra = leer_muestras(fuente, "csv", 2)[HOJA_PREDETERMINADA]
+
+    assert len(muestra) == 2
+    assert list(muestra['ID']) == ['001', '002']
+    assert muestra['Descripción'][0] == 'Cafetería'
+    assert fuente.tell() == 0
+    with pytest.raises(ArchivoInvalido, match="hojas"):
+        leer_muestras(fuente, "csv", 2, ['dia_1'])
+
+
+# Prueba para verificar que los bloques de CSV y Parquet continúan la numeración de filas
+@pytest.mark.parametrize("formato", ["csv", "parquet"])
+def test_leer_partes_por_bloques(formato):
+    df = pd.read_csv(io.StringIO(CSV), sep=";", dtype=str)
+    fuente = io.BytesIO()
+    if formato == "parquet":
+        df.to_parquet(fuente, index=False)
+    else:
+        df.to_csv(fuente, index=False)
+
+    partes = list(leer_partes(fuente, formato, {HOJA_PREDETERMINADA: {}}, 2))
+
+    assert [len(parte) for _, parte, _ in partes] == [2, 1]
+    assert list(partes[1][1].index) == [2]
+    assert partes[1][1]['ID'][2] == '003'
+
+
+# Prueba para verificar que un CSV por bloques se carga con el mismo camino que un Excel
+@pytest.mark.asyncio
+async def test_procesar_archivo_csv():
+    db = base_de_datos()
+    contenido = CSV.encode("cp1252")
+
+    with patch('app.services.archivo_service.settings.INGESTA_TAMANO_BLOQUE', 2), \
+            patch('app.services.archivo_service.settings.INGESTA_TAMANO_LOTE', 1):
+        archivo = await ArchivoService(db).procesar_archivo(archivo_subido(contenido, "enero.csv"))
+
+    filas = filas_insertadas(db)
+    assert [fila['id_transaccion'] for fila in filas] == ['001', '002', '003']
+    assert filas[0]['cuenta_origen'] == '0100'
+    assert filas[1]['monto'] == 20
+    assert filas[2]['extra_data'] == {'descripción': 'Peñalolén'}
+    assert archivo.total_transacciones == 3
+    assert archivo.monto_total == Decimal('1050.50')
+    assert archivo.transacciones_exitosas == 2
+    assert archivo.fecha_min.day == 1
+    assert archivo.fecha_max.day == 3
+    assert archivo.cuentas_distintas == 6
+
+
+# Prueba para verificar que las filas inválidas de un Parquet se numeran en todo el archivo
+@pytest.mark.asyncio
+async def test_procesar_archivo_parquet_cuarentena():
+    db = base_de_datos()
+    df = pd.DataFrame({
+        'id': ['T1', 'T2', 'T3', 'T4'],
+        'fecha': pd.to_datetime(['2023-01-01', '2023-01-02', '2023-01-03', '2023-01-04']),
+        'origen': ['1', '2', '3', '4'],
+        'destino': ['5', '6', '7', '8'],
+        'monto': [10.0, 20.0, 30.0, 40.0],
+        'estado': ['Exitosa', 'Exitosa', 'Exitosa', 'Pendiente'],
+    })
+    fuente = io.BytesIO()
+    df.to_parquet(fuente, index=False)
+
+    with patch('app.services.archivo_service.settings.INGESTA_TAMANO_BLOQUE', 3):
+        archivo = await ArchivoService(db).procesar_archivo(
+            archivo_subido(fuente.getvalue(), "enero.parquet"), politica="cuarentena"
+        )
+
+    assert [fila['id_transaccion'] for fila in filas_insertadas(db)] == ['T1', 'T2', 'T3']
+    assert archivo.filas_invalidas == 1
+    insercion = next(c for c in db.execute.call_args_list
+                     if len(c.args) == 2 and c.args[0].table.name == 'transacciones_cuarentena')
+    assert [fila['fila'] for fila in insercion.args[1]] == [5]
+
+
+# Prueba para verificar que solo se puede cargar un archivo por hoja desde un Excel
+@pytest.mark.asyncio
+async def test_procesar_hojas_csv():
+    with pytest.raises(ArchivoInvalido, match="Excel"):
+        await ArchivoService(base_de_datos()).procesar_hojas(archivo_subido(CSV.encode(), "enero.csv"))
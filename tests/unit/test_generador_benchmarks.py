@@ -0,0 +1,52 @@
+import pytest
+
+from tests.benchmarks.generador import ParametrosGenerador, generar_par, guardar
+
+
+# Prueba para verificar que la misma semilla produce los mismos archivos
+def test_generador_reproducible():
+    parametros = ParametrosGenerador(filas=500, semilla=7)
+
+    df1_a, df2_a = generar_par(parametros)
+    df1_b, df2_b = generar_par(parametros)
+
+    assert df1_a.equals(df1_b)
+    assert df2_a.equals(df2_b)
+
+
+# Prueba para verificar el solapamiento y las discrepancias controladas
+def test_generador_solapamiento_y_discrepancias():
+    parametros = ParametrosGenerador(
+        filas=1000,
+        solapamiento=0.6,
+        tasa_diferencia_monto=0.1,
+        tasa_diferencia_estado=0.0,
+        tasa_duplicados=0.0,
+        formatos_sucios=False,
+    )
+
+    df1, df2 = generar_par(parametros)
+
+    assert len(df1) == len(df2) == 1000
+    comunes = set(df1['id_transaccion']) & set(df2['id_transaccion'])
+    assert len(comunes) == 600
+
+    unidos = df1.merge(df2, on='id_transaccion', suffixes=('_1', '_2'))
+    diferencias_monto = (unidos['monto_1'] != unidos['monto_2']).sum()
+    assert 20 < diferencias_monto < 100
+    assert (unidos['estado_1'] == unidos['estado_2']).all()
+
+
+# Prueba para verificar la generación de IDs duplicados
+def test_generador_duplicados():
+    df1, _ = generar_par(ParametrosGenerador(filas=1000, tasa_duplicados=0.05, formatos_sucios=False))
+
+    assert df1['id_transaccion'].duplicated().sum() > 0
+
+
+# Prueba para verificar que se rechazan formatos no soportados
+def test_guardar_rechaza_formato_desconocido(tmp_path):
+    df1, _ = generar_par(ParametrosGenerador(filas=10))
+
+    with pytest.raises(ValueError):
+        guardar(df1, str(tmp_path / "estado.txt"))
@@ -0,0 +1,91 @@
+import io
+import pytest
+import pandas as pd
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi import UploadFile
+
+from app.models.archivo import Archivo
+from app.services.archivo_service import ArchivoService
+from app.services.lectura_hojas import cerrar_pool, leer_hojas
+
+
+def libro():
+    # Una hoja por día, con cabeceras distintas
+    dia_1 = pd.DataFrame({
+        'id_transaccion': ['T1', 'T2'],
+        'fecha': ['2023-01-01', '2023-01-01'],
+        'cuenta_origen': ['1', '2'],
+        'cuenta_destino': ['3', '4'],
+        'monto': [10.5, 20],
+        'estado': ['Exitosa', 'Fallida'],
+    })
+    dia_2 = pd.DataFrame({
+        'ID': ['T3', 'T4', 'T5'],
+        'Date': ['2023-01-02', '2023-01-02', '2023-01-02'],
+        'From': ['5', '6', '7'],
+        'To': ['8', '9', '0'],
+        'Amount': ['$1,000.00', '2', '3'],
+        'Status': ['Exitosa', 'Exitosa', 'Fallida'],
+        'Nota': ['a', 'b', 'c'],
+    })
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer) as writer:
+        dia_1.to_excel(writer, sheet_name='dia_1', index=False)
+        dia_2.to_excel(writer, sheet_name='dia_2', index=False)
+    return buffer.getvalue()
+
+
+# Prueba para verificar que las hojas se parsean en paralelo en el orden pedido
+def test_leer_hojas_en_paralelo():
+    contents = libro()
+    try:
+        with patch('app.services.lectura_hojas.settings.INGESTA_PROCESOS_HOJAS', 2):
+            paralelo = leer_hojas(contents, ['dia_2', 'dia_1'])
+    finally:
+        cerrar_pool()
+    with patch('app.services.lectura_hojas.settings.INGESTA_PROCESOS_HOJAS', 1):
+        secuencial = leer_hojas(contents, ['dia_2', 'dia_1'])
+
+    assert [len(df) for df in paralelo] == [3, 2]
+    for df_paralelo, df_secuencial in zip(paralelo, secuencial):
+        pd.testing.assert_frame_equal(df_paralelo, df_secuencial)
+
+
+# Prueba para verificar que varias hojas con cabeceras distintas se cargan en un solo archivo
+@pytest.mark.asyncio
+async def test_procesar_archivo_varias_hojas():
+    db = AsyncMock()
+    db.add = MagicMock(side_effect=lambda obj: setattr(obj, 'id', 1) if isinstance(obj, Archivo) else None)
+    db.execute.return_value.scalar_one_or_none = MagicMock(return_value=None)
+    db.execute.return_value.one = MagicMock(return_value=(5, 10))
+    mock_file = MagicMock(spec=UploadFile)
+    mock_file.filename = "enero.xlsx"
+    mock_file.read = AsyncMock(return_value=libro())
+
+    archivo = await ArchivoService(db).procesar_archivo(mock_file, hojas=['*'])
+
+    filas = [fila for c in db.execute.call_args_list
+             if len(c.args) == 2 and c.args[0].table.name == 'transacciones' for fila in c.args[1]]
+    assert [fila['id_transaccion'] for fila in filas] == ['T1', 'T2', 'T3', 'T4', 'T5']
+    assert filas[2]['monto'] == 1000
+    assert filas[2]['cuenta_origen'] == '5'
+    assert filas[0]['extra_data'] is None
+    assert filas[2]['extra_data'] == {'nota': 'a'}
+    assert archivo.total_transacciones == 5
+    assert archivo.ids_distintos == 5
+    assert archivo.fecha_max.day == 2
+
+
+# Prueba para verificar que el pool se dimensiona por la configuración y no por el primer libro
+def test_pool_dimensionado_por_configuracion():
+    from app.services import lectura_hojas
+
+    contents = libro()
+    try:
+        with patch('app.services.lectura_hojas.settings.INGESTA_PROCESOS_HOJAS', 3):
+            leidas = leer_hojas(contents, ['dia_1', 'dia_2'])
+            assert lectura_hojas._pool._max_workers == 3
+    finally:
+        cerrar_pool()
+
+    assert [len(df) for df in leidas] == [2, 3]
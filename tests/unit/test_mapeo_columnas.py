@@ -0,0 +1,85 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services.mapeo_columnas import (
+    CacheMapeos, detectar_mapeo, firma_cabecera, normalizar_cabecera, validar_mapeo,
+)
+from app.services.perfil_mapeo_service import PerfilMapeoService
+
+CABECERA = ['id', 'fecha', 'origen', 'destino', 'monto', 'estado', 'nota']
+CABECERA_NUEVA = ['ref', 'dia', 'debito', 'credito', 'importe', 'resultado']
+MAPEO_NUEVO = {
+    'id_transaccion': 'REF', 'fecha': 'dia', 'cuenta_origen': 'debito',
+    'cuenta_destino': 'credito', 'monto': ' Importe', 'estado': 'resultado',
+}
+
+
+def resultado_consulta(valor):
+    resultado = MagicMock()
+    resultado.scalar_one_or_none.return_value = valor
+    return resultado
+
+
+# Prueba para verificar que la firma no depende del orden de las columnas
+def test_firma_cabecera():
+    assert normalizar_cabecera([' ID ', 'Fecha', 3]) == ['id', 'fecha', '3']
+    assert firma_cabecera(CABECERA) == firma_cabecera(list(reversed(CABECERA)))
+    assert firma_cabecera(CABECERA) != firma_cabecera(CABECERA[:-1])
+
+
+# Prueba para verificar la detección por alias y el error con una cabecera desconocida
+def test_detectar_mapeo():
+    mapeo = detectar_mapeo(CABECERA)
+    assert mapeo['id_transaccion'] == 'id'
+    assert mapeo['cuenta_origen'] == 'origen'
+    with pytest.raises(ValueError, match="id_transaccion"):
+        detectar_mapeo(CABECERA_NUEVA)
+
+
+# Prueba para verificar la validación del mapeo de un perfil
+def test_validar_mapeo():
+    assert validar_mapeo(MAPEO_NUEVO, CABECERA_NUEVA)['monto'] == 'importe'
+    with pytest.raises(ValueError, match="Faltan"):
+        validar_mapeo({'id_transaccion': 'ref'}, CABECERA_NUEVA)
+    with pytest.raises(ValueError, match="no están en la cabecera"):
+        validar_mapeo({**MAPEO_NUEVO, 'monto': 'total'}, CABECERA_NUEVA)
+    with pytest.raises(ValueError, match="no válidos"):
+        validar_mapeo({**MAPEO_NUEVO, 'sucursal': 'ref'}, CABECERA_NUEVA)
+
+
+# Prueba para verificar que las entradas de la caché vencen
+def test_cache_mapeos_vencimiento():
+    cache = CacheMapeos(ttl=10)
+    with patch('app.services.mapeo_columnas.time.monotonic', return_value=100.0):
+        cache.guardar('firma', {'monto': 'importe'})
+        assert cache.obtener('firma') == {'monto': 'importe'}
+    with patch('app.services.mapeo_columnas.time.monotonic', return_value=110.0):
+        assert cache.obtener('firma') is None
+    assert CacheMapeos(ttl=0).obtener('firma') is None
+
+
+# Prueba para verificar que una cabecera conocida no vuelve a consultar la base de datos
+@pytest.mark.asyncio
+async def test_resolver_mapeo_perfil_registrado():
+    db = AsyncMock()
+    db.execute = AsyncMock(return_value=resultado_consulta(validar_mapeo(MAPEO_NUEVO, CABECERA_NUEVA)))
+    servicio = PerfilMapeoService(db)
+
+    with patch('app.services.perfil_mapeo_service.cache_mapeos', CacheMapeos(ttl=60)):
+        primero = await servicio.resolver_mapeo(CABECERA_NUEVA)
+        segundo = await servicio.resolver_mapeo(list(reversed(CABECERA_NUEVA)))
+
+    assert primero == segundo
+    assert primero['cuenta_origen'] == 'debito'
+    assert db.execute.await_count == 1
+
+
+# Prueba para verificar el mensaje cuando la cabecera no tiene perfil ni alias conocidos
+@pytest.mark.asyncio
+async def test_resolver_mapeo_cabecera_desconocida():
+    db = AsyncMock()
+    db.execute = AsyncMock(return_value=resultado_consulta(None))
+
+    with patch('app.services.perfil_mapeo_service.cache_mapeos', CacheMapeos(ttl=60)):
+        with pytest.raises(ValueError, match="Registre un perfil de mapeo"):
+            await PerfilMapeoService(db).resolver_mapeo(CABECERA_NUEVA)
@@ -0,0 +1,49 @@
+import pytest
+from unittest.mock import MagicMock
+
+from app.core.metricas import DURACION_ETAPA, CONEXIONES_POOL, medir_etapa, actualizar_metricas_pool
+
+
+def _conteo_observaciones(pipeline, etapa):
+    for metrica in DURACION_ETAPA.collect():
+        for muestra in metrica.samples:
+            if (muestra.name.endswith("_count")
+                    and muestra.labels == {"pipeline": pipeline, "etapa": etapa}):
+                return muestra.value
+    return 0
+
+
+# Prueba para verificar que cada etapa medida registra una observación
+def test_medir_etapa_registra_observacion():
+    antes = _conteo_observaciones("prueba", "etapa")
+
+    with medir_etapa("prueba", "etapa"):
+        pass
+
+    assert _conteo_observaciones("prueba", "etapa") == antes + 1
+
+
+# Prueba para verificar que la etapa se registra aunque falle
+def test_medir_etapa_registra_con_excepcion():
+    antes = _conteo_observaciones("prueba", "fallida")
+
+    with pytest.raises(ValueError):
+        with medir_etapa("prueba", "fallida"):
+            raise ValueError("error")
+
+    assert _conteo_observaciones("prueba", "fallida") == antes + 1
+
+
+# Prueba para verificar la lectura del estado del pool de conexiones
+def test_actualizar_metricas_pool():
+    pool = MagicMock()
+    pool.checkedout.return_value = 3
+    pool.checkedin.return_value = 2
+    pool.overflow.return_value = -5
+    pool.size.return_value = 5
+
+    actualizar_metricas_pool(pool)
+
+    assert CONEXIONES_POOL.labels("en_uso")._value.get() == 3
+    assert CONEXIONES_POOL.labels("disponibles")._value.get() == 2
+    assert CONEXIONES_POOL.labels("desbordamiento")._value.get() == 0
@@ -0,0 +1,77 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi import UploadFile
+
+from app.db.particiones import crear_particion, eliminar_particion, nombre_particion
+from app.models.archivo import Archivo
+from app.services.archivo_service import ArchivoService
+
+
+def _sentencias(db):
+    return [str(llamada.args[0]) for llamada in db.execute.call_args_list]
+
+
+def _conexion_autocommit(db, detach_pendiente=False):
+    # Conexión propia en autocommit que usa eliminar_particion
+    conexion = AsyncMock()
+    conexion.execution_options = AsyncMock(return_value=conexion)
+    conexion.execute.return_value = MagicMock(scalar=MagicMock(return_value=detach_pendiente))
+    db.bind = MagicMock()
+    db.bind.connect.return_value.__aenter__.return_value = conexion
+    return conexion
+
+
+# Prueba para verificar el nombre de la partición de un archivo
+def test_nombre_particion():
+    assert nombre_particion(42) == "transacciones_p42"
+    with pytest.raises(ValueError):
+        nombre_particion("1; DROP TABLE archivos")
+
+
+# Prueba para verificar que la partición se crea aparte y luego se adjunta a la tabla padre
+@pytest.mark.asyncio
+async def test_crear_particion_adjunta():
+    db = AsyncMock()
+    await crear_particion(db, 7)
+
+    sentencias = _sentencias(db)
+    assert any(s.startswith("CREATE TABLE transacciones_p7 (LIKE transacciones") for s in sentencias)
+    assert sentencias[-1] == "ALTER TABLE transacciones ATTACH PARTITION transacciones_p7 FOR VALUES IN (7)"
+
+
+# Prueba para verificar que una ingesta fallida elimina el archivo y su partición
+@pytest.mark.asyncio
+async def test_procesar_archivo_fallido_elimina_particion():
+    db = AsyncMock()
+    db.add = MagicMock(side_effect=lambda obj: setattr(obj, 'id', 3) if isinstance(obj, Archivo) else None)
+    conexion = _conexion_autocommit(db)
+    archivo_service = ArchivoService(db)
+
+    mock_file = MagicMock(spec=UploadFile)
+    mock_file.filename = "roto.xlsx"
+    mock_file.read = AsyncMock(return_value=b"no es un excel")
+
+    # La validación previa rechazaría el archivo antes de registrarlo; se omite para que
+    # la falla ocurra durante la ingesta
+    with patch.object(ArchivoService, 'validar_archivo', AsyncMock(return_value=({0: {}}, 0, []))):
+        with pytest.raises(Exception):
+            await archivo_service.procesar_archivo(mock_file)
+
+    sentencias = _sentencias(conexion)
+    assert "ALTER TABLE transacciones DETACH PARTITION transacciones_p3 CONCURRENTLY" in sentencias
+    assert "DROP TABLE transacciones_p3" in sentencias
+    assert db.rollback.called
+
+
+# Prueba para verificar que una separación interrumpida se finaliza en lugar de repetirse
+@pytest.mark.asyncio
+async def test_eliminar_particion_finaliza_separacion_pendiente():
+    db = AsyncMock()
+    conexion = _conexion_autocommit(db, detach_pendiente=True)
+
+    await eliminar_particion(db, 5)
+
+    sentencias = _sentencias(conexion)
+    assert "ALTER TABLE transacciones DETACH PARTITION transacciones_p5 FINALIZE" in sentencias
+    assert sentencias[-2:] == ["DROP TABLE transacciones_p5", "RESET lock_timeout"]
+    assert not db.execute.called
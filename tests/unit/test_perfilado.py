@@ -0,0 +1,81 @@
+import json
+import os
+import pytest
+from unittest.mock import MagicMock
+
+from app.core.config import settings
+from app.core.perfilado import HEADER_PERFILADO, perfilar, ruta_perfil
+
+
+@pytest.fixture
+def solicitud_perfilada():
+    request = MagicMock()
+    request.headers = {HEADER_PERFILADO: "1"}
+    return request
+
+
+@pytest.fixture
+def perfilado_habilitado(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "PERFILADO_HABILITADO", True)
+    monkeypatch.setattr(settings, "PERFILADO_DIRECTORIO", str(tmp_path))
+    return tmp_path
+
+
+# Prueba para verificar que el perfilado no se activa si está deshabilitado
+@pytest.mark.asyncio
+async def test_perfilar_deshabilitado(monkeypatch, solicitud_perfilada):
+    monkeypatch.setattr(settings, "PERFILADO_HABILITADO", False)
+
+    async with perfilar(solicitud_perfilada, "prueba") as perfil_id:
+        pass
+
+    assert perfil_id is None
+
+
+# Prueba para verificar que el perfilado requiere la cabecera
+@pytest.mark.asyncio
+async def test_perfilar_sin_cabecera(perfilado_habilitado):
+    request = MagicMock()
+    request.headers = {}
+
+    async with perfilar(request, "prueba") as perfil_id:
+        pass
+
+    assert perfil_id is None
+
+
+# Prueba para verificar que se guardan el reporte HTML y las asignaciones
+@pytest.mark.asyncio
+async def test_perfilar_guarda_reportes(perfilado_habilitado, solicitud_perfilada):
+    async with perfilar(solicitud_perfilada, "prueba") as perfil_id:
+        datos = [list(range(100)) for _ in range(100)]
+
+    assert perfil_id is not None
+    assert os.path.exists(ruta_perfil(perfil_id, "html"))
+
+    with open(ruta_perfil(perfil_id, "json")) as f:
+        reporte = json.load(f)
+    assert reporte["endpoint"] == "prueba"
+    assert reporte["asignaciones"]
+
+
+# Prueba para verificar que no se aceptan IDs de perfil arbitrarios
+def test_ruta_perfil_invalida():
+    assert ruta_perfil("../../etc/passwd", "html") is None
+
+
+# Prueba para verificar que un error al guardar el perfil no reemplaza el error de la solicitud
+@pytest.mark.asyncio
+async def test_perfilar_error_reporte_no_oculta_error(perfilado_habilitado, solicitud_perfilada, monkeypatch):
+    import tracemalloc
+
+    def fallar(*args):
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr("app.core.perfilado._guardar_perfil", fallar)
+
+    with pytest.raises(ValueError, match="de la solicitud"):
+        async with perfilar(solicitud_perfilada, "prueba"):
+            raise ValueError("error de la solicitud")
+
+    assert not tracemalloc.is_tracing()
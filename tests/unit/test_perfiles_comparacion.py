@@ -0,0 +1,44 @@
+import pytest
+from fastapi import HTTPException
+
+from app.services.perfiles_comparacion import PERFIL_ESTANDAR, PerfilComparacion, cargar_perfiles, perfil_comparacion
+
+
+# Prueba para verificar que los perfiles de la configuración se suman al estándar
+def test_cargar_perfiles():
+    perfiles = cargar_perfiles({
+        "referencia_cuenta": {
+            "claves": ["id_transaccion", "cuenta_origen"],
+            "campos": ["monto", "fecha"],
+            "tolerancias": {"monto": 0.01, "fecha": 86400},
+        }
+    })
+
+    assert perfiles["estandar"] is PERFIL_ESTANDAR
+    perfil = perfiles["referencia_cuenta"]
+    assert perfil.claves == ("id_transaccion", "cuenta_origen")
+    assert perfil.campos == ("monto", "fecha")
+    assert not perfil.estandar
+
+
+# Prueba para verificar que se rechazan perfiles mal definidos
+@pytest.mark.parametrize("claves, campos, tolerancias", [
+    ((), ("monto",), {}),
+    (("monto",), ("estado",), {}),
+    (("id_transaccion",), ("id_transaccion",), {}),
+    (("id_transaccion", "fecha"), ("fecha",), {}),
+    (("id_transaccion",), ("estado",), {"estado": 1}),
+    (("id_transaccion",), ("monto",), {"fecha": 60}),
+    (("id_transaccion",), ("monto",), {"monto": -1}),
+])
+def test_perfil_invalido(claves, campos, tolerancias):
+    with pytest.raises(ValueError):
+        PerfilComparacion("invalido", claves, campos, tolerancias)
+
+
+# Prueba para verificar que un perfil desconocido devuelve 400
+def test_perfil_comparacion_desconocido():
+    assert perfil_comparacion() is PERFIL_ESTANDAR
+    with pytest.raises(HTTPException) as error:
+        perfil_comparacion("inexistente")
+    assert error.value.status_code == 400
@@ -0,0 +1,38 @@
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from sqlalchemy.dialects import postgresql
+
+from app.services.transaccion_service import TransaccionService
+
+
+# Fixture para crear un servicio de transacciones con una base de datos simulada
+@pytest.fixture
+def transaccion_service():
+    mock_db = AsyncMock()
+    return TransaccionService(mock_db)
+
+
+# Prueba para verificar el historial de varios IDs con una consulta por arreglo
+@pytest.mark.asyncio
+async def test_get_historial(transaccion_service):
+    def fila(id_transaccion, archivo_id, monto):
+        return SimpleNamespace(
+            id_transaccion=id_transaccion, archivo_id=archivo_id, nombre_archivo=f"archivo{archivo_id}.xlsx",
+            fecha=datetime(2023, 1, archivo_id), monto=Decimal(monto), estado="Exitosa",
+        )
+    transaccion_service.db.execute.return_value = [fila("TXN1", 1, "10.00"), fila("TXN1", 2, "12.00")]
+
+    historial = await transaccion_service.get_historial(["TXN1", "TXN2", "TXN1"])
+
+    consulta = transaccion_service.db.execute.call_args.args[0]
+    sql = str(consulta.compile(dialect=postgresql.dialect()))
+    assert "= ANY (%(ids)s::VARCHAR[])" in sql
+    assert consulta.compile().params["ids"] == ["TXN1", "TXN2"]
+
+    assert [h.id_transaccion for h in historial] == ["TXN1", "TXN2"]
+    assert [a.monto for a in historial[0].apariciones] == [Decimal("10.00"), Decimal("12.00")]
+    assert historial[0].apariciones[1].nombre_archivo == "archivo2.xlsx"
+    assert historial[1].apariciones == []
@@ -0,0 +1,87 @@
+import io
+import pytest
+import pandas as pd
+
+from app.services.mapeo_columnas import detectar_mapeo
+from app.services.validacion_archivo import (
+    ArchivoInvalido, leer_muestra, motivos_filas, seleccionar_hojas, validar_filas, validar_muestra,
+)
+
+
+def muestra(**cambios):
+    data = {
+        'id_transaccion': ['TXN001', 'TXN002', 'TXN003'],
+        'fecha': ['2023-01-01', '2023-01-02', '2023-01-03'],
+        'cuenta_origen': ['123456', '234567', '345678'],
+        'cuenta_destino': ['654321', '765432', '876543'],
+        'monto': ['$1,234.56', 200.75, 300.25],
+        'estado': ['Exitosa', 'Fallida', 'Exitosa'],
+    }
+    data.update(cambios)
+    return pd.DataFrame(data)
+
+
+# Prueba para verificar que una muestra correcta no tiene errores
+def test_validar_muestra_correcta():
+    df = muestra()
+    assert validar_muestra(df, detectar_mapeo(df.columns)) == []
+
+
+# Prueba para verificar que cada error indica la columna y la fila de la hoja
+def test_validar_muestra_errores():
+    df = muestra(
+        id_transaccion=['TXN001', None, 'TXN003'],
+        fecha=['2023-01-01', 'ayer', '2023-01-03'],
+        monto=['abc', 200.75, 300.25],
+        estado=['Exitosa', 'Fallida', 'Pendiente'],
+    )
+
+    errores = validar_muestra(df, detectar_mapeo(df.columns))
+
+    assert errores == [
+        "Valores vacíos en la columna 'id_transaccion' (id_transaccion), filas 3",
+        "Fechas no válidas en la columna 'fecha', filas 3",
+        "Montos no válidos en la columna 'monto', filas 2",
+        "Estados no válidos en la columna 'estado' (Pendiente), filas 4; se admiten Exitosa, Fallida",
+    ]
+
+
+# Prueba para verificar que cada fila inválida reúne todos sus motivos
+def test_motivos_filas():
+    df = muestra(
+        fecha=['2023-01-01', 'ayer', '2023-01-03'],
+        estado=['Exitosa', 'Pendiente', None],
+    )
+
+    mascara, motivos = motivos_filas(validar_filas(df, detectar_mapeo(df.columns)))
+
+    assert mascara.tolist() == [False, True, True]
+    assert motivos.tolist() == [
+        "Fechas no válidas en la columna 'fecha'; Estados no válidos en la columna 'estado'",
+        "Valores vacíos en la columna 'estado' (estado)",
+    ]
+
+
+# Prueba para verificar que solo se leen las filas de la muestra de cada hoja
+def test_leer_muestra():
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer) as writer:
+        pd.concat([muestra()] * 10).to_excel(writer, sheet_name='dia_1', index=False)
+        muestra().to_excel(writer, sheet_name='dia_2', index=False)
+
+    muestras = leer_muestra(buffer.getvalue(), 5)
+    assert list(muestras) == [0]
+    assert len(muestras[0]) == 5
+    assert {hoja: len(df) for hoja, df in leer_muestra(buffer.getvalue(), 5, ['*']).items()} == {'dia_1': 5, 'dia_2': 3}
+    with pytest.raises(ArchivoInvalido, match="Hojas no encontradas en el libro: dia_3"):
+        leer_muestra(buffer.getvalue(), 5, ['dia_1', 'dia_3'])
+    with pytest.raises(ArchivoInvalido, match="No se pudo leer"):
+        leer_muestra(b"no es un excel", 5)
+
+
+# Prueba para verificar la selección de hojas
+def test_seleccionar_hojas():
+    nombres = ['dia_1', 'dia_2', 'dia_3']
+    assert seleccionar_hojas(nombres) == [0]
+    assert seleccionar_hojas(nombres, ['*']) == nombres
+    assert seleccionar_hojas(nombres, ['dia_3', 'dia_1', 'dia_3']) == ['dia_3', 'dia_1']